@@ -1,17 +1,21 @@
 """
 Brain Module API Endpoint
 Implements POST /api/v1/brain/process with frozen input/output contracts
+and POST /api/v1/brain/process_batch for bulk imports
+and POST /api/v1/brain/process/stream (Server-Sent Events) for chat UIs
 """
 
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, validator
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Union
 import json
 import logging
 from datetime import datetime
 
 from backend_app.shared.exceptions import bad_request, validation_error
 from backend_app.brain_module.brain_service import BrainService
+from backend_app.brain_module.parsing.structured_output import parse_json_response, OUTPUT_SCHEMAS
 from backend_app.brain_module.utils.logger import get_logger
 
 logger = get_logger("brain_api")
@@ -19,6 +23,9 @@ logger = get_logger("brain_api")
 # Valid modes
 VALID_MODES = ["resume_parse", "jd_parse", "match", "chat"]
 
+# Upper bound of items accepted by /process_batch
+MAX_BATCH_ITEMS = 500
+
 class BrainInputContract(BaseModel):
     """Frozen Brain Input Contract"""
     mode: str
@@ -54,6 +61,25 @@ class BrainOutputContract(BaseModel):
     metadata: Dict[str, Any]
     raw_response: str
 
+class BrainBatchInputContract(BaseModel):
+    """Batch Input Contract: several brain requests in one call"""
+    items: List[BrainInputContract]
+    
+    @validator('items')
+    def validate_items(cls, v):
+        if not v:
+            raise ValueError("items cannot be empty")
+        if len(v) > MAX_BATCH_ITEMS:
+            raise ValueError(f"at most {MAX_BATCH_ITEMS} items per batch")
+        return v
+
+class BrainBatchOutputContract(BaseModel):
+    """Batch Output Contract: one BrainOutputContract per input item, in order"""
+    results: List[BrainOutputContract]
+    total: int
+    succeeded: int
+    deduplicated: int
+
 class BrainHealthResponse(BaseModel):
     """Health check response"""
     status: str
@@ -95,8 +121,9 @@ async def process_brain_request(request: BrainInputContract):
         
         # Special validation for match mode
         if request.mode == "match":
-            candidate_data = request.metadata.get("candidate_data", "")
-            jd_data = request.metadata.get("jd_data", "")
+            metadata = request.metadata or {}
+            candidate_data = metadata.get("candidate_data", "")
+            jd_data = metadata.get("jd_data", "")
             if not candidate_data or not jd_data:
                 raise validation_error(
                     "match mode requires 'candidate_data' and 'jd_data' in metadata",
@@ -118,37 +145,142 @@ async def process_brain_request(request: BrainInputContract):
             "BRAIN_PROCESSING_ERROR"
         )
 
+@router.post("/process/stream")
+async def process_brain_request_stream(request: BrainInputContract):
+    """
+    Streaming variant of /process (text/event-stream).
+    Emits `delta` events ({"text": ...}) as tokens arrive, `field` events ({"key", "value"})
+    as top-level JSON fields of structured modes complete, and one final `done` event
+    carrying the regular BrainOutputContract; `error` is sent if processing fails mid-stream.
+    """
+    if request.mode == "match":
+        metadata = request.metadata or {}
+        if not metadata.get("candidate_data", "") or not metadata.get("jd_data", ""):
+            raise validation_error(
+                "match mode requires 'candidate_data' and 'jd_data' in metadata",
+                "MISSING_MATCH_DATA"
+            )
+
+    logger.info("Streaming brain request", extra={"mode": request.mode, "text_length": len(request.text)})
+
+    async def event_source():
+        try:
+            async for event in brain_service.process_stream(_build_qitem(request)):
+                if event["type"] == "delta":
+                    yield _sse("delta", {"text": event["text"]})
+                elif event["type"] == "field":
+                    yield _sse("field", {"key": event["key"], "value": event["value"]})
+                else:
+                    output = _validate_output_contract(_format_brain_result(event, request), request.mode)
+                    yield _sse("done", output.model_dump())
+        except Exception:
+            logger.error("Error streaming brain request", exc_info=True)
+            yield _sse("error", {"message": "Failed to process brain request", "error_code": "BRAIN_PROCESSING_ERROR"})
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/process_batch", response_model=BrainBatchOutputContract)
+async def process_brain_batch(request: BrainBatchInputContract):
+    """
+    Process many brain requests (e.g. bulk resume imports) in one call.
+    Identical texts are parsed once, short resumes/JDs are packed into shared prompts,
+    and provider calls run with bounded concurrency.
+    """
+    try:
+        logger.info("Processing brain batch", extra={"items": len(request.items)})
+        
+        for index, item in enumerate(request.items):
+            if item.mode == "match":
+                metadata = item.metadata or {}
+                if not metadata.get("candidate_data", "") or not metadata.get("jd_data", ""):
+                    raise validation_error(
+                        f"items[{index}]: match mode requires 'candidate_data' and 'jd_data' in metadata",
+                        "MISSING_MATCH_DATA"
+                    )
+        
+        batch_id = int(datetime.now().timestamp() * 1000)
+        qitems = [_build_qitem(item, qid=f"brain_{batch_id}_{i}") for i, item in enumerate(request.items)]
+        results = await brain_service.process_batch(qitems)
+        
+        outputs = [
+            _validate_output_contract(_format_brain_result(result, item), item.mode)
+            for result, item in zip(results, request.items)
+        ]
+        return BrainBatchOutputContract(
+            results=outputs,
+            total=len(outputs),
+            succeeded=sum(1 for o in outputs if o.success),
+            deduplicated=sum(1 for r in results if r.get("deduplicated"))
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error processing brain batch", exc_info=True)
+        raise internal_server_error(
+            "Failed to process brain batch",
+            "BRAIN_BATCH_PROCESSING_ERROR"
+        )
+
 @router.get("/health", response_model=BrainHealthResponse)
 async def brain_health_check():
     """Brain module health check endpoint"""
     return BrainHealthResponse(status="ok")
 
+@router.get("/cache/stats")
+async def brain_cache_stats():
+    """Response cache hit/miss counters"""
+    return brain_service.cache_stats()
+
+@router.get("/prompts/templates")
+async def brain_prompt_templates():
+    """Compiled prompt template versions and static prefix token counts"""
+    return brain_service.template_stats()
+
+@router.get("/providers/stats")
+async def brain_provider_stats():
+    """Per-provider latency percentiles and circuit breaker state"""
+    return brain_service.provider_stats()
+
 async def _process_with_brain_service(request: BrainInputContract) -> Dict[str, Any]:
     """Process request through BrainService"""
     
+    # Process through brain service
+    result = await brain_service.process(_build_qitem(request))
+    
+    return _format_brain_result(result, request)
+
+def _build_qitem(request: BrainInputContract, qid: Optional[str] = None) -> Dict[str, Any]:
+    """Build BrainService qitem from an input contract"""
+    metadata = request.metadata or {}
+
     # Prepare data for brain service based on mode
     if request.mode == "match":
         # For match mode, combine candidate and job data
-        candidate_data = request.metadata.get("candidate_data", "")
-        jd_data = request.metadata.get("jd_data", "")
+        candidate_data = metadata.get("candidate_data", "")
+        jd_data = metadata.get("jd_data", "")
         text = f"Candidate: {candidate_data}\n\nJob: {jd_data}"
         intake_type = "match"
-        meta = request.metadata
+        meta = metadata
     else:
         text = request.text
         intake_type = request.mode
-        meta = request.metadata
+        meta = metadata
     
     # Create qitem for brain service
-    qitem = {
-        "qid": f"brain_{int(datetime.now().timestamp() * 1000)}",
+    return {
+        "qid": qid or f"brain_{int(datetime.now().timestamp() * 1000)}",
         "text": text,
         "intake_type": intake_type,
         "meta": meta
     }
-    
-    # Process through brain service
-    result = brain_service.process(qitem)
+
+def _format_brain_result(result: Dict[str, Any], request: BrainInputContract) -> Dict[str, Any]:
+    """Map a BrainService result onto the output contract fields"""
     
     # Parse provider response to extract structured data
     provider_response = result.get("response", "")
@@ -172,12 +304,24 @@ async def _process_with_brain_service(request: BrainInputContract) -> Dict[str,
         "data": parsed_data,
         "provider": result.get("provider", "unknown"),
         "tokens": tokens,
-        "metadata": request.metadata,
+        "metadata": request.metadata or {},
         "raw_response": provider_response
     }
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 def _parse_provider_response(response: str, mode: str) -> Dict[str, Any]:
     """Parse provider response based on mode"""
+    if mode in OUTPUT_SCHEMAS:
+        # strict-JSON fast path; also recovers objects wrapped in prose or code fences
+        parsed, errors = parse_json_response(response, mode)
+        if errors:
+            logger.warning(f"Mode {mode} response issues: {'; '.join(errors[:5])}")
+        if parsed is not None:
+            return parsed
+        return {"raw": response, "text": response, "parse_error": "; ".join(errors)}
     try:
         # Try to parse as JSON first
         if response.strip().startswith(('{', '[')):
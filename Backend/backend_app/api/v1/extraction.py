@@ -5,6 +5,7 @@ Exact specification: POST /api/v1/extraction/run
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from fastapi.responses import JSONResponse
 from typing import Optional, Dict, Any
+import asyncio
 import logging
 import os
 import json
@@ -12,7 +13,9 @@ import tempfile
 from pathlib import Path
 from datetime import datetime
 
-from backend_app.text_extraction.consolidated_extractor import extract_with_logging
+from backend_app.text_extraction.consolidated_extractor import extract_with_logging, logbook
+from backend_app.text_extraction import parallel_ocr
+from backend_app.text_extraction.upload_spool import spool_upload, UploadTooLarge
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -65,46 +68,40 @@ async def run_extraction(
                 detail=f"Unsupported file type: {file.content_type}. Supported types: PDF, DOC, DOCX, JPG, PNG, TIFF"
             )
 
-        # Check file size (10MB limit)
-        content = await file.read()
+        # Stream the upload to disk in chunks (10MB limit enforced while reading); the hash and
+        # magic-byte type are computed on the way, so the file is never held in memory
         max_size = 10 * 1024 * 1024  # 10MB
-        if len(content) > max_size:
+        try:
+            spooled = await spool_upload(file, "./temp_extractions", max_bytes=max_size)
+        except UploadTooLarge:
             raise HTTPException(
                 status_code=400,
                 detail="File too large. Maximum file size is 10MB."
             )
 
-        # Save file to temporary path
-        temp_dir = "./temp_extractions"
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        # Create unique filename to avoid conflicts
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        temp_filename = f"{timestamp}_{file.filename}"
-        temp_file_path = os.path.join(temp_dir, temp_filename)
-        
         try:
-            # Write file to temporary location
-            with open(temp_file_path, "wb") as temp_file:
-                temp_file.write(content)
-
             # Convert to Path object for the extractor
-            file_path = Path(temp_file_path)
+            file_path = spooled.path
             
-            # Call the consolidated extractor
-            logger.info(f"Starting extraction for file: {file.filename}, type: {document_type}")
+            # Call the consolidated extractor (off the event loop, so other uploads keep streaming)
+            logger.info(f"Starting extraction for file: {file.filename}, type: {document_type}, "
+                        f"detected: {spooled.detected_type}, {spooled.size} bytes")
             
-            result = extract_with_logging(
+            result = await asyncio.to_thread(
+                extract_with_logging,
                 file_path=file_path,
-                metadata=metadata_dict,
-                quality_threshold=70
+                metadata={**metadata_dict, "detected_type": spooled.detected_type},
+                quality_threshold=70,
+                content_hash=spooled.sha256
             )
             
             # Get the log ID from the logbook (we need to check the logbook table)
             log_id = None
             try:
+                # rows are written by a background thread; write ours before looking it up
+                logbook.flush()
                 import sqlite3
-                logbook_path = Path("logs/extraction_logbook.db")
+                logbook_path = Path(logbook.db_path)
                 if logbook_path.exists():
                     with sqlite3.connect(str(logbook_path)) as conn:
                         cursor = conn.execute(
@@ -122,7 +119,7 @@ async def run_extraction(
                 "success": bool(result.get("success", False)),
                 "document_type": document_type,
                 "file_name": file.filename,
-                "file_size": len(content),
+                "file_size": spooled.size,
                 "module_used": result.get("module", ""),
                 "text": result.get("text", ""),
                 "score": float(result.get("score", 0.0)),
@@ -136,11 +133,7 @@ async def run_extraction(
             
         finally:
             # Clean up temporary file
-            try:
-                if os.path.exists(temp_file_path):
-                    os.remove(temp_file_path)
-            except Exception as e:
-                logger.warning(f"Could not remove temp file {temp_file_path}: {e}")
+            spooled.cleanup()
 
     except HTTPException:
         raise
@@ -149,4 +142,12 @@ async def run_extraction(
         raise HTTPException(
             status_code=500,
             detail=f"Unexpected error during extraction: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/ocr/health")
+async def ocr_health():
+    """
+    OCR worker pool health: queue depth, page outcomes and engine state of a worker
+    """
+    return await asyncio.to_thread(parallel_ocr.health)
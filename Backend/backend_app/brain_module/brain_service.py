@@ -4,27 +4,45 @@ Responsibilities:
  - Accept mode + text + metadata
  - Route to mode-specific builder
  - Call ProviderOrchestrator
+ - Stream token deltas for interactive (chat) requests
  - Parse response into structured data
  - Build FULL Brain Output Contract
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, AsyncIterator
 from .providers.provider_orchestrator import ProviderOrchestrator
-from .prompt_builder.prompt_builder import PromptBuilder
+from .prompt_builder.prompt_builder import PromptBuilder, BATCHABLE_TYPES
 from .prompt_builder.provider_formatters import ProviderStyle
+from .cache.response_cache import ResponseCache, make_cache_key
+from .parsing.structured_output import StreamingJSONParser, OUTPUT_SCHEMAS
 from .utils.logger import get_logger
 import asyncio
+import hashlib
+import json
 import os
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Modes whose output depends only on the prompt; chat replies are never cached
+CACHEABLE_MODES = {"resume_parse", "jd_parse", "match"}
+RESPONSE_CACHE_ENABLED = os.getenv("BRAIN_RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Latency-sensitive modes that race a second provider when the first one is slower than its p95
+HEDGE_MODES = {m.strip() for m in os.getenv("BRAIN_HEDGE_MODES", "chat").split(",") if m.strip()}
+
+# process_batch tuning: concurrent provider calls per configured slot, and packing limits
+BATCH_CONCURRENCY_PER_SLOT = int(os.getenv("BRAIN_BATCH_CONCURRENCY_PER_SLOT", "4"))
+BATCH_PACK_SIZE = int(os.getenv("BRAIN_BATCH_PACK_SIZE", "4"))
+BATCH_PACK_MAX_DOC_CHARS = int(os.getenv("BRAIN_BATCH_PACK_MAX_DOC_CHARS", "4000"))
+BATCH_PACK_MAX_TOTAL_CHARS = int(os.getenv("BRAIN_BATCH_PACK_MAX_TOTAL_CHARS", "16000"))
+
 logger = get_logger("brain_service")
 
 # instantiate single instances (lightweight)
 _provider_orch = ProviderOrchestrator()
 _prompt_builder = PromptBuilder()
+_response_cache = ResponseCache() if RESPONSE_CACHE_ENABLED else None
 
 class BrainService:
     """
@@ -51,32 +69,274 @@ class BrainService:
         qid = qitem.get("qid", f"brain_{int(asyncio.get_event_loop().time() * 1000)}")
         text = qitem.get("text", "")
         intake_type = qitem.get("intake_type", "resume_parse")
-        meta = qitem.get("meta", {})
+        meta = qitem.get("meta") or {}
 
         logger.info("BrainService.process qid=%s intake=%s", qid, intake_type)
 
         # Step 1: Validate intake_type and build appropriate prompt
-        provider_payload = await self._build_prompt_for_mode(text, intake_type, meta)
-        
-        # Step 2: Call provider orchestrator (make async)
+        built = await self._build_prompt_for_mode(text, intake_type, meta)
+        provider_payload = built.get("provider_payload", {})
+
+        # Step 2: Serve repeats of the same prompt from the response cache
+        cache_key = self._cache_key(intake_type, built, meta)
+        if cache_key:
+            cached = await _response_cache.aget(cache_key)
+            if cached is not None:
+                logger.info("BrainService cache hit qid=%s intake=%s", qid, intake_type)
+                return {**cached, "qid": qid, "cached": True}
+
+        # Step 3: Call provider orchestrator (make async)
         result = await asyncio.wait_for(
-            self._call_provider_orchestrator(provider_payload),
+            self._call_provider_orchestrator(provider_payload, timeout=timeout, hedge=intake_type in HEDGE_MODES),
             timeout=timeout
         )
 
-        # Step 3: Normalize and return with metadata
-        return {
+        # Step 4: Normalize and return with metadata
+        out = {
             "qid": qid,
             "success": bool(result.get("success", False)),
             "provider": result.get("provider", "unknown"),
             "model": result.get("model", "unknown"),
             "response": result.get("response", ""),
             "usage": result.get("usage", {}),
-            "error": result.get("error")
+            "error": result.get("error"),
+            "tokens_saved": (built.get("token_budget") or {}).get("tokens_saved", 0)
         }
+        if cache_key and out["success"]:
+            await _response_cache.aset(cache_key, out)
+        return {**out, "cached": False}
+
+    async def process_stream(self, qitem: Dict[str, Any], timeout: int = 60) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of process() for chat UIs.
+        Yields {"type": "delta", "text": ...} events as tokens arrive, then exactly one
+        {"type": "done", ...} event carrying the same keys process() returns.
+        Structured modes also yield {"type": "field", "key", "value"} as soon as a top-level
+        JSON field is complete; done then carries "validation_errors".
+        Cache hits are replayed as a single delta.
+        """
+        qid = qitem.get("qid", f"brain_{int(asyncio.get_event_loop().time() * 1000)}")
+        text = qitem.get("text", "")
+        intake_type = qitem.get("intake_type", "chat")
+        meta = qitem.get("meta") or {}
+
+        logger.info("BrainService.process_stream qid=%s intake=%s", qid, intake_type)
+
+        built = await self._build_prompt_for_mode(text, intake_type, meta)
+        parser = StreamingJSONParser(OUTPUT_SCHEMAS[intake_type]) if intake_type in OUTPUT_SCHEMAS else None
+
+        def with_fields(delta: str) -> List[Dict[str, Any]]:
+            events = [{"type": "delta", "text": delta}]
+            if parser is not None:
+                events += [{"type": "field", "key": k, "value": v} for k, v in parser.feed(delta)]
+            return events
+
+        def validation() -> Dict[str, Any]:
+            return {"validation_errors": parser.close()[1]} if parser is not None else {}
+
+        cache_key = self._cache_key(intake_type, built, meta)
+        if cache_key:
+            cached = await _response_cache.aget(cache_key)
+            if cached is not None:
+                logger.info("BrainService cache hit qid=%s intake=%s", qid, intake_type)
+                for event in with_fields(cached.get("response", "")):
+                    yield event
+                yield {"type": "done", **cached, "qid": qid, "cached": True, **validation()}
+                return
+
+        async for event in _provider_orch.astream(built.get("provider_payload", {}), timeout=timeout):
+            if event["type"] == "delta":
+                for out_event in with_fields(event["text"]):
+                    yield out_event
+                continue
+            out = {
+                "qid": qid,
+                "success": bool(event.get("success", False)),
+                "provider": event.get("provider", "unknown"),
+                "model": event.get("model", "unknown"),
+                "response": event.get("response", ""),
+                "usage": event.get("usage", {}),
+                "error": event.get("error"),
+                "tokens_saved": (built.get("token_budget") or {}).get("tokens_saved", 0)
+            }
+            if cache_key and out["success"]:
+                await _response_cache.aset(cache_key, out)
+            yield {"type": "done", **out, "cached": False, **validation()}
+
+    async def process_batch(self, qitems: List[Dict[str, Any]], timeout: int = 60) -> List[Dict[str, Any]]:
+        """
+        Process many qitems at once (bulk imports).
+        - identical inputs are sent to the provider only once
+        - short resume/JD texts are packed several per prompt and the answer is split per document
+        - provider calls run with bounded concurrency (BATCH_CONCURRENCY_PER_SLOT per configured slot)
+
+        Returns one result per qitem, in input order, with the same keys as process()
+        plus "deduplicated" (served from an identical item in the batch) and "packed" (documents in the prompt).
+        """
+        if not qitems:
+            return []
+
+        # Step 1: Dedupe identical inputs; the first occurrence leads
+        keys = [self._dedupe_key(q) for q in qitems]
+        leaders: Dict[str, int] = {}
+        for i, k in enumerate(keys):
+            leaders.setdefault(k, i)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        singles: List[str] = []
+        packable: Dict[str, List[tuple]] = {}
+
+        # Step 2: Answer from cache where possible; collect short texts for packing
+        for k, i in leaders.items():
+            q = qitems[i]
+            intake_type = q.get("intake_type", "resume_parse")
+            meta = q.get("meta") or {}
+            text = q.get("text", "")
+            if intake_type not in BATCHABLE_TYPES or len(text) > BATCH_PACK_MAX_DOC_CHARS or BATCH_PACK_SIZE < 2:
+                singles.append(k)
+                continue
+            built = await self._build_prompt_for_mode(text, intake_type, meta)
+            cache_key = self._cache_key(intake_type, built, meta)
+            cached = await _response_cache.aget(cache_key) if cache_key else None
+            if cached is not None:
+                results[k] = {**cached, "qid": q.get("qid", cached.get("qid")), "cached": True}
+            else:
+                packable.setdefault(intake_type, []).append((k, q, cache_key))
+
+        packs = []
+        for intake_type, docs in packable.items():
+            for pack in self._chunk_for_packing(docs):
+                if len(pack) == 1:
+                    singles.append(pack[0][0])
+                else:
+                    packs.append((intake_type, pack))
+
+        # Step 3: Run packs and singles with bounded concurrency
+        sem = asyncio.Semaphore(max(1, BATCH_CONCURRENCY_PER_SLOT * max(1, len(_provider_orch.providers))))
+
+        async def run_single(k: str):
+            q = qitems[leaders[k]]
+            async with sem:
+                try:
+                    results[k] = await self.process(q, timeout=timeout)
+                except Exception as e:
+                    logger.exception("process_batch item failed qid=%s: %s", q.get("qid"), e)
+                    results[k] = {"qid": q.get("qid"), "success": False, "provider": "unknown", "model": "unknown",
+                                  "response": "", "usage": {}, "error": str(e), "cached": False}
+
+        async def run_pack(intake_type: str, pack: List[tuple]):
+            async with sem:
+                outs = await self._process_pack(intake_type, pack, timeout)
+            # documents the model did not answer cleanly are retried one by one
+            retry = []
+            for (k, _, _), out in zip(pack, outs):
+                if out is None:
+                    retry.append(run_single(k))
+                else:
+                    results[k] = out
+            if retry:
+                await asyncio.gather(*retry)
+
+        logger.info("BrainService.process_batch items=%s unique=%s packs=%s singles=%s",
+                    len(qitems), len(leaders), len(packs), len(singles))
+        await asyncio.gather(*[run_pack(t, p) for t, p in packs], *[run_single(k) for k in singles])
+
+        # Step 4: Fan results back out in input order
+        out = []
+        for i, (q, k) in enumerate(zip(qitems, keys)):
+            res = results[k]
+            out.append({
+                **res,
+                "qid": q.get("qid", res.get("qid")),
+                "deduplicated": leaders[k] != i,
+                "packed": res.get("packed", 1)
+            })
+        return out
+
+    async def _process_pack(self, intake_type: str, pack: List[tuple], timeout: int) -> List[Optional[Dict[str, Any]]]:
+        """Send several documents in one prompt; returns one result per document (None = needs a single retry)"""
+        n = len(pack)
+        built = _prompt_builder.build_batch([q.get("text", "") for _, q, _ in pack], intake_type=intake_type,
+                                            provider_style=ProviderStyle.CHAT)
+        try:
+            result = await asyncio.wait_for(
+                self._call_provider_orchestrator(built.get("provider_payload", {}), timeout=timeout),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Packed %s prompt with %s documents timed out", intake_type, n)
+            return [None] * n
+
+        docs = _split_batch_response(result.get("response", ""), n) if result.get("success") else None
+        if docs is None:
+            logger.warning("Packed %s prompt with %s documents could not be split; retrying individually", intake_type, n)
+            return [None] * n
+
+        # Token usage of the shared call is attributed evenly to each document
+        usage = result.get("usage") or {}
+        usage_share = {key: val // n for key, val in usage.items() if isinstance(val, int)}
+        outs = []
+        for (_, q, cache_key), doc in zip(pack, docs):
+            out = {
+                "qid": q.get("qid"),
+                "success": True,
+                "provider": result.get("provider", "unknown"),
+                "model": result.get("model", "unknown"),
+                "response": json.dumps(doc),
+                "usage": usage_share,
+                "error": None
+            }
+            if cache_key:
+                await _response_cache.aset(cache_key, out)
+            outs.append({**out, "cached": False, "packed": n})
+        return outs
+
+    @staticmethod
+    def _chunk_for_packing(docs: List[tuple]) -> List[List[tuple]]:
+        """Greedy packs of at most BATCH_PACK_SIZE documents and BATCH_PACK_MAX_TOTAL_CHARS characters"""
+        packs, current, size = [], [], 0
+        for doc in docs:
+            length = len(doc[1].get("text", ""))
+            if current and (len(current) >= BATCH_PACK_SIZE or size + length > BATCH_PACK_MAX_TOTAL_CHARS):
+                packs.append(current)
+                current, size = [], 0
+            current.append(doc)
+            size += length
+        if current:
+            packs.append(current)
+        return packs
+
+    @staticmethod
+    def _dedupe_key(qitem: Dict[str, Any]) -> str:
+        meta = qitem.get("meta") or {}
+        ident = [qitem.get("intake_type", "resume_parse"), qitem.get("text", ""),
+                 meta.get("candidate_data"), meta.get("jd_data"), meta.get("system"), bool(meta.get("no_cache"))]
+        return hashlib.sha256(json.dumps(ident, default=str).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _cache_key(intake_type: str, built: Dict[str, Any], meta: Dict[str, Any]) -> Optional[str]:
+        if _response_cache is None or intake_type not in CACHEABLE_MODES or meta.get("no_cache"):
+            return None
+        return make_cache_key(intake_type, built.get("rendered_prompt", ""), _provider_orch.model_fingerprint(),
+                              built.get("template_version") or "", json_mode=bool(built.get("json_mode")))
+
+    def provider_stats(self) -> Dict[str, Any]:
+        """Per-provider rolling latency (drives request hedging), streaming time-to-first-token and circuit breaker state"""
+        return {"latency": _provider_orch.latency_stats(), "first_token": _provider_orch.first_token_stats(),
+                "circuits": _provider_orch.circuit_stats()}
+
+    def template_stats(self) -> Dict[str, Any]:
+        """Version hash and static prefix token count of each compiled prompt template"""
+        return _prompt_builder.template_info()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the response cache"""
+        if _response_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **_response_cache.stats()}
 
     async def _build_prompt_for_mode(self, text: str, intake_type: str, meta: Dict[str, Any]) -> Dict[str, Any]:
-        """Build provider payload based on mode"""
+        """Build prompt + provider payload based on mode (returns PromptBuilder.build output)"""
         
         if intake_type == "match":
             # For match mode, use special metadata handling
@@ -101,14 +361,36 @@ class BrainService:
                 meta=meta
             )
         
-        return built.get("provider_payload", {})
-
-    async def _call_provider_orchestrator(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """Call provider orchestrator (wrapped in async)"""
-        # For now, run the synchronous call in a thread pool
-        # This allows us to maintain compatibility while making the interface async
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _provider_orch.generate, payload)
+        return built
+
+    async def _call_provider_orchestrator(self, payload: Dict[str, Any], timeout: int = 60, hedge: bool = False) -> Dict[str, Any]:
+        """Call provider orchestrator on its native async path (no executor thread per request)"""
+        return await _provider_orch.agenerate(payload, timeout=timeout, hedge=hedge)
+
+    async def aclose(self):
+        """Release pooled provider connections (application shutdown)"""
+        await _provider_orch.aclose()
+
+def _split_batch_response(response: str, count: int) -> Optional[List[Dict[str, Any]]]:
+    """Split a multi-document answer (JSON array) into per-document dicts; None if it does not line up"""
+    start, end = response.find("["), response.rfind("]")
+    if start == -1 or end <= start:
+        return None
+    try:
+        items = json.loads(response[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(items, list) or len(items) != count or not all(isinstance(i, dict) for i in items):
+        return None
+
+    # Honour document_index when the model returned every index exactly once
+    try:
+        indexes = [int(i.get("document_index")) for i in items]
+    except (TypeError, ValueError):
+        indexes = []
+    if sorted(indexes) == list(range(1, count + 1)):
+        items = [item for _, item in sorted(zip(indexes, items), key=lambda pair: pair[0])]
+    return [{k: v for k, v in i.items() if k != "document_index"} for i in items]
 
 # convenience singleton
 BrainSvc = BrainService()
\ No newline at end of file
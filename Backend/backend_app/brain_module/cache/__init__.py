@@ -0,0 +1,2 @@
+# Backend/backend_app/brain_module/cache/__init__.py
+from .response_cache import ResponseCache, make_cache_key
@@ -0,0 +1,218 @@
+"""
+ResponseCache: content-addressed cache for brain responses.
+Two tiers:
+ - bounded in-memory LRU (OrderedDict) for hot repeats within one process
+ - SQLite file shared by every worker on the host, with TTL and size-based eviction
+Keys are sha256(mode, rendered prompt, provider model fingerprint, template version, strict-JSON flag), so re-uploads of the
+same resume/JD text return without an LLM round trip or a daily-quota slot.
+The SQLite file (Backend/logs/brain_response_cache.db unless BRAIN_RESPONSE_CACHE_DB is set) is opened
+on the first lookup or store, not when the cache is created.
+aget/aset are the event-loop entry points: memory hits return inline, SQLite reads and writes run in a
+worker thread (asyncio.to_thread). Disk eviction runs every evict_every stores, not on each one.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+from ..utils.time_utils import now_ts
+from ..utils.logger import get_logger
+
+logger = get_logger("response_cache")
+
+BACKEND_ROOT = Path(__file__).resolve().parents[3]
+CACHE_DB_PATH = Path(os.getenv("BRAIN_RESPONSE_CACHE_DB", str(BACKEND_ROOT / "logs" / "brain_response_cache.db")))
+DEFAULT_MEMORY_ITEMS = int(os.getenv("BRAIN_RESPONSE_CACHE_MEMORY_ITEMS", "512"))
+DEFAULT_DISK_ITEMS = int(os.getenv("BRAIN_RESPONSE_CACHE_DISK_ITEMS", "20000"))
+DEFAULT_TTL_SECONDS = int(os.getenv("BRAIN_RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))  # 7 days
+# stores between disk evictions; the table may exceed disk_items by up to this many rows
+DEFAULT_EVICT_EVERY = int(os.getenv("BRAIN_RESPONSE_CACHE_EVICT_EVERY", "100"))
+
+def make_cache_key(mode: str, rendered_prompt: str, model_fingerprint: str, template_version: str = "",
+                   json_mode: bool = False) -> str:
+    h = hashlib.sha256()
+    for part in (mode, rendered_prompt, model_fingerprint, template_version, "json" if json_mode else ""):
+        h.update((part or "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+class ResponseCache:
+    def __init__(self, db_path: Optional[Path] = CACHE_DB_PATH,
+                 memory_items: int = DEFAULT_MEMORY_ITEMS,
+                 disk_items: int = DEFAULT_DISK_ITEMS,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 evict_every: int = DEFAULT_EVICT_EVERY):
+        self.db_path = db_path
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = max(1, evict_every)
+        self._disk_stores = 0
+        self._memory: "OrderedDict[str, tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        # None until the disk tier is first needed
+        self._disk_ok: Optional[bool] = None if self.db_path is not None else False
+
+    def _disk(self) -> bool:
+        """Open the disk tier on first use; False (memory only) when there is none or it cannot be opened"""
+        if self._disk_ok is None:
+            with self._lock:
+                if self._disk_ok is None:
+                    try:
+                        self._ensure_table()
+                        self._disk_ok = True
+                    except Exception:
+                        logger.exception("Response cache disk tier unavailable (%s); using memory only", self.db_path)
+                        self._disk_ok = False
+        return self._disk_ok
+
+    def _conn(self):
+        return sqlite3.connect(str(self.db_path), timeout=5)
+
+    def _ensure_table(self):
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as c:
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS brain_response_cache (
+                cache_key TEXT PRIMARY KEY,
+                created_at INTEGER,
+                last_access INTEGER,
+                payload_json TEXT
+            )
+            """)
+            c.execute("CREATE INDEX IF NOT EXISTS idx_brain_cache_last_access ON brain_response_cache(last_access)")
+            c.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = now_ts()
+        hit = self._memory_get(key, now)
+        if hit is not None:
+            return hit
+        return self._finish_get(key, self._disk_get(key, now))
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """get() for the event loop: the SQLite lookup runs in a worker thread"""
+        now = now_ts()
+        hit = self._memory_get(key, now)
+        if hit is not None:
+            return hit
+        return self._finish_get(key, await asyncio.to_thread(self._disk_get, key, now))
+
+    def set(self, key: str, value: Dict[str, Any]):
+        now = now_ts()
+        self._memory_set(key, now, value)
+        self._disk_set(key, now, value)
+
+    async def aset(self, key: str, value: Dict[str, Any]):
+        """set() for the event loop: the memory tier is updated at once, the SQLite write runs in a worker thread"""
+        now = now_ts()
+        self._memory_set(key, now, value)
+        await asyncio.to_thread(self._disk_set, key, now, value)
+
+    def _memory_get(self, key: str, now: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                created_at, value = hit
+                if now - created_at < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return dict(value)
+                del self._memory[key]
+        return None
+
+    def _disk_get(self, key: str, now: int):
+        """(created_at, payload_json) of a live disk row, or None"""
+        if not self._disk():
+            return None
+        try:
+            with self._conn() as c:
+                row = c.execute(
+                    "SELECT created_at, payload_json FROM brain_response_cache WHERE cache_key = ? AND created_at > ?",
+                    (key, now - self.ttl_seconds)
+                ).fetchone()
+                if row:
+                    c.execute("UPDATE brain_response_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+                    c.commit()
+                return row
+        except Exception:
+            logger.exception("Response cache disk read failed")
+            return None
+
+    def _finish_get(self, key: str, row) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            value = json.loads(row[1])
+            self._remember(key, row[0], value)
+            self._stats["disk_hits"] += 1
+            return dict(value)
+
+    def _memory_set(self, key: str, now: int, value: Dict[str, Any]):
+        with self._lock:
+            self._remember(key, now, value)
+            self._stats["stores"] += 1
+
+    def _disk_set(self, key: str, now: int, value: Dict[str, Any]):
+        if not self._disk():
+            return
+        with self._lock:
+            self._disk_stores += 1
+            evict = self._disk_stores % self.evict_every == 0
+        try:
+            with self._conn() as c:
+                c.execute(
+                    "INSERT OR REPLACE INTO brain_response_cache (cache_key, created_at, last_access, payload_json) VALUES (?, ?, ?, ?)",
+                    (key, now, now, json.dumps(value, default=str))
+                )
+                evicted = self._evict(c, now) if evict else 0
+                c.commit()
+            if evicted:
+                with self._lock:
+                    self._stats["evictions"] += evicted
+        except Exception:
+            logger.exception("Response cache disk write failed")
+
+    def _remember(self, key: str, created_at: int, value: Dict[str, Any]):
+        # caller holds self._lock
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict(self, c, now: int) -> int:
+        """Drop expired rows, then least-recently-used rows beyond disk_items."""
+        expired = c.execute("DELETE FROM brain_response_cache WHERE created_at <= ?", (now - self.ttl_seconds,)).rowcount
+        overflow = c.execute("SELECT COUNT(*) FROM brain_response_cache").fetchone()[0] - self.disk_items
+        trimmed = 0
+        if overflow > 0:
+            trimmed = c.execute(
+                "DELETE FROM brain_response_cache WHERE cache_key IN "
+                "(SELECT cache_key FROM brain_response_cache ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            ).rowcount
+        return max(expired, 0) + max(trimmed, 0)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._disk():
+            with self._conn() as c:
+                c.execute("DELETE FROM brain_response_cache")
+                c.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+            s["memory_items"] = len(self._memory)
+        lookups = s["memory_hits"] + s["disk_hits"] + s["misses"]
+        s["hit_rate"] = round((s["memory_hits"] + s["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return s
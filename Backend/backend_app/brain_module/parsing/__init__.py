@@ -0,0 +1,2 @@
+# Backend/backend_app/brain_module/parsing/__init__.py
+from .structured_output import StreamingJSONParser, parse_json_response, OUTPUT_SCHEMAS
@@ -0,0 +1,181 @@
+"""
+Structured output parsing for brain responses.
+ - parse_json_response: strict json.loads fast path (the normal case once providers run in
+   strict-JSON mode), falling back to skipping prose / code fences around the object
+ - StreamingJSONParser: incremental parser fed with streamed text deltas; emits each
+   top-level field of the root object as soon as its value is complete and validates it
+   against the mode's output schema, so bad output is spotted before the stream ends
+Schemas are deliberately loose: unknown fields are allowed, known fields are type-checked.
+"""
+
+import json
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+SCALAR = "scalar"
+LIST = "list"
+OBJECT = "object"
+NUMBER = "number"
+
+# top-level field (normalized: lowercase, non-alphanumerics -> "_") -> expected kind
+OUTPUT_SCHEMAS: Dict[str, Dict[str, str]] = {
+    "resume_parse": {
+        "identity_basics": OBJECT,
+        "education_skills": OBJECT,
+        "job_preferences": OBJECT,
+        "salary_info": OBJECT,
+        "broader_preferences_personal_details": OBJECT,
+        "work_history": LIST,
+        "full_name": SCALAR,
+        "email_address": SCALAR,
+        "mobile_number": SCALAR,
+        "skills": LIST,
+        "certificates": LIST,
+    },
+    "jd_parse": {
+        "client": SCALAR,
+        "job_title": SCALAR,
+        "job_id": SCALAR,
+        "employment_type": SCALAR,
+        "work_mode": SCALAR,
+        "job_locations": LIST,
+        "minimum_salary": SCALAR,
+        "maximum_salary": SCALAR,
+        "benefits_perks": LIST,
+        "responsibilities_key_duties": LIST,
+        "required_skills": LIST,
+        "preferred_skills": LIST,
+        "tools_tech_stack": LIST,
+        "hiring_process_rounds": LIST,
+    },
+    "match": {
+        "match_score": NUMBER,
+        "overall_assessment": SCALAR,
+        "strengths": LIST,
+        "gaps": LIST,
+        "skill_match": OBJECT,
+        "experience_analysis": OBJECT,
+        "education_analysis": OBJECT,
+        "recommendations": OBJECT,
+        "risk_factors": LIST,
+        "cultural_fit_indicators": LIST,
+    },
+}
+
+_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.I)
+
+def _normalize_key(key: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", str(key).lower()).strip("_")
+
+def validate_field(key: str, value: Any, schema: Optional[Dict[str, str]]) -> Optional[str]:
+    """Error message if value does not fit the schema for key, else None"""
+    kind = (schema or {}).get(_normalize_key(key))
+    if kind is None or value is None or value == "":
+        return None
+    ok = {
+        SCALAR: not isinstance(value, (dict, list)),
+        LIST: isinstance(value, list),
+        OBJECT: isinstance(value, dict),
+        NUMBER: isinstance(value, (int, float)) and not isinstance(value, bool)
+                or isinstance(value, str) and value.strip().replace(".", "", 1).isdigit(),
+    }[kind]
+    return None if ok else f"field '{key}' should be {kind}, got {type(value).__name__}"
+
+def validate_object(data: Dict[str, Any], schema: Optional[Dict[str, str]]) -> List[str]:
+    return [err for err in (validate_field(k, v, schema) for k, v in data.items()) if err]
+
+class StreamingJSONParser:
+    """
+    Feed text deltas; feed() returns the (key, value) pairs of top-level fields completed by
+    that delta. Text before the first "{" (prose, code fences) is skipped.
+    """
+
+    def __init__(self, schema: Optional[Dict[str, str]] = None):
+        self.schema = schema
+        self.fields: Dict[str, Any] = {}
+        self.errors: List[str] = []
+        self.complete = False
+        self._buf: List[str] = []
+        self._member_start = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        completed = []
+        for ch in chunk:
+            if self.complete:
+                break
+            if self._depth == 0:
+                if ch == "{":
+                    self._buf = ["{"]
+                    self._member_start = 1
+                    self._depth = 1
+                continue
+
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete_member(len(self._buf) - 1, completed)
+                    self.complete = True
+            elif ch == "," and self._depth == 1:
+                self._complete_member(len(self._buf) - 1, completed)
+                self._member_start = len(self._buf)
+        return completed
+
+    def _complete_member(self, end: int, completed: List[Tuple[str, Any]]):
+        fragment = "".join(self._buf[self._member_start:end]).strip()
+        if not fragment:
+            return
+        try:
+            member = json.loads("{" + fragment + "}")
+        except json.JSONDecodeError:
+            self.errors.append(f"unparseable field near: {fragment[:60]}")
+            return
+        for key, value in member.items():
+            err = validate_field(key, value, self.schema)
+            if err:
+                self.errors.append(err)
+            self.fields[key] = value
+            completed.append((key, value))
+
+    def close(self) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """(root object or None if none was started, errors); a truncated object returns its completed fields"""
+        if not self._buf:
+            return None, self.errors + ["no JSON object in response"]
+        if not self.complete:
+            return self.fields, self.errors + ["incomplete JSON object"]
+        return self.fields, self.errors
+
+def parse_json_response(text: str, mode: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    Parse a provider response into the root JSON object of a structured mode.
+    Returns (data or None, validation/parse errors); data is None when no object was found or
+    the object is incomplete (e.g. a stream that ended early).
+    """
+    schema = OUTPUT_SCHEMAS.get(mode or "")
+    stripped = (text or "").strip()
+    if stripped.startswith("{"):
+        try:
+            data = json.loads(stripped)
+            if isinstance(data, dict):
+                return data, validate_object(data, schema)
+        except json.JSONDecodeError:
+            pass
+
+    parser = StreamingJSONParser(schema)
+    parser.feed(_FENCE.sub("", stripped))
+    data, errors = parser.close()
+    return (data if parser.complete else None), errors
@@ -3,4 +3,5 @@ from .prompt_builder import PromptBuilder
 from .provider_formatters import ProviderStyle, format_for_provider
 from .resume_prompt import ResumePromptRenderer
 from .jd_prompt import JDPromptRenderer
-from .chat_prompt import render_chat_prompt
\ No newline at end of file
+from .chat_prompt import render_chat_prompt
+from .template_registry import TemplateRegistry, TEMPLATE_REGISTRY
\ No newline at end of file
@@ -1,16 +1,38 @@
 # prompts/jd_prompt.py
 from typing import Dict, Any
-from jinja2 import Template
+from .template_registry import TEMPLATE_REGISTRY
 import json
 
+JD_BATCH_OUTPUT = """- Return ONLY a JSON array with exactly {{ count }} objects, one per job description, in document order.
+- Each object must contain "document_index": <n> plus the extracted fields for that job description.
+
+The job descriptions below are {{ count }} separate documents, each starting with a line "=== DOCUMENT <n> ===".
+Apply the task to every job description independently; never mix information between them.
+
+Job Descriptions:
+{{ documents }}
+"""
+
 class JDPromptRenderer:
     """Renders prompts for job description parsing"""
     
     def __init__(self):
         self.template = self._get_jd_template()
+        # compiled once per process; renders only the variable tail
+        self.compiled = TEMPLATE_REGISTRY.register("jd_parse", self.template)
+        # several JDs per prompt (PromptBuilder.build_batch); starts with the same task text as the single template
+        self.compiled_batch = TEMPLATE_REGISTRY.register("jd_parse_batch", self._get_task() + JD_BATCH_OUTPUT)
     
     def _get_jd_template(self) -> str:
         """Get the job description parsing template"""
+        return self._get_task() + """- Return ONLY the final JSON.
+
+Job Description Text:
+{{ jd_text }}
+"""
+
+    def _get_task(self) -> str:
+        """Task, fields and guidelines shared by the single and batch templates"""
         return """Task:
 Extract all information explicitly mentioned in the job description (structured/unstructured text) and structure it according to the Job Details schema below. Do NOT infer or generate missing information. If a field is not present, leave it blank.
 
@@ -70,10 +92,6 @@ Processing Guidelines:
 - For dates, keep the original format from the JD.
 - For salary fields, extract values exactly as written.
 - Leave blank fields as empty strings or empty arrays.
-- Return ONLY the final JSON.
-
-Job Description Text:
-{{ jd_text }}
 """
     
     def render_prompt(self, text: str, source_type: str = "text", filename: str = None) -> str:
@@ -81,14 +99,7 @@ Job Description Text:
         import logging
         logger = logging.getLogger(__name__)
         
-        logger.info("=== JD PROMPT RENDERING SYSTEM DEBUG ===")
-        logger.info(f"System: Python Class (JDPromptRenderer)")
-        logger.info(f"Template source: Hardcoded string in Python class")
-        logger.info(f"Text length: {len(text)}")
-        logger.info(f"Source type: {source_type}")
-        logger.info(f"Filename: {filename or 'unknown'}")
-        
-        logger.debug(f"DEBUG: JD text preview: {text[:200]}...")
+        logger.debug("Rendering JD prompt %s@%s (input length %s)", self.compiled.name, self.compiled.version, len(text))
         
         context = {
             'jd_text': text,
@@ -96,19 +107,12 @@ Job Description Text:
             'filename': filename or 'unknown'
         }
         
-        logger.debug(f"DEBUG: JD prompt context: {context}")
-        
-        template = Template(self.template)
-        rendered_prompt = template.render(**context)
+        rendered_prompt = self.compiled.render(**context)
         
-        logger.info(f"DEBUG: JD prompt rendered successfully")
-        logger.info(f"Final prompt length: {len(rendered_prompt)}")
-        logger.debug(f"DEBUG: Rendered JD prompt preview: {rendered_prompt[:300]}...")
+        logger.debug("Final prompt length: %s", len(rendered_prompt))
         
-        # Check for template variable issues
-        if '{{' in rendered_prompt:
-            logger.warning("WARNING: Template variables not properly rendered!")
-        else:
-            logger.info("SUCCESS: Template variables properly rendered")
-        
-        return rendered_prompt
\ No newline at end of file
+        return rendered_prompt
+
+    def render_batch_prompt(self, documents: str, count: int) -> str:
+        """Render the multi-JD prompt; documents are already marked "=== DOCUMENT <n> ===" """
+        return self.compiled_batch.render(documents=documents, count=count)
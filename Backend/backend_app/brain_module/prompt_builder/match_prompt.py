@@ -1,6 +1,6 @@
 # prompts/match_prompt.py
 from typing import Dict, Any
-from jinja2 import Template
+from .template_registry import TEMPLATE_REGISTRY
 import json
 
 class MatchPromptRenderer:
@@ -8,6 +8,8 @@ class MatchPromptRenderer:
     
     def __init__(self):
         self.template = self._get_match_template()
+        # compiled once per process; renders only the variable tail
+        self.compiled = TEMPLATE_REGISTRY.register("match", self.template)
     
     def _get_match_template(self) -> str:
         """Get the candidate-job matching template"""
@@ -65,33 +67,15 @@ Job Description:
         import logging
         logger = logging.getLogger(__name__)
         
-        logger.info("=== MATCH PROMPT RENDERING SYSTEM DEBUG ===")
-        logger.info(f"System: Python Class (MatchPromptRenderer)")
-        logger.info(f"Template source: Hardcoded string in Python class")
-        logger.info(f"Candidate data length: {len(candidate_data)}")
-        logger.info(f"Job data length: {len(job_data)}")
-        
-        logger.debug(f"DEBUG: Candidate data preview: {candidate_data[:200]}...")
-        logger.debug(f"DEBUG: Job data preview: {job_data[:200]}...")
+        logger.debug("Rendering match prompt %s@%s (input length %s)", self.compiled.name, self.compiled.version, len(candidate_data) + len(job_data))
         
         context = {
             'candidate_data': candidate_data,
             'job_data': job_data
         }
         
-        logger.debug(f"DEBUG: Match prompt context: {context}")
-        
-        template = Template(self.template)
-        rendered_prompt = template.render(**context)
-        
-        logger.info(f"DEBUG: Match prompt rendered successfully")
-        logger.info(f"Final prompt length: {len(rendered_prompt)}")
-        logger.debug(f"DEBUG: Rendered match prompt preview: {rendered_prompt[:300]}...")
+        rendered_prompt = self.compiled.render(**context)
         
-        # Check for template variable issues
-        if '{{' in rendered_prompt:
-            logger.warning("WARNING: Template variables not properly rendered!")
-        else:
-            logger.info("SUCCESS: Template variables properly rendered")
+        logger.debug("Final prompt length: %s", len(rendered_prompt))
         
-        return rendered_prompt
\ No newline at end of file
+        return rendered_prompt
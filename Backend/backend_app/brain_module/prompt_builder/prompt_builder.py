@@ -2,13 +2,21 @@
 PromptBuilder:
  - Chooses the correct renderer for intake_type ("resume","jd","chat")
  - Returns rendered prompt + provider payload (via provider_formatters)
+ - Requests native strict-JSON output for resume/JD/match prompts (BRAIN_STRICT_JSON)
+ - Fits resume/JD input into a token budget before rendering (see token_budget)
+ - Reports the template name/version and static prefix token count (see template_registry)
+ - build_batch packs several short resumes/JDs into one multi-document prompt rendered from
+   the renderer's batch template (the single-document task asking for a JSON array)
  - Uses existing resume_prompt.py and jd_prompt.py if present (import optional)
 """
 
-from typing import Dict, Any
+import os
+from typing import Dict, Any, List
 from pathlib import Path
 from ..utils.logger import get_logger
-from .provider_formatters import format_for_provider, ProviderStyle
+from .provider_formatters import format_for_provider, ProviderStyle, SYSTEM_PROMPT
+from .template_registry import TEMPLATE_REGISTRY, estimate_tokens
+from .token_budget import fit_to_budget, MAX_INPUT_TOKENS
 
 logger = get_logger("prompt_builder")
 
@@ -35,24 +43,58 @@ except Exception:
         meta = meta or {}
         return f"You are an assistant.\n\nUser:\n{text}"
 
+# Modes that can be packed several documents per prompt
+BATCHABLE_TYPES = {"resume_parse", "jd_parse"}
+BATCH_DOC_MARKER = "=== DOCUMENT {index} ==="
+
+# used when the resume/JD renderer (and its batch template) is unavailable
+BATCH_INSTRUCTIONS = """The text below contains {count} separate documents, each starting with a line "=== DOCUMENT <n> ===".
+Apply the task to every document independently; never mix information between documents.
+Return ONLY a JSON array with exactly {count} objects in document order.
+Each object must contain "document_index": <n> plus the extracted fields for that document."""
+
+_SYSTEM_PROMPT_TOKENS = estimate_tokens(SYSTEM_PROMPT)
+
+# Ask providers for native JSON output on structured modes; disable for models that reject response_format
+STRICT_JSON_ENABLED = os.getenv("BRAIN_STRICT_JSON", "true").lower() in ("1", "true", "yes")
+
+# intake aliases whose input goes through the token budget -> section keyword set
+BUDGETED_TYPES = {"resume": "resume_parse", "resume_parse": "resume_parse", "cv": "resume_parse",
+                  "jd": "jd_parse", "job": "jd_parse", "job_description": "jd_parse", "jd_parse": "jd_parse"}
+
 class PromptBuilder:
     def __init__(self):
         self.resume_renderer = ResumePromptRenderer() if ResumePromptRenderer else None
         self.jd_renderer = JDPromptRenderer() if JDPromptRenderer else None
         self.match_renderer = MatchPromptRenderer() if MatchPromptRenderer else None
 
-    def build(self, text: str, intake_type: str = "resume", provider_style: ProviderStyle = ProviderStyle.CHAT, meta: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    def build(self, text: str, intake_type: str = "resume", provider_style: ProviderStyle = ProviderStyle.CHAT, meta: Dict[str, Any] | None = None,
+              apply_budget: bool = True, json_mode: bool | None = None) -> Dict[str, Any]:
+        """
+        apply_budget: trim resume/JD text to meta["max_input_tokens"] (default BRAIN_MAX_INPUT_TOKENS);
+        build_batch budgets each document itself and passes False.
+        json_mode: request strict JSON output (defaults to BRAIN_STRICT_JSON for resume/JD/match).
+        """
         meta = meta or {}
         t = (intake_type or "resume").lower()
+        template = None
+        budget_report = None
+
+        if apply_budget and t in BUDGETED_TYPES:
+            text, budget_report = fit_to_budget(text, BUDGETED_TYPES[t], int(meta.get("max_input_tokens") or MAX_INPUT_TOKENS))
+            if budget_report["tokens_saved"]:
+                logger.info("Input trimmed for %s: %s -> %s tokens", t, budget_report["original_tokens"], budget_report["final_tokens"])
 
         if t in ("resume", "resume_parse", "cv"):
             if self.resume_renderer:
+                template = self.resume_renderer.compiled
                 rendered = self.resume_renderer.render_prompt(text, meta.get("source"), meta.get("filename"))
             else:
                 # fallback generic resume prompt
                 rendered = f"Parse this resume and extract structured fields:\n\n{text}"
         elif t in ("jd", "job", "job_description", "jd_parse"):
             if self.jd_renderer:
+                template = self.jd_renderer.compiled
                 rendered = self.jd_renderer.render_prompt(text, meta.get("source"), meta.get("filename"))
             else:
                 rendered = f"Parse this job description and extract structured fields:\n\n{text}"
@@ -64,6 +106,7 @@ class PromptBuilder:
                 raise ValueError("Match mode requires 'candidate_data' and 'jd_data' in metadata")
             
             if self.match_renderer:
+                template = self.match_renderer.compiled
                 rendered = self.match_renderer.render_prompt(candidate_data, jd_data)
             else:
                 rendered = f"""Analyze this candidate profile and job description for matching:
@@ -76,9 +119,55 @@ Job:
         else:
             rendered = render_chat_prompt(text, meta)
 
-        provider_payload = format_for_provider(rendered, provider_style)
+        if json_mode is None:
+            json_mode = STRICT_JSON_ENABLED and (t in BUDGETED_TYPES or t == "match")
+        return self._built(rendered, template, provider_style, meta, json_mode, budget_report)
+
+    @staticmethod
+    def _built(rendered: str, template, provider_style: ProviderStyle, meta: Dict[str, Any], json_mode: bool,
+               budget_report: Dict[str, Any] | None) -> Dict[str, Any]:
+        provider_payload = format_for_provider(rendered, provider_style, json_mode=json_mode)
+        static_prefix_tokens = template.static_prefix_tokens if template else 0
+        if provider_style == ProviderStyle.CHAT:
+            static_prefix_tokens += _SYSTEM_PROMPT_TOKENS
         return {
             "rendered_prompt": rendered,
             "provider_payload": provider_payload,
-            "meta": meta
-        }
\ No newline at end of file
+            "meta": meta,
+            "template": template.name if template else None,
+            "template_version": template.version if template else None,
+            "json_mode": json_mode,
+            # leading tokens identical across requests of this mode (provider prompt caching)
+            "static_prefix_tokens": static_prefix_tokens,
+            "token_budget": budget_report
+        }
+
+    def template_info(self) -> Dict[str, Dict[str, Any]]:
+        """Version and static prefix size of every compiled template"""
+        return TEMPLATE_REGISTRY.describe()
+
+    def build_batch(self, texts: List[str], intake_type: str = "resume_parse", provider_style: ProviderStyle = ProviderStyle.CHAT, meta: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        """
+        Render one prompt covering several documents of the same intake_type, from the renderer's
+        batch template: the model is asked for a JSON array with one object per document.
+        """
+        t = (intake_type or "resume_parse").lower()
+        if t not in BATCHABLE_TYPES:
+            raise ValueError(f"intake_type '{intake_type}' does not support multi-document prompts")
+
+        meta = meta or {}
+        max_tokens = int(meta.get("max_input_tokens") or MAX_INPUT_TOKENS)
+        budgeted = [fit_to_budget(text, BUDGETED_TYPES[t], max_tokens) for text in texts]
+        documents = "\n\n".join(f"{BATCH_DOC_MARKER.format(index=i)}\n{text}" for i, (text, _) in enumerate(budgeted, start=1))
+        renderer = self.resume_renderer if t == "resume_parse" else self.jd_renderer
+        if renderer is not None:
+            template = renderer.compiled_batch
+            rendered = renderer.render_batch_prompt(documents, len(texts))
+        else:
+            template = None
+            rendered = BATCH_INSTRUCTIONS.format(count=len(texts)) + "\n\n" + documents
+        # json_object mode cannot return the per-document array
+        built = self._built(rendered, template, provider_style, meta, False,
+                            {"tokens_saved": sum(report["tokens_saved"] for _, report in budgeted)})
+        built["document_count"] = len(texts)
+        return built
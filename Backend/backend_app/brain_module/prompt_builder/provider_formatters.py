@@ -3,22 +3,29 @@ Convert a rendered prompt string into provider-specific payload.
 Provides a simple abstraction:
  - Chat-style providers expect messages: [{"role":"system"}, {"role":"user"}]
  - Completion-style providers accept a single prompt string
+ - json_mode adds an OpenAI-style response_format so providers use native strict-JSON output
 """
 
 from enum import Enum
 from typing import Dict, Any, List
 
+# Static system message for chat-style providers (the first cached prefix segment)
+SYSTEM_PROMPT = "You are an expert resume/jd parser. Return JSON with clearly labeled fields."
+
 class ProviderStyle(Enum):
     CHAT = "chat"
     PROMPT = "prompt"
 
-def format_for_provider(rendered_prompt: str, style: ProviderStyle = ProviderStyle.CHAT) -> Dict[str, Any]:
+def format_for_provider(rendered_prompt: str, style: ProviderStyle = ProviderStyle.CHAT, json_mode: bool = False) -> Dict[str, Any]:
     """
     Returns a small dict that provider_orchestrator will merge into provider SDK call.
     """
     if style == ProviderStyle.CHAT:
-        system_msg = {"role": "system", "content": "You are an expert resume/jd parser. Return JSON with clearly labeled fields."}
+        system_msg = {"role": "system", "content": SYSTEM_PROMPT}
         user_msg = {"role": "user", "content": rendered_prompt}
-        return {"messages": [system_msg, user_msg]}
+        payload = {"messages": [system_msg, user_msg]}
     else:
-        return {"prompt": rendered_prompt}
\ No newline at end of file
+        payload = {"prompt": rendered_prompt}
+    if json_mode:
+        payload["response_format"] = {"type": "json_object"}
+    return payload
\ No newline at end of file
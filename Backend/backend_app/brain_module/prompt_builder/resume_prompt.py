@@ -1,16 +1,39 @@
 # prompts/resume_prompt.py
 from typing import Dict, Any
-from jinja2 import Template
+from .template_registry import TEMPLATE_REGISTRY
 import json
 
+RESUME_BATCH_OUTPUT = """Output:
+The resumes below are {{ count }} separate documents, each starting with a line "=== DOCUMENT <n> ===".
+Apply the task to every resume independently; never mix information between resumes.
+Return ONLY a JSON array with exactly {{ count }} objects in document order.
+Each object must contain "document_index": <n> plus the extracted fields for that resume.
+
+Resumes:
+{{ documents }}
+"""
+
 class ResumePromptRenderer:
     """Renders prompts for resume parsing"""
     
     def __init__(self):
         self.template = self._get_resume_template()
+        # compiled once per process; renders only the variable tail
+        self.compiled = TEMPLATE_REGISTRY.register("resume_parse", self.template)
+        # several resumes per prompt (PromptBuilder.build_batch); starts with the same task text as the single template
+        self.compiled_batch = TEMPLATE_REGISTRY.register("resume_parse_batch", self._get_task() + RESUME_BATCH_OUTPUT)
     
     def _get_resume_template(self) -> str:
         """Get the resume parsing template"""
+        return self._get_task() + """Output:
+Return ONLY the final JSON.
+
+Resume Text:
+{{ resume_text }}
+"""
+
+    def _get_task(self) -> str:
+        """Task, fields and guidelines shared by the single and batch templates"""
         return """Resume parsing prompt
 Task: Extract all information explicitly mentioned in the resume(structured/unstructured text) and structure it according to the Candidate Portfolio format. Do NOT infer, guess, or generate missing details. If a field is not present, leave it blank.
 
@@ -82,11 +105,6 @@ Processing Guidelines:
 - Leave blank fields empty.
 - Do NOT assume or interpret any information not stated.
 
-Output:
-Return ONLY the final JSON.
-
-Resume Text:
-{{ resume_text }}
 """
     
     def render_prompt(self, text: str, source_type: str = "text", filename: str = None) -> str:
@@ -94,14 +112,7 @@ Resume Text:
         import logging
         logger = logging.getLogger(__name__)
         
-        logger.info("=== RESUME PROMPT RENDERING SYSTEM DEBUG ===")
-        logger.info(f"System: Python Class (ResumePromptRenderer)")
-        logger.info(f"Template source: Hardcoded string in Python class")
-        logger.info(f"Text length: {len(text)}")
-        logger.info(f"Source type: {source_type}")
-        logger.info(f"Filename: {filename or 'unknown'}")
-        
-        logger.debug(f"DEBUG: Resume text preview: {text[:200]}...")
+        logger.debug("Rendering resume prompt %s@%s (input length %s)", self.compiled.name, self.compiled.version, len(text))
         
         context = {
             'resume_text': text,
@@ -109,19 +120,12 @@ Resume Text:
             'filename': filename or 'unknown'
         }
         
-        logger.debug(f"DEBUG: Resume prompt context: {context}")
-        
-        template = Template(self.template)
-        rendered_prompt = template.render(**context)
+        rendered_prompt = self.compiled.render(**context)
         
-        logger.info(f"DEBUG: Resume prompt rendered successfully")
-        logger.info(f"Final prompt length: {len(rendered_prompt)}")
-        logger.debug(f"DEBUG: Rendered resume prompt preview: {rendered_prompt[:300]}...")
+        logger.debug("Final prompt length: %s", len(rendered_prompt))
         
-        # Check for template variable issues
-        if '{{' in rendered_prompt:
-            logger.warning("WARNING: Template variables not properly rendered!")
-        else:
-            logger.info("SUCCESS: Template variables properly rendered")
-        
-        return rendered_prompt
\ No newline at end of file
+        return rendered_prompt
+
+    def render_batch_prompt(self, documents: str, count: int) -> str:
+        """Render the multi-resume prompt; documents are already marked "=== DOCUMENT <n> ===" """
+        return self.compiled_batch.render(documents=documents, count=count)
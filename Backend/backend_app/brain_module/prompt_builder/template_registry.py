@@ -0,0 +1,91 @@
+"""
+TemplateRegistry: prompt templates compiled once per process.
+ - each template is split into its static prefix (everything before the first Jinja tag)
+   and a variable tail; only the tail is compiled and rendered per request
+ - template versions are sha256 hashes of the source, used in response cache keys so
+   a prompt edit never serves answers produced by the old wording
+ - static prefix token counts are exposed so callers can line up provider-side prompt
+   caching (providers cache identical leading tokens across requests)
+"""
+
+import hashlib
+import math
+import re
+import threading
+from typing import Dict, Any, Optional
+from jinja2 import Template
+from ..utils.logger import get_logger
+
+logger = get_logger("template_registry")
+
+# Rough chars-per-token ratio for English prompts when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+_FIRST_TAG = re.compile(r"\{\{|\{%|\{#")
+
+def estimate_tokens(text: str) -> int:
+    """Token count of text (tiktoken when available, otherwise a chars/4 estimate)."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+class CompiledTemplate:
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        self.version = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        m = _FIRST_TAG.search(source)
+        split = m.start() if m else len(source)
+        self.static_prefix = source[:split]
+        self.static_prefix_tokens = estimate_tokens(self.static_prefix)
+        self._tail = Template(source[split:])
+
+    def render(self, **context) -> str:
+        return self.static_prefix + self._tail.render(**context)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "static_prefix_chars": len(self.static_prefix),
+            "static_prefix_tokens": self.static_prefix_tokens,
+        }
+
+class TemplateRegistry:
+    def __init__(self):
+        self._templates: Dict[str, CompiledTemplate] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, source: str) -> CompiledTemplate:
+        """Compile and store a template; re-registering identical source is a no-op."""
+        with self._lock:
+            existing = self._templates.get(name)
+            if existing is not None and existing.source == source:
+                return existing
+            compiled = CompiledTemplate(name, source)
+            if existing is not None:
+                logger.info("Template %s replaced (%s -> %s)", name, existing.version, compiled.version)
+            self._templates[name] = compiled
+            return compiled
+
+    def get(self, name: str) -> Optional[CompiledTemplate]:
+        return self._templates.get(name)
+
+    def render(self, name: str, **context) -> str:
+        compiled = self._templates.get(name)
+        if compiled is None:
+            raise KeyError(f"Prompt template '{name}' is not registered")
+        return compiled.render(**context)
+
+    def describe(self) -> Dict[str, Dict[str, Any]]:
+        return {name: t.describe() for name, t in sorted(self._templates.items())}
+
+# process-wide registry shared by every renderer
+TEMPLATE_REGISTRY = TemplateRegistry()
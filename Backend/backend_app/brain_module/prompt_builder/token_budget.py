@@ -0,0 +1,173 @@
+"""
+Token budget stage for resume / JD input text. Text already within budget is left untouched.
+ - over budget, first strips extraction boilerplate: "Page 3 of 5" labels, and at page
+   boundaries (form feeds) bare page numbers and all but the first copy of short lines repeated
+   at the top/bottom of many pages (running headers/footers), plus runs of blank lines. Lines inside a page are
+   never dropped as boilerplate, so dates ("2019"), company names or "Remote" that repeat
+   through the work history stay
+ - if the text is still over budget, trims section-aware: the text is split on
+   recognised headings and sections are kept by priority (contact block, experience
+   and skills first; hobbies, references and declarations last), in original order
+ - reports original/final token estimates so callers can log the tokens saved
+"""
+
+import os
+import re
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+from .template_registry import estimate_tokens
+
+MAX_INPUT_TOKENS = int(os.getenv("BRAIN_MAX_INPUT_TOKENS", "6000"))
+# a line at the top/bottom of at least this many pages is treated as a running header/footer
+REPEATED_LINE_MIN_COUNT = int(os.getenv("BRAIN_REPEATED_LINE_MIN_COUNT", "3"))
+# lines at each end of a page that may hold a header/footer or page number
+PAGE_BOUNDARY_LINES = 2
+# smallest remainder worth keeping as a partial section
+MIN_PARTIAL_TOKENS = 50
+
+_PAGE_LABEL = re.compile(r"^\s*(page\s*\d{1,4}(\s*(of|/)\s*\d{1,4})?|\d{1,4}\s*of\s*\d{1,4}|-\s*\d{1,4}\s*-)\s*$", re.I)
+_BARE_NUMBER = re.compile(r"^\s*\d{1,4}\s*$")
+_YEAR = re.compile(r"^\s*(19|20)\d\d\s*$")
+_BLANK_RUN = re.compile(r"\n{3,}")
+_HEADING_MAX_CHARS = 50
+
+# heading keywords -> priority (0 = keep first); the block before the first heading uses HEADER_PRIORITY
+HEADER_PRIORITY = 0
+SECTION_PRIORITIES = {
+    "resume_parse": [
+        (0, ("experience", "work experience", "professional experience", "work history", "employment",
+             "employment history", "career history", "skills", "technical skills", "key skills",
+             "core competencies", "technologies", "tools", "contact", "contact details", "contact information")),
+        (1, ("summary", "professional summary", "profile", "objective", "career objective", "education",
+             "academic", "qualifications", "certifications", "certificates")),
+        (2, ("projects", "languages", "personal details", "personal information", "achievements", "awards")),
+        (3, ("hobbies", "interests", "references", "declaration", "extra curricular", "extracurricular activities")),
+    ],
+    "jd_parse": [
+        (0, ("responsibilities", "key responsibilities", "duties", "requirements", "qualifications",
+             "skills", "required skills", "must have", "experience", "what you will do", "what we are looking for")),
+        (1, ("job summary", "about the role", "role", "preferred skills", "nice to have", "benefits", "perks",
+             "location", "salary", "compensation", "how to apply")),
+        (3, ("about us", "about the company", "equal opportunity", "disclaimer", "privacy")),
+    ],
+}
+
+def _heading_priority(line: str, keywords: List[Tuple[int, tuple]]) -> int | None:
+    """Priority of a heading line, or None if the line is not a recognised heading"""
+    stripped = line.strip()
+    if not stripped or len(stripped) > _HEADING_MAX_CHARS:
+        return None
+    normalized = re.sub(r"[^a-z ]+", " ", stripped.lower()).strip()
+    normalized = re.sub(r"\s+", " ", normalized)
+    for priority, words in keywords:
+        if normalized in words:
+            return priority
+    return None
+
+def _boundary_indexes(lines: List[str]) -> set:
+    """Indexes of the first and last PAGE_BOUNDARY_LINES non-blank lines of a page"""
+    filled = [i for i, l in enumerate(lines) if l.strip()]
+    return set(filled[:PAGE_BOUNDARY_LINES] + filled[-PAGE_BOUNDARY_LINES:])
+
+def strip_boilerplate(text: str, intake_type: str = "") -> Tuple[str, int]:
+    """Drop page labels and page-boundary headers/footers/numbers; returns (text, dropped line count)"""
+    keywords = SECTION_PRIORITIES.get(intake_type, [])
+    pages = [page.splitlines() for page in text.split("\f")]
+    boundaries = [_boundary_indexes(lines) for lines in pages]
+    # running headers/footers: the same short line at a boundary of many pages; repeated section
+    # headings (e.g. "Responsibilities" under every job) are structure, not boilerplate
+    repeated = set()
+    if len(pages) >= REPEATED_LINE_MIN_COUNT:
+        seen = Counter(
+            line for lines, idx in zip(pages, boundaries)
+            for line in {lines[i].strip() for i in idx if len(lines[i].strip()) <= 80}
+        )
+        repeated = {l for l, n in seen.items() if n >= REPEATED_LINE_MIN_COUNT and _heading_priority(l, keywords) is None}
+
+    seen_repeated = set()
+
+    def boilerplate(line: str, at_boundary: bool) -> bool:
+        if _PAGE_LABEL.match(line):
+            return True
+        if not at_boundary or len(pages) == 1:
+            return False
+        if _BARE_NUMBER.match(line) and not _YEAR.match(line):
+            return True
+        # keep the first copy: a running header is often the candidate's name and contact line
+        if line.strip() in repeated:
+            if line.strip() in seen_repeated:
+                return True
+            seen_repeated.add(line.strip())
+        return False
+
+    kept, dropped = [], 0
+    for lines, idx in zip(pages, boundaries):
+        for i, line in enumerate(lines):
+            if boilerplate(line, i in idx):
+                dropped += 1
+            else:
+                kept.append(line)
+    cleaned = _BLANK_RUN.sub("\n\n", "\n".join(kept)).strip()
+    return cleaned, dropped
+
+def split_sections(text: str, intake_type: str) -> List[Tuple[int, str]]:
+    """Split text on recognised headings into (priority, section_text) in original order"""
+    keywords = SECTION_PRIORITIES.get(intake_type, [])
+    sections: List[Tuple[int, List[str]]] = [(HEADER_PRIORITY, [])]
+    for line in text.splitlines():
+        priority = _heading_priority(line, keywords) if keywords else None
+        if priority is not None:
+            sections.append((priority, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(p, "\n".join(lines)) for p, lines in sections if any(l.strip() for l in lines)]
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep whole leading lines of text within max_tokens"""
+    out, used = [], 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line + "\n")
+        if used + cost > max_tokens:
+            break
+        out.append(line)
+        used += cost
+    return "\n".join(out)
+
+def fit_to_budget(text: str, intake_type: str, max_tokens: int = MAX_INPUT_TOKENS) -> Tuple[str, Dict[str, Any]]:
+    """
+    Returns (text within budget, report). report keys:
+      original_tokens, final_tokens, tokens_saved, boilerplate_lines_dropped, sections_dropped, truncated
+    """
+    original_tokens = estimate_tokens(text)
+    report = {
+        "original_tokens": original_tokens,
+        "boilerplate_lines_dropped": 0,
+        "sections_dropped": 0,
+        "truncated": False,
+    }
+    if max_tokens <= 0 or original_tokens <= max_tokens:
+        report["final_tokens"] = original_tokens
+        report["tokens_saved"] = 0
+        return text, report
+
+    cleaned, report["boilerplate_lines_dropped"] = strip_boilerplate(text, intake_type)
+
+    if estimate_tokens(cleaned) > max_tokens:
+        sections = split_sections(cleaned, intake_type)
+        costs = [estimate_tokens(s) for _, s in sections]
+        kept: Dict[int, str] = {}
+        remaining = max_tokens
+        for i in sorted(range(len(sections)), key=lambda i: (sections[i][0], i)):
+            if costs[i] <= remaining:
+                kept[i] = sections[i][1]
+                remaining -= costs[i]
+            elif remaining >= MIN_PARTIAL_TOKENS:
+                kept[i] = _truncate_to_tokens(sections[i][1], remaining)
+                remaining = 0
+        cleaned = "\n\n".join(kept[i] for i in sorted(kept))
+        report["sections_dropped"] = len(sections) - len(kept)
+        report["truncated"] = True
+
+    report["final_tokens"] = estimate_tokens(cleaned)
+    report["tokens_saved"] = max(0, original_tokens - report["final_tokens"])
+    return cleaned, report
@@ -1,19 +1,92 @@
 """
 BaseProvider: abstract minimal base class for provider adapters.
 Each provider adapter must implement `generate(prompt_payload, timeout_secs)` which returns (text, usage_info).
+Adapters should also implement `agenerate(...)` (same contract, awaitable) on top of a pooled async HTTP
+client so the orchestrator can serve many in-flight requests from one event loop, and `stream(...)`
+(async iterator of text chunks) for chat flows that show tokens as they arrive.
 """
 
-from typing import Dict, Any
+import asyncio
+import os
+from typing import Dict, Any, AsyncIterator, List
+
+# Connection pool limits shared by every async HTTP client a provider creates
+ASYNC_MAX_CONNECTIONS = int(os.getenv("BRAIN_PROVIDER_MAX_CONNECTIONS", "100"))
+ASYNC_MAX_KEEPALIVE = int(os.getenv("BRAIN_PROVIDER_MAX_KEEPALIVE", "20"))
+
+def normalize_usage(usage: Any) -> Dict[str, Any]:
+    """SDK usage objects (pydantic models, dicts or None) -> plain dict."""
+    if not usage:
+        return {}
+    if isinstance(usage, dict):
+        return usage
+    if hasattr(usage, "model_dump"):
+        return usage.model_dump()
+    if hasattr(usage, "dict"):
+        return usage.dict()
+    return {}
+
+def payload_to_messages(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Chat messages for a provider payload ({"messages": [...]} or {"prompt": "..."})."""
+    if "messages" in payload:
+        return payload["messages"]
+    return [{"role": "user", "content": payload.get("prompt", "")}]
+
+def response_format_kwargs(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenAI-style response_format request (strict JSON mode) for chat SDK calls, if the payload asks for one."""
+    if payload.get("response_format"):
+        return {"response_format": payload["response_format"]}
+    return {}
 
 class BaseProvider:
     def __init__(self, name: str, api_key: str, model: str | None = None):
         self.name = name
         self.api_key = api_key
         self.model = model
+        self._http_client = None
 
     def generate(self, payload: Dict[str, Any], timeout: int = 60) -> Dict[str, Any]:
         """
         payload: dict returned by provider_formatter (e.g., {"messages": [...] } or {"prompt": "..."}).
         Return: {"success": bool, "text": str, "usage": {...}}
         """
-        raise NotImplementedError()
\ No newline at end of file
+        raise NotImplementedError()
+
+    async def agenerate(self, payload: Dict[str, Any], timeout: int = 60) -> Dict[str, Any]:
+        """
+        Async variant of generate() with the same return contract.
+        Adapters without a native async client fall back to a worker thread.
+        """
+        return await asyncio.to_thread(self.generate, payload, timeout)
+
+    async def stream(self, payload: Dict[str, Any], timeout: int = 60) -> AsyncIterator[str]:
+        """
+        Yield response text chunks as the model produces them.
+        Raises on failure (a stream cannot carry the {"success": False} contract).
+        Adapters without native streaming yield the full agenerate() text once.
+        """
+        res = await self.agenerate(payload, timeout=timeout)
+        if not res.get("success"):
+            raise RuntimeError(res.get("error") or f"{self.name} generate failed")
+        yield res.get("text", "")
+
+    def _get_http_client(self):
+        """
+        Lazily build one pooled httpx.AsyncClient per provider instance.
+        Created on first use so it binds to the running event loop.
+        """
+        if self._http_client is None or self._http_client.is_closed:
+            import httpx
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=ASYNC_MAX_KEEPALIVE,
+                )
+            )
+        return self._http_client
+
+    async def aclose(self):
+        """Release pooled async connections (call on application shutdown)."""
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
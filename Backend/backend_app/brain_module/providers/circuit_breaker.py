@@ -0,0 +1,126 @@
+"""
+CircuitBreaker: per-provider closed / open / half-open state.
+Replaces the fixed 24h cooldown on any error:
+ - errors are classified (rate_limit, auth, timeout, server, other); each class has its own
+   failure threshold and base open time
+ - repeated trips back off exponentially (base * 2^(trips-1)), capped at max_open_seconds
+ - once the open time has passed the circuit is half-open and lets a single probe request
+   through; success closes it, failure re-opens it with the next backoff step
+The orchestrator mirrors the open time into ProviderUsageManager cooldowns so other
+workers skip the provider too.
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+MAX_OPEN_SECONDS = int(os.getenv("BRAIN_PROVIDER_COOLDOWN_SECONDS", str(24 * 3600)))
+
+# error class -> (consecutive failures before tripping, base open seconds)
+ERROR_POLICIES = {
+    "rate_limit": (1, int(os.getenv("BRAIN_BREAKER_RATE_LIMIT_SECONDS", "30"))),
+    "auth": (1, int(os.getenv("BRAIN_BREAKER_AUTH_SECONDS", "3600"))),
+    "timeout": (3, int(os.getenv("BRAIN_BREAKER_TIMEOUT_SECONDS", "10"))),
+    "server": (2, int(os.getenv("BRAIN_BREAKER_SERVER_SECONDS", "15"))),
+    "other": (2, int(os.getenv("BRAIN_BREAKER_OTHER_SECONDS", "30"))),
+}
+
+_ERROR_PATTERNS = [
+    ("rate_limit", re.compile(r"\b429\b|rate.?limit|too many requests|quota|resource.?exhausted", re.I)),
+    ("auth", re.compile(r"\b40[13]\b|unauthori[sz]ed|forbidden|invalid.{0,20}(api.?)?key|authenticat|permission", re.I)),
+    ("timeout", re.compile(r"time.?out|timed out|deadline", re.I)),
+    ("server", re.compile(r"\b5\d\d\b|unavailable|overloaded|internal server error|bad gateway|connection (error|reset|refused)", re.I)),
+]
+
+def classify_error(error: Optional[str]) -> str:
+    text = error or ""
+    for name, pattern in _ERROR_PATTERNS:
+        if pattern.search(text):
+            return name
+    return "other"
+
+class CircuitBreaker:
+    def __init__(self, max_open_seconds: int = MAX_OPEN_SECONDS, policies: Optional[Dict[str, tuple]] = None):
+        self.max_open_seconds = max_open_seconds
+        self.policies = policies or ERROR_POLICIES
+        self._circuits: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, provider_id: str) -> Dict[str, Any]:
+        # caller holds self._lock
+        if provider_id not in self._circuits:
+            self._circuits[provider_id] = {
+                "state": CLOSED, "failures": 0, "trips": 0, "open_until": 0.0,
+                "probe_in_flight": False, "last_error_class": None,
+            }
+        return self._circuits[provider_id]
+
+    def allow(self, provider_id: str) -> bool:
+        """True if a request may go to provider_id now (claims the probe slot when half-open)."""
+        with self._lock:
+            c = self._circuit(provider_id)
+            if c["state"] == OPEN:
+                if time.time() < c["open_until"]:
+                    return False
+                c["state"] = HALF_OPEN
+            if c["state"] == HALF_OPEN:
+                if c["probe_in_flight"]:
+                    return False
+                c["probe_in_flight"] = True
+            return True
+
+    def record_success(self, provider_id: str):
+        with self._lock:
+            c = self._circuit(provider_id)
+            c.update(state=CLOSED, failures=0, trips=0, open_until=0.0, probe_in_flight=False)
+
+    def record_failure(self, provider_id: str, error: Optional[str]) -> int:
+        """Register a failed call; returns the seconds the circuit is now open for (0 = still closed)."""
+        error_class = classify_error(error)
+        threshold, base_seconds = self.policies.get(error_class, self.policies["other"])
+        with self._lock:
+            c = self._circuit(provider_id)
+            c["last_error_class"] = error_class
+            c["failures"] += 1
+            probe_failed = c["state"] == HALF_OPEN
+            c["probe_in_flight"] = False
+            if not probe_failed and c["failures"] < threshold:
+                return 0
+            c["trips"] += 1
+            seconds = min(self.max_open_seconds, base_seconds * 2 ** (c["trips"] - 1))
+            c.update(state=OPEN, failures=0, open_until=time.time() + seconds)
+            return int(seconds)
+
+    def release(self, provider_id: str):
+        """Give back a half-open probe slot whose request was cancelled (e.g. a hedging loser)."""
+        with self._lock:
+            self._circuit(provider_id)["probe_in_flight"] = False
+
+    def state(self, provider_id: str) -> str:
+        with self._lock:
+            c = self._circuit(provider_id)
+            if c["state"] == OPEN and time.time() >= c["open_until"]:
+                return HALF_OPEN
+            return c["state"]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            ids = list(self._circuits)
+        out = {}
+        for pid in ids:
+            state = self.state(pid)
+            with self._lock:
+                c = self._circuits[pid]
+                out[pid] = {
+                    "state": state,
+                    "trips": c["trips"],
+                    "open_for_seconds": max(0, int(c["open_until"] - time.time())),
+                    "last_error_class": c["last_error_class"],
+                }
+        return out
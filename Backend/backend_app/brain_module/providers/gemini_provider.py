@@ -1,11 +1,21 @@
 # Backend/backend_app/brain_module/providers/gemini_provider.py
 
-from typing import Dict, Any
+import json
+from typing import Dict, Any, AsyncIterator
 from .base_provider import BaseProvider
 from ..utils.logger import get_logger
 
 logger = get_logger("gemini_provider")
 
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+
+def _request_body(prompt: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """REST body for generateContent; strict JSON payloads use Gemini's native JSON output mode"""
+    body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+    if payload.get("response_format"):
+        body["generationConfig"] = {"responseMimeType": "application/json"}
+    return body
+
 class GeminiProvider(BaseProvider):
     def __init__(self, api_key: str, model: str):
         if not api_key:
@@ -32,7 +42,10 @@ class GeminiProvider(BaseProvider):
             else:
                 prompt = payload.get("prompt", "")
 
-            resp = self._model_obj.generate_content(prompt)
+            if payload.get("response_format"):
+                resp = self._model_obj.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
+            else:
+                resp = self._model_obj.generate_content(prompt)
             text = getattr(resp, "text", None) or str(resp)
 
             return {"success": True, "text": text, "usage": {}}
@@ -40,3 +53,65 @@ class GeminiProvider(BaseProvider):
         except Exception as e:
             logger.exception("Gemini generate failed: %s", e)
             return {"success": False, "text": "", "usage": {}, "error": str(e)}
+
+    def _auth_headers(self) -> Dict[str, str]:
+        # header, not the ?key= query param: httpx errors quote the request URL and end up in logs
+        return {"x-goog-api-key": self.api_key}
+
+    async def agenerate(self, payload: Dict[str, Any], timeout: int = 60) -> Dict[str, Any]:
+        # google-generativeai has no pooled async transport, so call the REST endpoint directly
+        try:
+            if "messages" in payload:
+                msgs = payload["messages"]
+                user_texts = [m["content"] for m in msgs]
+                prompt = "\n".join(user_texts)
+            else:
+                prompt = payload.get("prompt", "")
+
+            resp = await self._get_http_client().post(
+                f"{GEMINI_API_BASE}/models/{self.model}:generateContent",
+                headers=self._auth_headers(),
+                json=_request_body(prompt, payload),
+                timeout=timeout
+            )
+            resp.raise_for_status()
+            body = resp.json()
+
+            parts = body["candidates"][0]["content"].get("parts", [])
+            text = "".join(part.get("text", "") for part in parts)
+            meta = body.get("usageMetadata", {})
+            usage = {
+                "prompt_tokens": meta.get("promptTokenCount", 0),
+                "completion_tokens": meta.get("candidatesTokenCount", 0),
+                "total_tokens": meta.get("totalTokenCount", 0)
+            }
+
+            return {"success": True, "text": text, "usage": usage}
+
+        except Exception as e:
+            logger.exception("Gemini agenerate failed: %s", e)
+            return {"success": False, "text": "", "usage": {}, "error": str(e)}
+
+    async def stream(self, payload: Dict[str, Any], timeout: int = 60) -> AsyncIterator[str]:
+        if "messages" in payload:
+            prompt = "\n".join(m["content"] for m in payload["messages"])
+        else:
+            prompt = payload.get("prompt", "")
+
+        async with self._get_http_client().stream(
+            "POST",
+            f"{GEMINI_API_BASE}/models/{self.model}:streamGenerateContent",
+            params={"alt": "sse"},
+            headers=self._auth_headers(),
+            json=_request_body(prompt, payload),
+            timeout=timeout
+        ) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                body = json.loads(line[len("data:"):])
+                for cand in body.get("candidates", [])[:1]:
+                    text = "".join(part.get("text", "") for part in cand.get("content", {}).get("parts", []))
+                    if text:
+                        yield text
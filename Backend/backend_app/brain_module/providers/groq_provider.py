@@ -1,7 +1,7 @@
 # Backend/backend_app/brain_module/providers/groq_provider.py
 
-from typing import Dict, Any
-from .base_provider import BaseProvider
+from typing import Dict, Any, AsyncIterator
+from .base_provider import BaseProvider, normalize_usage, payload_to_messages, response_format_kwargs
 from ..utils.logger import get_logger
 
 logger = get_logger("groq_provider")
@@ -22,6 +22,14 @@ class GroqProvider(BaseProvider):
             logger.exception("Failed to initialize Groq SDK: %s", e)
             raise
 
+        self._aclient = None
+
+    def _get_async_client(self):
+        if self._aclient is None or self._http_client is None or self._http_client.is_closed:
+            from groq import AsyncGroq
+            self._aclient = AsyncGroq(api_key=self.api_key, http_client=self._get_http_client())
+        return self._aclient
+
     def generate(self, payload: Dict[str, Any], timeout: int = 60) -> Dict[str, Any]:
         try:
             if "messages" in payload:
@@ -31,7 +39,8 @@ class GroqProvider(BaseProvider):
 
             resp = self._client.chat.completions.create(
                 model=self.model,
-                messages=messages
+                messages=messages,
+                **response_format_kwargs(payload)
             )
 
             text = resp.choices[0].message["content"]
@@ -42,3 +51,38 @@ class GroqProvider(BaseProvider):
         except Exception as e:
             logger.exception("Groq generate failed: %s", e)
             return {"success": False, "text": "", "usage": {}, "error": str(e)}
+
+    async def agenerate(self, payload: Dict[str, Any], timeout: int = 60) -> Dict[str, Any]:
+        try:
+            if "messages" in payload:
+                messages = payload["messages"]
+            else:
+                messages = [{"role": "user", "content": payload.get("prompt", "")}]
+
+            resp = await self._get_async_client().chat.completions.create(
+                model=self.model,
+                messages=messages,
+                **response_format_kwargs(payload),
+                timeout=timeout
+            )
+
+            text = resp.choices[0].message.content
+            usage = normalize_usage(getattr(resp, "usage", None))
+
+            return {"success": True, "text": text, "usage": usage}
+
+        except Exception as e:
+            logger.exception("Groq agenerate failed: %s", e)
+            return {"success": False, "text": "", "usage": {}, "error": str(e)}
+
+    async def stream(self, payload: Dict[str, Any], timeout: int = 60) -> AsyncIterator[str]:
+        resp = await self._get_async_client().chat.completions.create(
+            model=self.model,
+            messages=payload_to_messages(payload),
+            **response_format_kwargs(payload),
+            timeout=timeout,
+            stream=True
+        )
+        async for chunk in resp:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
@@ -0,0 +1,52 @@
+"""
+LatencyTracker: rolling per-provider latency windows.
+The orchestrator records the duration of every successful provider call and reads
+the rolling p95 to decide when a slow request should be hedged to the next slot.
+Streams are timed to their first token in a separate tracker.
+"""
+
+import math
+import os
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+WINDOW_SIZE = int(os.getenv("BRAIN_LATENCY_WINDOW", "200"))
+MIN_SAMPLES = int(os.getenv("BRAIN_LATENCY_MIN_SAMPLES", "20"))
+
+class LatencyTracker:
+    def __init__(self, window: int = WINDOW_SIZE, min_samples: int = MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, provider_id: str, seconds: float):
+        with self._lock:
+            if provider_id not in self._samples:
+                self._samples[provider_id] = deque(maxlen=self.window)
+            self._samples[provider_id].append(seconds)
+
+    def percentile(self, provider_id: str, q: float) -> Optional[float]:
+        """q in [0, 1]; None until the provider has min_samples observations"""
+        with self._lock:
+            samples = sorted(self._samples.get(provider_id, ()))
+        if len(samples) < max(1, self.min_samples):
+            return None
+        # nearest-rank percentile
+        idx = min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))
+        return samples[idx]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            ids = list(self._samples)
+        out = {}
+        for pid in ids:
+            with self._lock:
+                count = len(self._samples[pid])
+            out[pid] = {
+                "count": count,
+                "p50": self.percentile(pid, 0.50),
+                "p95": self.percentile(pid, 0.95),
+            }
+        return out
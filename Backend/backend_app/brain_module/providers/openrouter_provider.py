@@ -1,7 +1,7 @@
 # Backend/backend_app/brain_module/providers/openrouter_provider.py
 
-from typing import Dict, Any
-from .base_provider import BaseProvider
+from typing import Dict, Any, AsyncIterator
+from .base_provider import BaseProvider, normalize_usage, payload_to_messages, response_format_kwargs
 from ..utils.logger import get_logger
 
 logger = get_logger("openrouter_provider")
@@ -16,6 +16,8 @@ class OpenRouterProvider(BaseProvider):
             raise ValueError("OpenRouterProvider requires BASEURL from .env")
 
         super().__init__(name="openrouter", api_key=api_key, model=model)
+        self.base_url = base_url
+        self._aclient = None
 
         try:
             import openai
@@ -31,18 +33,30 @@ class OpenRouterProvider(BaseProvider):
             logger.exception("Failed to initialize OpenRouter client: %s", e)
             raise
 
+    def _get_async_client(self):
+        if self._aclient is None or self._http_client is None or self._http_client.is_closed:
+            import openai
+            self._aclient = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=self._get_http_client()
+            )
+        return self._aclient
+
     def generate(self, payload: Dict[str, Any], timeout: int = 60) -> Dict[str, Any]:
         try:
             if "messages" in payload:
                 resp = self._client.chat.completions.create(
                     model=self.model,
                     messages=payload["messages"],
+                    **response_format_kwargs(payload),
                     timeout=timeout
                 )
             else:
                 resp = self._client.chat.completions.create(
                     model=self.model,
                     messages=[{"role": "user", "content": payload.get("prompt", "")}],
+                    **response_format_kwargs(payload),
                     timeout=timeout
                 )
 
@@ -54,3 +68,38 @@ class OpenRouterProvider(BaseProvider):
         except Exception as e:
             logger.exception("OpenRouter generate failed: %s", e)
             return {"success": False, "text": "", "usage": {}, "error": str(e)}
+
+    async def agenerate(self, payload: Dict[str, Any], timeout: int = 60) -> Dict[str, Any]:
+        try:
+            if "messages" in payload:
+                messages = payload["messages"]
+            else:
+                messages = [{"role": "user", "content": payload.get("prompt", "")}]
+
+            resp = await self._get_async_client().chat.completions.create(
+                model=self.model,
+                messages=messages,
+                **response_format_kwargs(payload),
+                timeout=timeout
+            )
+
+            text = resp.choices[0].message.content
+            usage = normalize_usage(getattr(resp, "usage", None))
+
+            return {"success": True, "text": text, "usage": usage}
+
+        except Exception as e:
+            logger.exception("OpenRouter agenerate failed: %s", e)
+            return {"success": False, "text": "", "usage": {}, "error": str(e)}
+
+    async def stream(self, payload: Dict[str, Any], timeout: int = 60) -> AsyncIterator[str]:
+        resp = await self._get_async_client().chat.completions.create(
+            model=self.model,
+            messages=payload_to_messages(payload),
+            **response_format_kwargs(payload),
+            timeout=timeout,
+            stream=True
+        )
+        async for chunk in resp:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
@@ -5,28 +5,47 @@ ProviderOrchestrator:
    - checks usage manager (can_use)
    - calls provider.generate(...)
    - on success returns standardized result
-   - on failure sets cooldown for provider and continues to next
+   - on failure reports to the circuit breaker (which may open the provider's circuit
+     and set a matching cooldown) and continues to next
+ - agenerate(...) is the same loop on top of provider.agenerate(...) so callers on an
+   event loop never need a thread-pool hop
+ - agenerate(..., hedge=True) races slots: when the running provider exceeds its rolling
+   p95 latency a hedged request goes to the next healthy slot; first success wins and
+   the loser is cancelled
+ - astream(...) streams text deltas from provider.stream(...); it falls back to the next
+   slot only while no token has been emitted yet; it records time-to-first-token in its own
+   tracker so streams never skew the p95 that hedging uses
  - Supports automatic daily reset via ProviderUsageManager
- - Persists usage state to JSON file
+ - Persists usage state in a shared SQLite store (see ProviderUsageManager)
 """
 
 import os
-from typing import Dict, Any, List, Optional
+import time
+import asyncio
+from typing import Dict, Any, List, Optional, AsyncIterator
 from .provider_factory import create_provider_from_env
 from .provider_usage import ProviderUsageManager
+from .latency_tracker import LatencyTracker
+from .circuit_breaker import CircuitBreaker
 from ..utils.logger import get_logger
 
 logger = get_logger("provider_orchestrator")
 
 DEFAULT_COUNT = int(os.getenv("BRAIN_PROVIDER_COUNT", "5"))
 DEFAULT_DAILY_LIMIT = int(os.getenv("BRAIN_PROVIDER_DAILY_LIMIT", "1000"))
-COOLDOWN_SECONDS_ON_ERROR = int(os.getenv("BRAIN_PROVIDER_COOLDOWN_SECONDS", str(24 * 3600)))  # 24h
+HEDGE_ENABLED = os.getenv("BRAIN_PROVIDER_HEDGING", "false").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("BRAIN_HEDGE_PERCENTILE", "0.95"))
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("BRAIN_HEDGE_DEFAULT_DELAY_SECONDS", "8"))  # until enough samples exist
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("BRAIN_HEDGE_MIN_DELAY_SECONDS", "0.5"))
 
 class ProviderOrchestrator:
     def __init__(self, provider_count: int = DEFAULT_COUNT, daily_limit: int = DEFAULT_DAILY_LIMIT):
         self.provider_count = provider_count
         self.daily_limit = daily_limit
         self.usage = ProviderUsageManager()
+        self.latency = LatencyTracker()
+        self.first_token_latency = LatencyTracker()
+        self.breaker = CircuitBreaker()
         self.providers = self._load_providers()
 
     def _load_providers(self) -> List[Dict[str, Any]]:
@@ -42,6 +61,10 @@ class ProviderOrchestrator:
                 logger.exception("Failed to create provider at slot %s: %s", i, e)
         return providers
 
+    def model_fingerprint(self) -> str:
+        """Stable description of the configured provider chain (used in response cache keys)."""
+        return "|".join(f"{p['type']}:{p['model']}" for p in self.providers)
+
     def generate(self, payload: Dict[str, Any], timeout: int = 60) -> Dict[str, Any]:
         """
         payload: provider-format payload (messages OR prompt)
@@ -54,36 +77,255 @@ class ProviderOrchestrator:
             inst = p["inst"]
             provider_id = f"provider{slot}_{inst.name}"
 
-            # check usage/cooldown
-            if not self.usage.can_use(provider_id, self.daily_limit):
-                logger.info("Skipping %s (limit or cooldown)", provider_id)
+            # check usage/cooldown/circuit
+            if not self._available(provider_id):
                 continue
 
             try:
                 logger.info("Attempting provider %s (slot %s, model %s)", inst.name, slot, inst.model)
+                started = time.monotonic()
                 res = inst.generate(payload, timeout=timeout)
                 if res.get("success"):
-                    # record usage and return normalized result
-                    self.usage.record_success(provider_id)
-                    return {
-                        "success": True,
-                        "provider": provider_id,
-                        "model": inst.model,
-                        "response": res.get("text", ""),
-                        "usage": res.get("usage", {})
-                    }
-                else:
-                    # provider returned failure; set cooldown and continue
-                    err = res.get("error", "unknown")
-                    logger.warning("Provider %s failed: %s", provider_id, err)
-                    last_error = err
-                    self.usage.set_cooldown(provider_id, COOLDOWN_SECONDS_ON_ERROR)
-                    continue
+                    self.latency.observe(provider_id, time.monotonic() - started)
             except Exception as e:
                 logger.exception("Provider %s raised exception: %s", provider_id, e)
-                last_error = str(e)
-                self.usage.set_cooldown(provider_id, COOLDOWN_SECONDS_ON_ERROR)
-                continue
+                res = {"success": False, "error": str(e)}
+
+            result = self._handle_result(provider_id, inst, res)
+            if result is not None:
+                return result
+            last_error = res.get("error", "unknown")
 
         # if all providers exhausted
-        return {"success": False, "provider": None, "model": None, "response": "", "usage": {}, "error": last_error or "All providers failed"}
\ No newline at end of file
+        return self._exhausted(last_error)
+
+    async def agenerate(self, payload: Dict[str, Any], timeout: int = 60, hedge: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Async twin of generate(): same ordering, usage and cooldown rules,
+        but awaits provider.agenerate(...) so no executor thread is held per request.
+        hedge: race slots on slow responses (defaults to BRAIN_PROVIDER_HEDGING)
+        """
+        if hedge if hedge is not None else HEDGE_ENABLED:
+            return await self._agenerate_hedged(payload, timeout)
+
+        last_error = None
+        for p in self.providers:
+            provider_id = self._provider_id(p)
+
+            if not self._available(provider_id):
+                continue
+
+            res = await self._timed_call(p, payload, timeout)
+            result = self._handle_result(provider_id, p["inst"], res)
+            if result is not None:
+                return result
+            last_error = res.get("error", "unknown")
+
+        return self._exhausted(last_error)
+
+    async def _agenerate_hedged(self, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Latency-aware racing: start the first healthy slot; whenever the newest request runs past
+        its provider's rolling p95 (hedge_delay), start the next healthy slot as well.
+        A failure starts the next slot straight away. First success wins, the rest are cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        queue = list(self.providers)
+        running: Dict[asyncio.Task, Dict[str, Any]] = {}
+        last_error = None
+        last_started = {"at": 0.0, "delay": 0.0}
+
+        def launch_next() -> bool:
+            while queue:
+                p = queue.pop(0)
+                provider_id = self._provider_id(p)
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                if not self._available(provider_id):
+                    continue
+                running[asyncio.ensure_future(self._timed_call(p, payload, remaining))] = p
+                last_started["at"] = loop.time()
+                last_started["delay"] = self.hedge_delay(provider_id)
+                return True
+            return False
+
+        launch_next()
+        try:
+            while running:
+                wait_for = None
+                if queue:
+                    wait_for = max(0.0, last_started["at"] + last_started["delay"] - loop.time())
+                done, _ = await asyncio.wait(list(running), timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # newest request is slower than its p95: hedge to the next healthy slot
+                    if launch_next():
+                        logger.info("Hedging request to %s", self._provider_id(list(running.values())[-1]))
+                    continue
+
+                for task in done:
+                    p = running.pop(task)
+                    res = task.result()
+                    result = self._handle_result(self._provider_id(p), p["inst"], res)
+                    if result is not None:
+                        return result
+                    last_error = res.get("error", "unknown")
+                    # replace the failed request even while a slower one is still running
+                    launch_next()
+        finally:
+            # cancel losers; their usage is not recorded and they are not cooled down
+            for task in running:
+                task.cancel()
+
+        return self._exhausted(last_error)
+
+    async def _timed_call(self, p: Dict[str, Any], payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Run one provider.agenerate with a hard timeout; never raises (except cancellation)."""
+        inst = p["inst"]
+        provider_id = self._provider_id(p)
+        try:
+            logger.info("Attempting provider %s (slot %s, model %s)", inst.name, p["slot"], inst.model)
+            started = time.monotonic()
+            res = await asyncio.wait_for(inst.agenerate(payload, timeout=timeout), timeout=timeout)
+            if res.get("success"):
+                self.latency.observe(provider_id, time.monotonic() - started)
+            return res
+        except asyncio.TimeoutError:
+            logger.warning("Provider %s timed out after %ss", provider_id, timeout)
+            return {"success": False, "error": f"timeout after {timeout}s"}
+        except asyncio.CancelledError:
+            # hedging loser: hand back a half-open probe slot it may hold
+            self.breaker.release(provider_id)
+            raise
+        except Exception as e:
+            logger.exception("Provider %s raised exception: %s", provider_id, e)
+            return {"success": False, "error": str(e)}
+
+    async def astream(self, payload: Dict[str, Any], timeout: int = 60) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming twin of agenerate(). Yields {"type": "delta", "text": ...} events and ends with
+        exactly one {"type": "done", **standardized result} event (success or failure).
+        Once a delta has been emitted the request is committed to that provider: a mid-stream
+        failure ends with success=False and the partial text in "response".
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        last_error = None
+        for p in self.providers:
+            provider_id = self._provider_id(p)
+            if not self._available(provider_id):
+                continue
+
+            inst = p["inst"]
+            chunks: List[str] = []
+            err = None
+            logger.info("Streaming from provider %s (slot %s, model %s)", inst.name, p["slot"], inst.model)
+            started = time.monotonic()
+            stream = inst.stream(payload, timeout=max(0.0, deadline - loop.time()))
+            try:
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        break
+                    if chunk:
+                        if not chunks:
+                            self.first_token_latency.observe(provider_id, time.monotonic() - started)
+                        chunks.append(chunk)
+                        yield {"type": "delta", "text": chunk}
+            except asyncio.TimeoutError:
+                logger.warning("Provider %s stream timed out after %ss", provider_id, timeout)
+                err = f"timeout after {timeout}s"
+            except (asyncio.CancelledError, GeneratorExit):
+                # client went away mid-stream: hand back a half-open probe slot it may hold
+                self.breaker.release(provider_id)
+                raise
+            except Exception as e:
+                logger.exception("Provider %s stream raised exception: %s", provider_id, e)
+                err = str(e)
+            finally:
+                await stream.aclose()
+
+            if err is None:
+                res = {"success": True, "text": "".join(chunks), "usage": {}}
+            else:
+                res = {"success": False, "error": err}
+            result = self._handle_result(provider_id, inst, res)
+            if result is not None:
+                yield {"type": "done", **result}
+                return
+            last_error = err
+            if chunks:
+                # partial output already reached the caller; another model cannot continue it
+                yield {"type": "done", **self._exhausted(err), "response": "".join(chunks)}
+                return
+
+        yield {"type": "done", **self._exhausted(last_error)}
+
+    def hedge_delay(self, provider_id: str) -> float:
+        """Seconds to wait on provider_id before hedging: its rolling p95, or a default until warmed up."""
+        p95 = self.latency.percentile(provider_id, HEDGE_PERCENTILE)
+        if p95 is None:
+            return HEDGE_DEFAULT_DELAY_SECONDS
+        return max(HEDGE_MIN_DELAY_SECONDS, p95)
+
+    def latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.latency.snapshot()
+
+    def first_token_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.first_token_latency.snapshot()
+
+    def circuit_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.breaker.snapshot()
+
+    def _available(self, provider_id: str) -> bool:
+        """Daily limit, shared cooldown and circuit state all allow a request to provider_id."""
+        if not self.usage.can_use(provider_id, self.daily_limit):
+            logger.info("Skipping %s (limit or cooldown)", provider_id)
+            return False
+        if not self.breaker.allow(provider_id):
+            logger.info("Skipping %s (circuit %s)", provider_id, self.breaker.state(provider_id))
+            return False
+        return True
+
+    @staticmethod
+    def _provider_id(p: Dict[str, Any]) -> str:
+        return f"provider{p['slot']}_{p['inst'].name}"
+
+    async def aclose(self):
+        """Close pooled async clients held by the providers."""
+        for p in self.providers:
+            await p["inst"].aclose()
+
+    def _handle_result(self, provider_id: str, inst, res: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Record usage for a provider response; returns the normalized result on success, None on failure."""
+        if res.get("success"):
+            # record usage and return normalized result
+            self.usage.record_success(provider_id)
+            self.breaker.record_success(provider_id)
+            return {
+                "success": True,
+                "provider": provider_id,
+                "model": inst.model,
+                "response": res.get("text", ""),
+                "usage": res.get("usage", {})
+            }
+
+        # provider returned failure; the breaker decides whether (and how long) to take it out
+        err = res.get("error", "unknown")
+        open_seconds = self.breaker.record_failure(provider_id, err)
+        if open_seconds:
+            logger.warning("Provider %s failed (%s); circuit open for %ss", provider_id, err, open_seconds)
+            self.usage.set_cooldown(provider_id, open_seconds)
+        else:
+            logger.warning("Provider %s failed: %s", provider_id, err)
+        return None
+
+    @staticmethod
+    def _exhausted(last_error: Optional[str]) -> Dict[str, Any]:
+        return {"success": False, "provider": None, "model": None, "response": "", "usage": {}, "error": last_error or "All providers failed"}
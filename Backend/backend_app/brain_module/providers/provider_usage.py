@@ -1,71 +1,227 @@
 """
-ProviderUsage: simple persistence for daily counters and cooldowns.
-This implementation saves state to a JSON file under brain_module/providers/provider_usage_state.json
+ProviderUsage: shared persistence for daily counters and cooldowns.
+State lives in a SQLite database (WAL mode) next to this file, so API workers and
+Celery workers on the same host see one set of counters.
 It supports:
- - incrementing request counts
- - checking can_use() which respects cooldown and daily limits
+ - incrementing request counts (buffered in memory, flushed as atomic UPSERT increments)
+ - checking can_use() which respects cooldown and daily limits, from in-memory state that a
+   background thread keeps in sync with the database (no SQLite call on the caller's thread)
  - automatic daily reset when day changes
+The legacy provider_usage_state.json is imported once when the database is created.
 """
 
+import atexit
 import json
+import os
+import sqlite3
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from ..utils.time_utils import today_date_str, now_ts
 from ..utils.logger import get_logger
 
 logger = get_logger("provider_usage")
 
 STATE_FILE = Path(__file__).resolve().parent / "provider_usage_state.json"
+USAGE_DB = Path(os.getenv("BRAIN_PROVIDER_USAGE_DB", str(Path(__file__).resolve().parent / "provider_usage_state.db")))
+FLUSH_INTERVAL_SECONDS = float(os.getenv("BRAIN_PROVIDER_USAGE_FLUSH_SECONDS", "2"))
+FLUSH_MAX_PENDING = int(os.getenv("BRAIN_PROVIDER_USAGE_FLUSH_MAX_PENDING", "50"))
+READ_TTL_SECONDS = float(os.getenv("BRAIN_PROVIDER_USAGE_READ_TTL_SECONDS", "1"))
 
 class ProviderUsageManager:
-    def __init__(self):
+    """
+    can_use / get_state / record_success / set_cooldown never touch SQLite: they read and update
+    in-memory state, so the orchestrator can call them from the event loop. A background thread
+    writes increments and cooldowns (cooldowns at once) and reloads every provider row every
+    read_ttl seconds, which is how other workers' counts and cooldowns become visible.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS,
+                 flush_max_pending: int = FLUSH_MAX_PENDING,
+                 read_ttl: float = READ_TTL_SECONDS):
+        self.db_path = Path(db_path or USAGE_DB)
+        self.flush_interval = flush_interval
+        self.flush_max_pending = flush_max_pending
+        self.read_ttl = read_ttl
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        # increments not yet written: {(provider_id, date): n}; in flight: being written by flush()
+        self._pending: Dict[tuple, int] = {}
+        self._in_flight: Dict[tuple, int] = {}
+        # cooldowns not yet written, and every cooldown this process set: {provider_id: until}
+        self._pending_cooldowns: Dict[str, int] = {}
+        self._cooldowns: Dict[str, int] = {}
+        # provider rows as last read from the database: {provider_id: row}
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._wake = threading.Event()
+        self._closed = threading.Event()
         self._load()
+        self.refresh()
+        self._flusher = threading.Thread(target=self._flush_loop, name="provider-usage-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _conn(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
 
     def _load(self):
-        if STATE_FILE.exists():
-            try:
-                raw = json.loads(STATE_FILE.read_text())
-            except Exception:
-                raw = {}
-        else:
-            raw = {}
-        # Ensure structure: { provider_key: { date: "YYYY-MM-DD", count: int, cooldown_until: ts } }
-        self.state: Dict[str, Dict[str, Any]] = raw
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS provider_usage (
+                provider_id TEXT PRIMARY KEY,
+                date TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                cooldown_until INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+            empty = conn.execute("SELECT COUNT(*) FROM provider_usage").fetchone()[0] == 0
+            if empty and STATE_FILE.exists():
+                self._import_json(conn)
+        finally:
+            conn.close()
 
-    def _save(self):
+    def _import_json(self, conn):
+        """One-time migration of the old JSON state file."""
         try:
-            STATE_FILE.write_text(json.dumps(self.state))
+            raw = json.loads(STATE_FILE.read_text())
         except Exception:
-            logger.exception("Failed to persist provider usage state")
+            return
+        rows = [
+            (pid, rec.get("date", today_date_str()), int(rec.get("count", 0)), int(rec.get("cooldown_until", 0)))
+            for pid, rec in raw.items() if isinstance(rec, dict)
+        ]
+        conn.executemany("INSERT OR IGNORE INTO provider_usage (provider_id, date, count, cooldown_until) VALUES (?, ?, ?, ?)", rows)
+        logger.info("Imported %s provider usage records from %s", len(rows), STATE_FILE.name)
 
-    def ensure_provider(self, provider_id: str):
-        if provider_id not in self.state:
-            self.state[provider_id] = {"date": today_date_str(), "count": 0, "cooldown_until": 0}
+    def refresh(self):
+        """Reload every provider row, picking up other workers' increments and cooldowns"""
+        with self._io_lock:
+            self._refresh()
+
+    def _refresh(self):
+        conn = self._conn()
+        try:
+            rows = conn.execute("SELECT provider_id, date, count, cooldown_until FROM provider_usage").fetchall()
+        finally:
+            conn.close()
+        with self._lock:
+            self._rows = {pid: {"date": date, "count": count, "cooldown_until": until} for pid, date, count, until in rows}
+            # these are now part of the rows just read
+            self._in_flight = {}
 
-        # auto reset if date differs
-        if self.state[provider_id].get("date") != today_date_str():
-            self.state[provider_id]["date"] = today_date_str()
-            self.state[provider_id]["count"] = 0
-            # do not reset cooldown here (cooldown is time-based)
+    def ensure_provider(self, provider_id: str):
+        conn = self._conn()
+        try:
+            conn.execute(
+                "INSERT OR IGNORE INTO provider_usage (provider_id, date, count, cooldown_until) VALUES (?, ?, 0, 0)",
+                (provider_id, today_date_str())
+            )
+        finally:
+            conn.close()
 
     def can_use(self, provider_id: str, daily_limit: int) -> bool:
-        self.ensure_provider(provider_id)
-        rec = self.state[provider_id]
-        now = now_ts()
-        if rec.get("cooldown_until", 0) > now:
+        rec = self.get_state(provider_id)
+        if rec.get("cooldown_until", 0) > now_ts():
             return False
         return rec.get("count", 0) < daily_limit
 
     def record_success(self, provider_id: str):
-        self.ensure_provider(provider_id)
-        self.state[provider_id]["count"] = self.state[provider_id].get("count", 0) + 1
-        self._save()
+        key = (provider_id, today_date_str())
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + 1
+            pending = sum(self._pending.values())
+        if pending >= self.flush_max_pending:
+            self._wake.set()
 
     def set_cooldown(self, provider_id: str, seconds: int):
-        self.ensure_provider(provider_id)
-        self.state[provider_id]["cooldown_until"] = now_ts() + seconds
-        self._save()
+        # cooldowns are rare and must reach other workers quickly: applied here, written by the flusher at once
+        until = now_ts() + seconds
+        with self._lock:
+            self._cooldowns[provider_id] = max(until, self._cooldowns.get(provider_id, 0))
+            self._pending_cooldowns[provider_id] = self._cooldowns[provider_id]
+        self._wake.set()
 
     def get_state(self, provider_id: str):
-        self.ensure_provider(provider_id)
-        return self.state[provider_id]
\ No newline at end of file
+        today = today_date_str()
+        with self._lock:
+            row = dict(self._rows.get(provider_id) or {"date": today, "count": 0, "cooldown_until": 0})
+            # auto reset if date differs (cooldown is time-based and kept)
+            if row.get("date") != today:
+                row["date"] = today
+                row["count"] = 0
+            row["count"] += self._pending.get((provider_id, today), 0) + self._in_flight.get((provider_id, today), 0)
+            row["cooldown_until"] = max(row["cooldown_until"], self._cooldowns.get(provider_id, 0))
+        return row
+
+    def flush(self):
+        """Write buffered increments as atomic UPSERTs and pending cooldowns (one transaction), then reload the rows."""
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                cooldowns, self._pending_cooldowns = self._pending_cooldowns, {}
+                for key, n in pending.items():
+                    self._in_flight[key] = self._in_flight.get(key, 0) + n
+            if not pending and not cooldowns:
+                return
+            try:
+                conn = self._conn()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.executemany("""
+                    INSERT INTO provider_usage (provider_id, date, count, cooldown_until) VALUES (?, ?, ?, 0)
+                    ON CONFLICT(provider_id) DO UPDATE SET
+                        count = CASE WHEN provider_usage.date = excluded.date THEN provider_usage.count + excluded.count
+                                     WHEN provider_usage.date < excluded.date THEN excluded.count
+                                     ELSE provider_usage.count END,
+                        date = MAX(provider_usage.date, excluded.date)
+                    """, [(pid, date, n) for (pid, date), n in pending.items()])
+                    conn.executemany("""
+                    INSERT INTO provider_usage (provider_id, date, count, cooldown_until) VALUES (?, ?, 0, ?)
+                    ON CONFLICT(provider_id) DO UPDATE SET
+                        cooldown_until = MAX(provider_usage.cooldown_until, excluded.cooldown_until)
+                    """, [(pid, today_date_str(), until) for pid, until in cooldowns.items()])
+                    conn.execute("COMMIT")
+                finally:
+                    conn.close()
+            except Exception:
+                logger.exception("Failed to persist provider usage state")
+                # keep the counts and cooldowns for the next flush instead of losing them
+                with self._lock:
+                    self._in_flight = {}
+                    for key, n in pending.items():
+                        self._pending[key] = self._pending.get(key, 0) + n
+                    for pid, until in cooldowns.items():
+                        self._pending_cooldowns[pid] = max(until, self._pending_cooldowns.get(pid, 0))
+                return
+            try:
+                self._refresh()
+            except Exception:
+                logger.exception("Failed to reload provider usage state")
+
+    def _flush_loop(self):
+        tick = min(self.flush_interval, self.read_ttl) if self.read_ttl > 0 else self.flush_interval
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._closed.is_set():
+            woken = self._wake.wait(tick)
+            self._wake.clear()
+            try:
+                if woken or time.monotonic() >= next_flush:
+                    self.flush()
+                    next_flush = time.monotonic() + self.flush_interval
+                else:
+                    self.refresh()
+            except Exception:
+                logger.exception("Provider usage background refresh failed")
+
+    def close(self):
+        self._closed.set()
+        self._wake.set()
+        self._flusher.join(timeout=5)
+        self.flush()
@@ -1,6 +1,6 @@
 # file_intake/models/file_intake_model.py
 import uuid
-from sqlalchemy import Column, String, Integer, Text, BigInteger, DateTime, JSON
+from sqlalchemy import Column, String, Integer, Text, BigInteger, Boolean, DateTime, JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 
@@ -21,6 +21,30 @@ class FileIntake(Base):
     status = Column(String, nullable=False, default="queued")
     error_message = Column(Text, nullable=True)
     profile_id = Column(String, nullable=True)
+    content_sha256 = Column(String, nullable=True, index=True)  # hex SHA-256 of the uploaded bytes
     metadata = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class IntakeStageEvent(Base):
+    """Append-only stage history: one row per status change, with that stage's metadata"""
+    __tablename__ = "file_intake_stage_events"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    qid = Column(String, nullable=False, index=True)
+    status = Column(String, nullable=False)
+    error_message = Column(Text, nullable=True)
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class IntakeContentIndex(Base):
+    """Dedupe index: SHA-256 of uploaded bytes -> the completed upload and its parsed profile"""
+    __tablename__ = "file_intake_content_index"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    content_sha256 = Column(String, nullable=False, index=True)
+    tenant = Column(String, nullable=True)
+    shared = Column(Boolean, nullable=False, default=True)  # False: only the same tenant may link to it
+    qid = Column(String, nullable=False)
+    parsed_ref = Column(String, nullable=False)  # artifact_store ref of the parsed profile
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
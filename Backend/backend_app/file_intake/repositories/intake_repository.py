@@ -1,6 +1,16 @@
 # file_intake/repositories/intake_repository.py
+#
+# Status changes are one UPDATE ... RETURNING (no SELECT before, no refresh after) plus an INSERT into
+# the append-only stage-event table, in one commit. Stage metadata goes to the event row instead of
+# being merged into (and rewriting) the FileIntake.metadata JSON; get_stage_metadata() folds it back.
+from collections import defaultdict
+from sqlalchemy import update, insert, bindparam, inspect
 from sqlalchemy.orm import Session
-from backend_app.file_intake.models.file_intake_model import FileIntake
+from sqlalchemy.orm.attributes import set_committed_value
+from backend_app.file_intake.models.file_intake_model import FileIntake, IntakeStageEvent, IntakeContentIndex
+
+# columns a status change may set besides status
+STATUS_FIELDS = ("storage_path", "sanitized_filename", "error_message", "content_sha256")
 
 class IntakeRepository:
     def __init__(self, db: Session):
@@ -16,24 +26,104 @@ class IntakeRepository:
         self.db.refresh(rec)
         return rec
 
-    def update_status(self, qid, status, storage_path=None, sanitized_filename=None, error_message=None, metadata=None):
-        rec = self.db.query(FileIntake).filter(FileIntake.qid==qid).first()
-        if not rec:
+    def update_status(self, qid, status, storage_path=None, sanitized_filename=None, error_message=None, metadata=None,
+                      content_sha256=None):
+        values = self._status_values(status, storage_path=storage_path, sanitized_filename=sanitized_filename,
+                                     error_message=error_message, content_sha256=content_sha256)
+        stmt = update(FileIntake).where(FileIntake.qid == qid).values(**values).returning(FileIntake)
+        rec = self.db.execute(stmt, execution_options={"synchronize_session": False}).scalars().first()
+        if rec is None:
+            self.db.rollback()
             return None
-        rec.status = status
-        if storage_path is not None:
-            rec.storage_path = storage_path
-        if sanitized_filename is not None:
-            rec.sanitized_filename = sanitized_filename
-        if error_message is not None:
-            rec.error_message = error_message
-        if metadata:
-            rec.metadata = {**(rec.metadata or {}), **metadata}
+        self.db.add(self._event(qid, status, error_message, metadata))
+        self._commit_keeping(rec)
+        return rec
+
+    def checkpoint(self, rec, status, storage_path=None, sanitized_filename=None, error_message=None, metadata=None,
+                   content_sha256=None):
+        """update_status on an already loaded record: no query, only the changed columns and the stage event are written"""
+        for field, value in self._status_values(status, storage_path=storage_path, sanitized_filename=sanitized_filename,
+                                                error_message=error_message, content_sha256=content_sha256).items():
+            setattr(rec, field, value)
         self.db.add(rec)
-        self.db.commit()
-        self.db.refresh(rec)
+        self.db.add(self._event(rec.qid, status, error_message, metadata))
+        self._commit_keeping(rec)
         return rec
 
+    def bulk_update_status(self, updates):
+        """
+        Many status changes in one transaction: one executemany UPDATE per set of columns touched and one
+        executemany INSERT of their stage events.
+        updates: dicts with qid, status and optionally storage_path / sanitized_filename / error_message /
+        content_sha256 / metadata
+        Returns the number of records updated.
+        """
+        table = FileIntake.__table__
+        groups = defaultdict(list)
+        for u in updates:
+            groups[tuple(f for f in STATUS_FIELDS if u.get(f) is not None)].append(u)
+        updated = 0
+        for fields, group in groups.items():
+            stmt = update(table).where(table.c.qid == bindparam("b_qid")).values(
+                status=bindparam("b_status"), **{f: bindparam(f"b_{f}") for f in fields})
+            rows = [{"b_qid": u["qid"], "b_status": u["status"], **{f"b_{f}": u[f] for f in fields}} for u in group]
+            updated += self.db.execute(stmt, rows).rowcount
+        if updates:
+            self.db.execute(insert(IntakeStageEvent.__table__), [
+                {"qid": u["qid"], "status": u["status"], "error_message": u.get("error_message"), "data": u.get("metadata") or None}
+                for u in updates
+            ])
+        self.db.commit()
+        return updated
+
+    def _commit_keeping(self, rec):
+        """Commit without expiring rec's loaded columns: they hold what was just written, so reloading them would only repeat it"""
+        loaded = {attr.key: rec.__dict__[attr.key] for attr in inspect(FileIntake).column_attrs if attr.key in rec.__dict__}
+        self.db.commit()
+        for key, value in loaded.items():
+            set_committed_value(rec, key, value)
+
+    @staticmethod
+    def _status_values(status, **fields):
+        return {"status": status, **{f: v for f, v in fields.items() if v is not None}}
+
+    @staticmethod
+    def _event(qid, status, error_message=None, metadata=None):
+        return IntakeStageEvent(qid=qid, status=status, error_message=error_message, data=metadata or None)
+
+    def add_stage_event(self, qid, status, data=None, error_message=None):
+        self.db.add(self._event(qid, status, error_message, data))
+        self.db.commit()
+
+    def get_stage_events(self, qid):
+        return self.db.query(IntakeStageEvent).filter(IntakeStageEvent.qid == qid).order_by(IntakeStageEvent.id).all()
+
+    def get_stage_metadata(self, qid):
+        """The record's metadata with every stage event's data merged over it, oldest first"""
+        rec = self.get_by_qid(qid)
+        merged = dict((rec.metadata or {}) if rec else {})
+        for event in self.get_stage_events(qid):
+            merged.update(event.data or {})
+        return merged
+
+    def add_content_index(self, content_sha256, qid, parsed_ref, tenant=None, shared=True):
+        """Stage a dedupe index entry; it is written by the next commit (finalize's checkpoint)"""
+        self.db.add(IntakeContentIndex(content_sha256=content_sha256, qid=qid, parsed_ref=parsed_ref,
+                                       tenant=tenant, shared=shared))
+
+    def find_content(self, content_sha256, tenant=None):
+        """Latest completed upload with these bytes: the tenant's own, or with tenant=None any shared one"""
+        q = self.db.query(IntakeContentIndex).filter(IntakeContentIndex.content_sha256 == content_sha256)
+        if tenant is not None:
+            q = q.filter(IntakeContentIndex.tenant == tenant)
+        else:
+            q = q.filter(IntakeContentIndex.shared.is_(True))
+        entry = q.order_by(IntakeContentIndex.id.desc()).first()
+        if entry is not None:
+            # index entries never change: detach so the caller's next commit does not expire (and reload) it
+            self.db.expunge(entry)
+        return entry
+
     def get_by_qid(self, qid):
         return self.db.query(FileIntake).filter(FileIntake.qid==qid).first()
     
@@ -46,7 +136,12 @@ class IntakeRepository:
     
     def get_processing_history(self, qid):
         rec = self.get_by_qid(qid)
-        return rec.metadata.get('processing_history', []) if rec else []
+        if not rec:
+            return []
+        history = list((rec.metadata or {}).get('processing_history', []))
+        history.extend({"status": e.status, "error_message": e.error_message, "timestamp": e.created_at}
+                       for e in self.get_stage_events(qid))
+        return history
     
     def update_archive_metadata(self, qid, archive_metadata):
         rec = self.get_by_qid(qid)
@@ -6,10 +6,25 @@ from backend_app.file_intake.utils.qid_generator import generate_qid
 from backend_app.file_intake.repositories.intake_repository import IntakeRepository
 from backend_app.file_intake.services.storage_service import generate_presigned_url
 from backend_app.file_intake.services.event_publisher import publish
+from backend_app.file_intake.services.dedupe_service import (
+    tenant_of, bytes_sha256, stored_sha256, admit_upload,
+)
 from pathlib import Path
 
 router = APIRouter(prefix="/intake", tags=["intake"])
 
+def pipeline_payload(rec) -> dict:
+    # source and tenant pick the queue lane and fair-share priority (workers/routing.py)
+    return {"qid": rec.qid, "source": rec.source, "tenant": tenant_of(rec)}
+
+def quarantine_or_link(repo: IntakeRepository, rec, storage_path: str, content_sha256: str = None) -> dict:
+    # bytes identical to a completed upload: reuse its parsed profile instead of running the pipeline
+    original = admit_upload(repo, rec, storage_path, content_sha256)
+    if original is not None:
+        return {"ok": True, "qid": rec.qid, "duplicate_of": original.qid}
+    publish("virus_scan_requested", pipeline_payload(rec))
+    return {"ok": True, "qid": rec.qid}
+
 @router.post("/initiate-upload")
 def initiate_upload(payload: dict, db: Session = Depends(get_db), user=Depends(lambda: None)):
     filename = payload.get("filename")
@@ -28,11 +43,10 @@ def complete_upload(payload: dict, db: Session = Depends(get_db)):
     qid = payload.get("qid")
     storage_path = payload.get("storage_path")
     repo = IntakeRepository(db)
-    rec = repo.update_status(qid, "quarantined", storage_path=storage_path)
+    rec = repo.get_by_qid(qid)
     if not rec:
         raise HTTPException(status_code=404, detail="QID not found")
-    publish("virus_scan_requested", {"qid": qid})
-    return {"ok": True, "qid": qid}
+    return quarantine_or_link(repo, rec, storage_path, stored_sha256(storage_path))
 
 # Optional local server-endpoint for direct upload to server (if USE_S3 = false)
 @router.post("/upload-to-server")
@@ -42,9 +56,12 @@ def upload_to_server(file: UploadFile = File(...), qid: str = None, db: Session
     dest_dir = Path("/data/quarantine") / qid
     dest_dir.mkdir(parents=True, exist_ok=True)
     dest = dest_dir / file.filename
+    data = file.file.read()
     with dest.open("wb") as f:
-        f.write(file.file.read())
+        f.write(data)
     repo = IntakeRepository(db)
-    repo.update_status(qid, "quarantined", storage_path=str(dest))
-    publish("virus_scan_requested", {"qid": qid})
-    return {"ok": True, "qid": qid}
\ No newline at end of file
+    rec = repo.get_by_qid(qid)
+    if not rec:
+        publish("virus_scan_requested", {"qid": qid})
+        return {"ok": True, "qid": qid}
+    return quarantine_or_link(repo, rec, str(dest), bytes_sha256(data))
\ No newline at end of file
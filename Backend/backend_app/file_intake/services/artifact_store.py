@@ -0,0 +1,103 @@
+# file_intake/services/artifact_store.py
+#
+# Content-addressed blob store for intermediate pipeline artifacts (extracted text, parsed profile).
+# Task payloads and FileIntake.metadata carry only the returned ref, so broker messages stay the
+# same size however large the resume is. Artifacts are JSON, gzip-compressed, keyed by the SHA-256
+# of the JSON and stored next to the uploads (storage_service: S3 when USE_S3, else DATA_ROOT).
+import os
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from backend_app.file_intake.services import storage_service
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_PREFIX = "artifacts"
+REF_SCHEME = "sha256:"
+COMPRESS_LEVEL = int(os.getenv("INTAKE_ARTIFACT_COMPRESS_LEVEL", "6"))
+# artifacts are immutable, so recently used ones are kept (uncompressed JSON) in memory: the fused
+# pipeline reads back what the previous stage just wrote without a disk/S3 round trip
+MEMORY_CACHE_ITEMS = int(os.getenv("INTAKE_ARTIFACT_CACHE_ITEMS", "64"))
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def _remember(ref: str, raw: bytes):
+    if MEMORY_CACHE_ITEMS <= 0:
+        return
+    with _memory_lock:
+        _memory[ref] = raw
+        _memory.move_to_end(ref)
+        while len(_memory) > MEMORY_CACHE_ITEMS:
+            _memory.popitem(last=False)
+
+
+def _key(digest: str) -> str:
+    return f"{ARTIFACT_PREFIX}/{digest[:2]}/{digest}.json.gz"
+
+
+def _digest(ref: str) -> str:
+    if not ref or not ref.startswith(REF_SCHEME):
+        raise ValueError(f"Not an artifact ref: {ref!r}")
+    return ref[len(REF_SCHEME):]
+
+
+def _exists(key: str) -> bool:
+    if storage_service.USE_S3:
+        try:
+            storage_service.s3.head_object(Bucket=storage_service.S3_BUCKET, Key=key)
+            return True
+        except Exception:
+            return False
+    return (storage_service.DATA_ROOT / key).exists()
+
+
+def _write(key: str, blob: bytes):
+    if storage_service.USE_S3:
+        storage_service.s3.put_object(Bucket=storage_service.S3_BUCKET, Key=key, Body=blob,
+                                      ContentType="application/json", ContentEncoding="gzip")
+        return
+    path = storage_service.DATA_ROOT / key
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(blob)
+    os.replace(tmp, path)
+
+
+def _read(key: str) -> bytes:
+    if storage_service.USE_S3:
+        return storage_service.s3.get_object(Bucket=storage_service.S3_BUCKET, Key=key)["Body"].read()
+    return (storage_service.DATA_ROOT / key).read_bytes()
+
+
+def put_artifact(value: Any) -> str:
+    """Store a JSON-serializable value; returns its ref ("sha256:<hex>"). Identical values are stored once."""
+    raw = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+    ref = REF_SCHEME + digest
+    key = _key(digest)
+    if not _exists(key):
+        # mtime=0: the same content always compresses to the same bytes
+        _write(key, gzip.compress(raw, compresslevel=COMPRESS_LEVEL, mtime=0))
+        logger.debug(f"Stored artifact {ref} ({len(raw)} bytes raw)")
+    _remember(ref, raw)
+    return ref
+
+
+def get_artifact(ref: str) -> Any:
+    """Value stored under ref. Raises FileNotFoundError (local) / the S3 client error if missing."""
+    with _memory_lock:
+        raw = _memory.get(ref)
+        if raw is not None:
+            _memory.move_to_end(ref)
+    if raw is None:
+        raw = gzip.decompress(_read(_key(_digest(ref))))
+        _remember(ref, raw)
+    # decoded per call: callers get their own copy to mutate
+    return json.loads(raw.decode("utf-8"))
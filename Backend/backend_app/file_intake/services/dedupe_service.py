@@ -0,0 +1,142 @@
+# file_intake/services/dedupe_service.py
+#
+# Intake-time dedupe: uploads whose bytes (SHA-256) match an upload that already completed are
+# linked to that upload's parsed profile and never reach virus scan, extraction or LLM parsing.
+# finalize writes the index (IntakeContentIndex); complete-upload consults it when the upload's hash
+# is cheap to have (local files, S3 objects with a verified checksum), otherwise the virus_scan stage
+# hashes the stored bytes and consults it there.
+# Hashes are always computed server-side (or verified by S3): a client-supplied hash would let anyone
+# claim another document's parsed profile.
+#
+# Policy per tenant (tenant = user_id, else session id):
+#   global - match (and be matched by) uploads from any tenant using global
+#   tenant - match and be matched only by the tenant's own uploads (default)
+#   off    - never short-circuit and never index
+import os
+import base64
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional
+
+from backend_app.file_intake.services import storage_service
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_BYTES = 1024 * 1024
+POLICIES = ("global", "tenant", "off")
+DEDUPE_POLICY = os.getenv("INTAKE_DEDUPE_POLICY", "tenant")
+# per-tenant overrides: "agency-1=tenant,agency-2=off"
+TENANT_POLICIES = {
+    tenant.strip(): policy.strip()
+    for tenant, _, policy in (item.partition("=") for item in os.getenv("INTAKE_DEDUPE_TENANT_POLICIES", "").split(","))
+    if policy
+}
+
+
+def tenant_of(rec) -> Optional[str]:
+    return rec.user_id or rec.sid
+
+
+def policy_for(tenant: Optional[str]) -> str:
+    policy = TENANT_POLICIES.get(tenant or "", DEDUPE_POLICY)
+    if policy not in POLICIES:
+        logger.warning(f"Unknown intake dedupe policy {policy!r}; using 'off'")
+        return "off"
+    return policy
+
+
+def bytes_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hash_chunks(chunks) -> str:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stored_sha256(storage_path: Optional[str], download: bool = False) -> Optional[str]:
+    """
+    SHA-256 of an uploaded file, or None when it cannot be had: local files are hashed; S3 objects
+    report the checksum S3 verified on upload (x-amz-checksum-sha256) when the client sent one, and
+    are otherwise read and hashed only with download=True (pipeline workers, not API requests).
+    """
+    if not storage_path:
+        return None
+    try:
+        if storage_path.startswith("s3://"):
+            bucket, key = storage_path[len("s3://"):].split("/", 1)
+            head = storage_service.s3.head_object(Bucket=bucket, Key=key, ChecksumMode="ENABLED")
+            checksum = head.get("ChecksumSHA256")
+            # multipart uploads report a checksum of part checksums ("<b64>-<parts>"), not of the file
+            if checksum and "-" not in checksum:
+                return base64.b64decode(checksum).hex()
+            if not download:
+                return None
+            body = storage_service.s3.get_object(Bucket=bucket, Key=key)["Body"]
+            return _hash_chunks(body.iter_chunks(HASH_CHUNK_BYTES))
+        path = Path(storage_path)
+        if path.is_file():
+            with path.open("rb") as f:
+                return _hash_chunks(iter(lambda: f.read(HASH_CHUNK_BYTES), b""))
+    except Exception as e:
+        logger.warning(f"Could not hash {storage_path} for dedupe: {e}")
+    return None
+
+
+def find_duplicate(repo, rec, content_sha256: Optional[str]):
+    """The IntakeContentIndex entry rec's content may link to under its tenant's policy, or None"""
+    if not content_sha256:
+        return None
+    tenant = tenant_of(rec)
+    policy = policy_for(tenant)
+    if policy == "off":
+        return None
+    match = repo.find_content(content_sha256, tenant=tenant if policy == "tenant" else None)
+    if match is not None and match.qid == rec.qid:
+        return None
+    return match
+
+
+def index_result(repo, rec, parsed_ref: Optional[str]):
+    """Make a finished upload linkable; staged for the caller's next commit"""
+    tenant = tenant_of(rec)
+    policy = policy_for(tenant)
+    if rec.content_sha256 and parsed_ref and policy != "off":
+        repo.add_content_index(rec.content_sha256, rec.qid, parsed_ref, tenant=tenant, shared=policy == "global")
+
+
+def link_duplicate(repo, rec, original, storage_path: Optional[str] = None):
+    """Complete rec from the original upload's result: one status write, no pipeline"""
+    logger.info(f"Intake {rec.qid} duplicates {original.qid}; linking its parsed profile")
+    return repo.checkpoint(rec, "completed", storage_path=storage_path, content_sha256=original.content_sha256,
+                           metadata={"duplicate_of": original.qid, "parsed_ref": original.parsed_ref})
+
+
+def admit_upload(repo, rec, storage_path: Optional[str], content_sha256: Optional[str] = None):
+    """
+    Record a finished upload: linked to the completed upload with the same bytes, or quarantined for
+    the pipeline. Returns the IntakeContentIndex entry it was linked to, None when the pipeline must run.
+    """
+    original = find_duplicate(repo, rec, content_sha256)
+    if original is not None:
+        link_duplicate(repo, rec, original, storage_path=storage_path)
+        return original
+    repo.checkpoint(rec, "quarantined", storage_path=storage_path, content_sha256=content_sha256)
+    return None
+
+
+def hash_and_link(repo, rec):
+    """
+    Pipeline-side dedupe for an upload admitted without a hash (an S3 object without a verified
+    checksum): hash the stored bytes and link rec to a completed duplicate.
+    Returns (content_sha256, linked IntakeContentIndex entry or None); the caller stores the hash
+    with its next checkpoint.
+    """
+    content_sha256 = stored_sha256(rec.storage_path, download=True)
+    original = find_duplicate(repo, rec, content_sha256)
+    if original is not None:
+        link_duplicate(repo, rec, original)
+    return content_sha256, original
@@ -1,8 +1,21 @@
 # file_intake/services/event_publisher.py
+import os
 from backend_app.file_intake.workers.celery_app import celery_app
+from backend_app.file_intake.workers.routing import lane_for
+
+# run a new upload's stages in one task (intake_pipeline_task); false = one task per stage
+FUSED_PIPELINE = os.getenv("INTAKE_FUSED_PIPELINE", "true").lower() in ("1", "true", "yes")
+# lanes that use the fused task; bulk imports go stage by stage so the OCR and parse pools scale separately
+FUSED_LANES = {l.strip() for l in os.getenv("INTAKE_FUSED_LANES", "interactive,email").split(",") if l.strip()}
+
+def _fused(payload: dict) -> bool:
+    return FUSED_PIPELINE and "pipeline" not in payload and lane_for(payload) in FUSED_LANES
 
 def publish(event_name: str, payload: dict):
-    if event_name == "virus_scan_requested":
+    # payload: qid, plus source and tenant for queue routing (workers/routing.py)
+    if event_name == "pipeline_requested" or (event_name == "virus_scan_requested" and _fused(payload)):
+        celery_app.send_task("file_intake.tasks.intake_pipeline_task", args=[payload])
+    elif event_name == "virus_scan_requested":
         celery_app.send_task("file_intake.tasks.virus_scan_task", args=[payload])
     elif event_name == "sanitize_requested":
         celery_app.send_task("file_intake.tasks.sanitize_task", args=[payload])
@@ -0,0 +1,86 @@
+"""
+Test suite for the intermediate artifact store.
+"""
+
+import gzip
+import json
+import pytest
+from unittest.mock import Mock, patch
+
+from backend_app.file_intake.services import artifact_store, storage_service
+
+
+@pytest.fixture
+def local_store(tmp_path):
+    """Local-disk backend rooted at tmp_path with an empty memory cache."""
+    with patch.object(storage_service, "USE_S3", False), \
+            patch.object(storage_service, "DATA_ROOT", tmp_path), \
+            patch.object(artifact_store, "_memory", artifact_store.OrderedDict()):
+        yield tmp_path
+
+
+class TestArtifactStore:
+    """Test cases for put_artifact / get_artifact."""
+
+    def test_round_trip_text_and_profile(self, local_store):
+        """Text and parsed profiles come back unchanged."""
+        text_ref = artifact_store.put_artifact("Python developer — 5 years")
+        profile_ref = artifact_store.put_artifact({"name": "Jane", "skills": ["python", "sql"]})
+
+        artifact_store._memory.clear()
+
+        assert artifact_store.get_artifact(text_ref) == "Python developer — 5 years"
+        assert artifact_store.get_artifact(profile_ref) == {"name": "Jane", "skills": ["python", "sql"]}
+
+    def test_content_addressed_and_compressed(self, local_store):
+        """Identical content is stored once, gzip-compressed, under its SHA-256."""
+        text = "experience " * 20000
+
+        ref = artifact_store.put_artifact(text)
+        assert artifact_store.put_artifact(text) == ref
+
+        files = list((local_store / "artifacts").rglob("*.json.gz"))
+        assert len(files) == 1
+        assert files[0].name == f"{ref.split(':', 1)[1]}.json.gz"
+        assert files[0].stat().st_size < len(text) / 10
+        assert json.loads(gzip.decompress(files[0].read_bytes())) == text
+
+    def test_existing_artifact_is_not_rewritten(self, local_store):
+        """A second put of the same content skips the write."""
+        artifact_store.put_artifact({"a": 1})
+
+        with patch.object(artifact_store, "_write") as write:
+            artifact_store.put_artifact({"a": 1})
+
+        write.assert_not_called()
+
+    def test_memory_cache_returns_copies(self, local_store):
+        """Cached artifacts are decoded per call, so callers cannot alter the cache."""
+        ref = artifact_store.put_artifact({"skills": ["python"]})
+
+        first = artifact_store.get_artifact(ref)
+        first["skills"].append("mutated")
+
+        assert artifact_store.get_artifact(ref) == {"skills": ["python"]}
+
+    def test_missing_and_invalid_refs(self, local_store):
+        """Unknown refs raise instead of returning empty content."""
+        with pytest.raises(FileNotFoundError):
+            artifact_store.get_artifact("sha256:" + "0" * 64)
+        with pytest.raises(ValueError):
+            artifact_store.get_artifact("not-a-ref")
+
+    def test_s3_backend(self):
+        """With USE_S3 the artifact goes to the intake bucket under artifacts/."""
+        s3 = Mock()
+        s3.head_object.side_effect = Exception("404")
+
+        with patch.object(storage_service, "USE_S3", True), \
+                patch.object(storage_service, "s3", s3, create=True), \
+                patch.object(artifact_store, "_memory", artifact_store.OrderedDict()):
+            ref = artifact_store.put_artifact("resume text")
+
+        kwargs = s3.put_object.call_args.kwargs
+        assert kwargs["Bucket"] == storage_service.S3_BUCKET
+        assert kwargs["Key"] == f"artifacts/{ref[7:9]}/{ref[7:]}.json.gz"
+        assert json.loads(gzip.decompress(kwargs["Body"])) == "resume text"
@@ -0,0 +1,188 @@
+"""
+Test suite for intake-time duplicate detection.
+"""
+
+import base64
+import hashlib
+import pytest
+from unittest.mock import Mock, patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend_app.file_intake.models.file_intake_model import Base
+from backend_app.file_intake.repositories.intake_repository import IntakeRepository
+from backend_app.file_intake.services import dedupe_service, storage_service
+
+
+CV = b"%PDF-1.4 Jane Doe - Python developer"
+CV_SHA = hashlib.sha256(CV).hexdigest()
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def repo(engine):
+    db = sessionmaker(bind=engine)()
+    yield IntakeRepository(db)
+    db.close()
+
+
+def completed(repo, qid, user_id, parsed_ref="sha256:parsed"):
+    """An upload that went through the pipeline and was indexed by finalize."""
+    rec = repo.create_record(qid=qid, source="web", original_filename="cv.pdf", user_id=user_id)
+    repo.checkpoint(rec, "quarantined", content_sha256=CV_SHA)
+    dedupe_service.index_result(repo, rec, parsed_ref)
+    repo.checkpoint(rec, "completed")
+    return rec
+
+
+class TestAdmitUpload:
+    """Test cases for admit_upload."""
+
+    def test_duplicate_links_to_completed_result(self, repo, engine):
+        """Identical bytes from another channel complete at once, without the pipeline."""
+        completed(repo, "Q1", "u1")
+        rec = repo.create_record(qid="Q2", source="email", original_filename="resume.pdf", user_id="u1")
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql.split()[0].upper()))
+
+        original = dedupe_service.admit_upload(repo, rec, "/data/quarantine/Q2/resume.pdf", CV_SHA)
+
+        assert original.qid == "Q1"
+        assert statements.count("SELECT") == 1  # the index lookup
+        assert repo.get_by_qid("Q2").status == "completed"
+        assert repo.get_stage_metadata("Q2") == {"duplicate_of": "Q1", "parsed_ref": "sha256:parsed"}
+
+    def test_new_content_is_quarantined(self, repo):
+        """Unseen bytes are quarantined with their hash, for the pipeline."""
+        rec = repo.create_record(qid="Q1", source="web", original_filename="cv.pdf", user_id="u1")
+
+        assert dedupe_service.admit_upload(repo, rec, "/data/quarantine/Q1/cv.pdf", CV_SHA) is None
+        assert (rec.status, rec.storage_path, rec.content_sha256) == ("quarantined", "/data/quarantine/Q1/cv.pdf", CV_SHA)
+
+    def test_in_flight_upload_is_not_a_duplicate(self, repo):
+        """Only completed uploads are indexed; a second copy of an unfinished one runs normally."""
+        first = repo.create_record(qid="Q1", source="web", original_filename="cv.pdf", user_id="u1")
+        dedupe_service.admit_upload(repo, first, "/q/Q1/cv.pdf", CV_SHA)
+        second = repo.create_record(qid="Q2", source="web", original_filename="cv.pdf", user_id="u1")
+
+        assert dedupe_service.admit_upload(repo, second, "/q/Q2/cv.pdf", CV_SHA) is None
+
+    def test_unhashed_upload_is_quarantined(self, repo):
+        completed(repo, "Q1", "u1")
+        rec = repo.create_record(qid="Q2", source="web", original_filename="cv.pdf", user_id="u1")
+
+        assert dedupe_service.admit_upload(repo, rec, "s3://bucket/quarantine/Q2/cv.pdf", None) is None
+        assert rec.status == "quarantined"
+
+
+class TestTenantPolicy:
+    """Test cases for the per-tenant dedupe policy."""
+
+    def test_default_matches_own_uploads_only(self, repo):
+        completed(repo, "Q1", "agency-1")
+        own = repo.create_record(qid="Q2", source="web", original_filename="cv.pdf", user_id="agency-1")
+        other = repo.create_record(qid="Q3", source="web", original_filename="cv.pdf", user_id="agency-2")
+
+        assert dedupe_service.find_duplicate(repo, own, CV_SHA).qid == "Q1"
+        assert dedupe_service.find_duplicate(repo, other, CV_SHA) is None
+
+    def test_global_matches_other_tenants(self, repo):
+        with patch.object(dedupe_service, "DEDUPE_POLICY", "global"):
+            completed(repo, "Q1", "agency-1")
+            rec = repo.create_record(qid="Q2", source="web", original_filename="cv.pdf", user_id="agency-2")
+
+            assert dedupe_service.find_duplicate(repo, rec, CV_SHA).qid == "Q1"
+
+    def test_tenant_policy_matches_own_uploads_only(self, repo):
+        """A tenant-scoped tenant neither links to nor is linked from other tenants."""
+        with patch.object(dedupe_service, "DEDUPE_POLICY", "global"), \
+                patch.object(dedupe_service, "TENANT_POLICIES", {"agency-1": "tenant"}):
+            completed(repo, "Q1", "agency-1")
+            completed(repo, "Q2", "agency-2", parsed_ref="sha256:other")
+            own = repo.create_record(qid="Q3", source="api", original_filename="cv.pdf", user_id="agency-1")
+            other = repo.create_record(qid="Q4", source="api", original_filename="cv.pdf", user_id="agency-3")
+
+            assert dedupe_service.find_duplicate(repo, own, CV_SHA).qid == "Q1"
+            assert dedupe_service.find_duplicate(repo, other, CV_SHA).qid == "Q2"
+
+    def test_off_policy(self, repo):
+        """An opted-out tenant is never short-circuited and never indexed."""
+        with patch.object(dedupe_service, "DEDUPE_POLICY", "global"), \
+                patch.object(dedupe_service, "TENANT_POLICIES", {"agency-1": "off"}):
+            completed(repo, "Q1", "agency-1")
+            rec = repo.create_record(qid="Q2", source="web", original_filename="cv.pdf", user_id="agency-2")
+            assert dedupe_service.find_duplicate(repo, rec, CV_SHA) is None
+
+            completed(repo, "Q3", "agency-2")
+            again = repo.create_record(qid="Q4", source="web", original_filename="cv.pdf", user_id="agency-1")
+            assert dedupe_service.find_duplicate(repo, again, CV_SHA) is None
+
+    def test_unknown_policy_disables_dedupe(self):
+        with patch.object(dedupe_service, "DEDUPE_POLICY", "sometimes"):
+            assert dedupe_service.policy_for("u1") == "off"
+
+
+class TestStoredSha256:
+    """Test cases for hashing uploaded files server-side."""
+
+    def test_local_file(self, tmp_path):
+        path = tmp_path / "cv.pdf"
+        path.write_bytes(CV)
+
+        assert dedupe_service.stored_sha256(str(path)) == CV_SHA
+        assert dedupe_service.stored_sha256(str(tmp_path / "missing.pdf")) is None
+        assert dedupe_service.stored_sha256(None) is None
+
+    def test_s3_verified_checksum(self):
+        """S3 objects use the SHA-256 S3 verified on upload; multipart composites are ignored."""
+        s3 = Mock()
+        s3.head_object.return_value = {"ChecksumSHA256": base64.b64encode(hashlib.sha256(CV).digest()).decode()}
+
+        with patch.object(storage_service, "s3", s3, create=True):
+            assert dedupe_service.stored_sha256("s3://bucket/quarantine/Q1/cv.pdf") == CV_SHA
+            s3.head_object.assert_called_once_with(Bucket="bucket", Key="quarantine/Q1/cv.pdf", ChecksumMode="ENABLED")
+
+            s3.head_object.return_value = {"ChecksumSHA256": "abc=-3"}
+            assert dedupe_service.stored_sha256("s3://bucket/quarantine/Q1/cv.pdf") is None
+            s3.get_object.assert_not_called()
+
+    def test_s3_without_checksum_is_read_only_on_download(self):
+        """Presigned uploads without a client checksum are hashed from the object by the pipeline."""
+        s3 = Mock()
+        s3.head_object.return_value = {}
+        s3.get_object.return_value = {"Body": Mock(iter_chunks=Mock(return_value=iter([CV[:10], CV[10:]])))}
+
+        with patch.object(storage_service, "s3", s3, create=True):
+            assert dedupe_service.stored_sha256("s3://bucket/quarantine/Q1/cv.pdf") is None
+            s3.get_object.assert_not_called()
+            assert dedupe_service.stored_sha256("s3://bucket/quarantine/Q1/cv.pdf", download=True) == CV_SHA
+            s3.get_object.assert_called_once_with(Bucket="bucket", Key="quarantine/Q1/cv.pdf")
+
+
+class TestHashAndLink:
+    """Test cases for pipeline-side dedupe of uploads admitted without a hash."""
+
+    def test_links_duplicate(self, repo):
+        completed(repo, "Q1", "u1")
+        rec = repo.create_record(qid="Q2", source="web", original_filename="cv.pdf", user_id="u1")
+        dedupe_service.admit_upload(repo, rec, "s3://bucket/quarantine/Q2/cv.pdf", None)
+
+        with patch.object(dedupe_service, "stored_sha256", return_value=CV_SHA) as stored:
+            content_sha256, original = dedupe_service.hash_and_link(repo, rec)
+
+        stored.assert_called_once_with("s3://bucket/quarantine/Q2/cv.pdf", download=True)
+        assert (content_sha256, original.qid) == (CV_SHA, "Q1")
+        assert repo.get_by_qid("Q2").status == "completed"
+
+    def test_new_content_returns_hash(self, repo):
+        rec = repo.create_record(qid="Q1", source="web", original_filename="cv.pdf", user_id="u1")
+
+        with patch.object(dedupe_service, "stored_sha256", return_value=CV_SHA):
+            assert dedupe_service.hash_and_link(repo, rec) == (CV_SHA, None)
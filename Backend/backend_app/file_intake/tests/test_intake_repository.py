@@ -0,0 +1,106 @@
+"""
+Test suite for IntakeRepository status writes.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend_app.file_intake.models.file_intake_model import Base, FileIntake, IntakeStageEvent
+from backend_app.file_intake.repositories.intake_repository import IntakeRepository
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def statements(engine):
+    """SQL statements sent to the database, in order."""
+    seen = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: seen.append(sql.split()[0].upper()))
+    return seen
+
+
+@pytest.fixture
+def repo(engine):
+    db = sessionmaker(bind=engine)()
+    yield IntakeRepository(db)
+    db.close()
+
+
+class TestStatusWrites:
+    """Test cases for update_status / checkpoint / bulk_update_status."""
+
+    def test_update_status_is_one_update_returning(self, repo, statements):
+        """No SELECT before the UPDATE and no refresh after it."""
+        repo.create_record(qid="Q1", source="web", original_filename="cv.pdf")
+        statements.clear()
+
+        rec = repo.update_status("Q1", "quarantined", storage_path="/data/quarantine/Q1/cv.pdf")
+
+        assert rec.qid == "Q1"
+        assert "SELECT" not in statements
+        assert statements.count("UPDATE") == 1
+        assert statements.count("INSERT") == 1
+        assert repo.get_by_qid("Q1").storage_path == "/data/quarantine/Q1/cv.pdf"
+
+    def test_update_status_unknown_qid(self, repo):
+        """Unknown QIDs return None and record no event."""
+        assert repo.update_status("missing", "failed") is None
+        assert repo.get_stage_events("missing") == []
+
+    def test_metadata_goes_to_stage_events(self, repo):
+        """Stage metadata is appended as events, not merged into the record's JSON column."""
+        repo.create_record(qid="Q1", source="web", original_filename="cv.pdf", metadata={"channel": "upload"})
+
+        repo.update_status("Q1", "extracted", metadata={"extracted_text_ref": "sha256:ab", "extract_score": 90.0})
+        repo.update_status("Q1", "parsed", metadata={"parsed_ref": "sha256:cd"})
+
+        events = repo.get_stage_events("Q1")
+        assert [e.status for e in events] == ["extracted", "parsed"]
+        assert repo.get_stage_metadata("Q1") == {
+            "channel": "upload", "extracted_text_ref": "sha256:ab", "extract_score": 90.0, "parsed_ref": "sha256:cd",
+        }
+        assert [h["status"] for h in repo.get_processing_history("Q1")] == ["extracted", "parsed"]
+
+    def test_checkpoint_writes_without_querying(self, repo, statements):
+        """checkpoint() on a loaded record writes the status and the event only."""
+        repo.create_record(qid="Q1", source="web", original_filename="cv.pdf")
+        rec = repo.get_by_qid("Q1")
+        statements.clear()
+
+        repo.checkpoint(rec, "failed", error_message="extraction_failed", metadata={"extract_module": "pypdf2"})
+
+        assert (rec.status, rec.storage_path, rec.source) == ("failed", None, "web")  # still loaded after the commit
+        assert statements.count("SELECT") == 0
+        assert statements.count("UPDATE") == 1
+        assert statements.count("INSERT") == 1
+        event_row = repo.get_stage_events("Q1")[-1]
+        assert (event_row.status, event_row.error_message, event_row.data) == ("failed", "extraction_failed", {"extract_module": "pypdf2"})
+
+    def test_bulk_update_status(self, repo, statements):
+        """Many status changes share executemany statements and one commit."""
+        for i in range(5):
+            repo.create_record(qid=f"Q{i}", source="api", original_filename=f"cv{i}.pdf")
+        statements.clear()
+
+        updated = repo.bulk_update_status(
+            [{"qid": f"Q{i}", "status": "clean"} for i in range(4)] +
+            [{"qid": "Q4", "status": "infected", "error_message": "EICAR"},
+             {"qid": "missing", "status": "clean"}]
+        )
+
+        assert updated == 5
+        assert statements.count("UPDATE") == 2  # one per set of columns touched
+        assert statements.count("INSERT") == 1
+        assert [repo.get_by_qid(f"Q{i}").status for i in range(5)] == ["clean"] * 4 + ["infected"]
+        assert repo.get_by_qid("Q4").error_message == "EICAR"
+        assert repo.db.query(IntakeStageEvent).count() == 6
+
+    def test_bulk_update_status_empty(self, repo):
+        assert repo.bulk_update_status([]) == 0
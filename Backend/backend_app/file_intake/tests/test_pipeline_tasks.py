@@ -0,0 +1,221 @@
+"""
+Test suite for the fused intake pipeline task.
+"""
+
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from backend_app.file_intake.workers import tasks
+
+
+TASKS = "backend_app.file_intake.workers.tasks"
+
+
+class FakeRepository:
+    """IntakeRepository stand-in recording loads and checkpoints."""
+
+    content_sha256 = "ab" * 32  # None: admitted without a hash
+
+    def __init__(self, db):
+        self.db = db
+        self.loads = 0
+        self.checkpoints = []
+        self.indexed = []
+        self.record = SimpleNamespace(qid="Q1", storage_path="/data/quarantine/Q1/cv.pdf", status="quarantined",
+                                      user_id="u1", sid="S1", content_sha256=self.content_sha256)
+
+    def get_by_qid(self, qid):
+        self.loads += 1
+        return self.record
+
+    def checkpoint(self, rec, status, storage_path=None, error_message=None, metadata=None, content_sha256=None, **kwargs):
+        rec.status = status
+        if storage_path is not None:
+            rec.storage_path = storage_path
+        if content_sha256 is not None:
+            rec.content_sha256 = content_sha256
+        self.checkpoints.append((status, metadata))
+        return rec
+
+    def add_content_index(self, content_sha256, qid, parsed_ref, tenant=None, shared=True):
+        self.indexed.append((content_sha256, qid, parsed_ref, tenant))
+
+
+@pytest.fixture
+def pipeline():
+    """Stage services, session and repository patched; yields the mocks."""
+    repos = []
+    artifacts = {}
+
+    def put_artifact(value):
+        ref = f"sha256:{len(artifacts)}"
+        artifacts[ref] = json.loads(json.dumps(value))
+        return ref
+
+    def make_repo(db):
+        repos.append(FakeRepository(db))
+        return repos[-1]
+
+    with patch(f"{TASKS}.SessionLocal") as session_local, \
+            patch(f"{TASKS}.IntakeRepository", side_effect=make_repo), \
+            patch(f"{TASKS}.scan_file", return_value={"clean": True, "virus_name": None}) as scan, \
+            patch(f"{TASKS}.sanitize_and_normalize", side_effect=lambda path: path) as sanitize, \
+            patch(f"{TASKS}.extract_text_for_qid", return_value={"success": True, "text": "Python developer", "module": "pypdf2", "score": 90.0}) as extract, \
+            patch(f"{TASKS}.parse_text_to_profile", return_value={"name": "Jane", "skills": ["python"]}) as parse, \
+            patch(f"{TASKS}.put_artifact", side_effect=put_artifact), \
+            patch(f"{TASKS}.get_artifact", side_effect=lambda ref: artifacts[ref]), \
+            patch(f"{TASKS}.publish") as publish:
+        yield SimpleNamespace(session_local=session_local, repos=repos, scan=scan, sanitize=sanitize,
+                              extract=extract, parse=parse, publish=publish, artifacts=artifacts,
+                              put_artifact=put_artifact)
+
+
+class TestFusedPipeline:
+    """Test cases for intake_pipeline_task."""
+
+    def test_runs_all_stages_with_one_session_and_one_load(self, pipeline):
+        """All five stages run in one task without broker hops."""
+        tasks.intake_pipeline_task({"qid": "Q1"})
+
+        assert pipeline.session_local.call_count == 1
+        assert len(pipeline.repos) == 1
+        repo = pipeline.repos[0]
+        assert repo.loads == 1
+        assert [status for status, _ in repo.checkpoints] == ["clean", "sanitized", "extracted", "parsed", "completed"]
+        pipeline.publish.assert_not_called()
+        pipeline.parse.assert_called_once_with("Python developer", tag="resume")
+        pipeline.session_local.return_value.close.assert_called_once()
+
+        extracted_meta = repo.checkpoints[2][1]
+        assert "extracted_text" not in extracted_meta
+        assert pipeline.artifacts[extracted_meta["extracted_text_ref"]] == "Python developer"
+        assert pipeline.artifacts[repo.checkpoints[3][1]["parsed_ref"]]["name"] == "Jane"
+
+        assert repo.indexed == [("ab" * 32, "Q1", repo.checkpoints[3][1]["parsed_ref"], "u1")]
+
+        pipeline_meta = repo.checkpoints[-1][1]["pipeline"]
+        assert pipeline_meta["mode"] == "fused"
+        assert set(pipeline_meta["stage_seconds"]) == set(tasks.STAGE_ORDER)
+
+    def test_infected_file_stops_pipeline(self, pipeline):
+        """An infected file is checkpointed and no later stage runs."""
+        pipeline.scan.return_value = {"clean": False, "virus_name": "EICAR"}
+
+        tasks.intake_pipeline_task({"qid": "Q1"})
+
+        assert pipeline.repos[0].checkpoints == [("infected", None)]
+        pipeline.sanitize.assert_not_called()
+        pipeline.publish.assert_not_called()
+
+    def test_unhashed_upload_is_hashed_and_deduped_before_scan(self, pipeline):
+        """An S3 upload admitted without a checksum is linked to its duplicate without a scan."""
+        with patch(f"{TASKS}.hash_and_link", return_value=("cd" * 32, SimpleNamespace(qid="Q0"))) as link, \
+                patch.object(FakeRepository, "content_sha256", None):
+            tasks.intake_pipeline_task({"qid": "Q1"})
+
+        link.assert_called_once()
+        pipeline.scan.assert_not_called()
+        pipeline.publish.assert_not_called()
+
+    def test_unhashed_upload_keeps_its_hash(self, pipeline):
+        """A new unhashed upload runs the pipeline and is indexed under the hash taken at scan."""
+        with patch(f"{TASKS}.hash_and_link", return_value=("cd" * 32, None)), \
+                patch.object(FakeRepository, "content_sha256", None):
+            tasks.intake_pipeline_task({"qid": "Q1"})
+
+        repo = pipeline.repos[0]
+        assert [status for status, _ in repo.checkpoints] == ["clean", "sanitized", "extracted", "parsed", "completed"]
+        assert repo.indexed[0][0] == "cd" * 32
+
+    def test_failing_stage_falls_back_to_stage_task(self, pipeline):
+        """An exception hands the stage, with the state so far, to its per-stage task."""
+        pipeline.parse.side_effect = RuntimeError("brain unavailable")
+
+        tasks.intake_pipeline_task({"qid": "Q1"})
+
+        assert [status for status, _ in pipeline.repos[0].checkpoints] == ["clean", "sanitized", "extracted"]
+        pipeline.session_local.return_value.rollback.assert_called_once()
+        event_name, state = pipeline.publish.call_args[0]
+        assert event_name == "parse_requested"
+        assert "extracted_text" not in state
+        assert pipeline.artifacts[state["extracted_text_ref"]] == "Python developer"
+        assert state["pipeline"]["mode"] == "fused_fallback"
+
+    def test_resumes_from_stage(self, pipeline):
+        """from_stage skips the stages already done."""
+        ref = pipeline.put_artifact("Python developer")
+
+        tasks.intake_pipeline_task({"qid": "Q1", "from_stage": "parse", "extracted_text_ref": ref})
+
+        pipeline.scan.assert_not_called()
+        pipeline.extract.assert_not_called()
+        pipeline.parse.assert_called_once_with("Python developer", tag="resume")
+        assert [status for status, _ in pipeline.repos[0].checkpoints] == ["parsed", "completed"]
+
+
+class TestStageTasks:
+    """Test cases for the per-stage tasks."""
+
+    def test_stage_task_publishes_next_stage(self, pipeline):
+        """A per-stage task runs its stage and publishes the next one."""
+        tasks.run_stage("extract", {"qid": "Q1"})
+
+        event_name, state = pipeline.publish.call_args[0]
+        assert event_name == "parse_requested"
+        assert set(state) == {"qid", "extracted_text_ref"}
+
+    def test_payload_size_independent_of_document_size(self, pipeline):
+        """Messages carry refs, not text: a 500 KB resume publishes the same small payload."""
+        sizes = []
+        for chars in (100, 500_000):
+            pipeline.extract.return_value = {"success": True, "text": "x" * chars, "module": "pypdf2", "score": 90.0}
+            tasks.run_stage("extract", {"qid": "Q1"})
+            sizes.append(len(json.dumps(pipeline.publish.call_args[0][1])))
+
+        assert sizes[0] == sizes[1] < 200
+
+    def test_inline_text_from_older_messages(self, pipeline):
+        """parse_requested messages queued before artifact refs still carry the text inline."""
+        tasks.run_stage("parse", {"qid": "Q1", "extracted_text": "Python developer"})
+
+        pipeline.parse.assert_called_once_with("Python developer", tag="resume")
+        event_name, state = pipeline.publish.call_args[0]
+        assert event_name == "finalize_requested"
+        assert set(state) == {"qid", "parsed_ref"}
+
+    def test_finalize_publishes_nothing(self, pipeline):
+        """The last stage ends the chain."""
+        tasks.run_stage("finalize", {"qid": "Q1"})
+
+        assert pipeline.repos[0].checkpoints == [("completed", None)]
+        assert pipeline.repos[0].indexed == []  # nothing parsed, nothing to link to
+        pipeline.publish.assert_not_called()
+
+
+class TestPublisherRouting:
+    """Test cases for routing new uploads to the fused task."""
+
+    def test_new_upload_goes_to_fused_task(self):
+        from backend_app.file_intake.services import event_publisher
+
+        with patch.object(event_publisher, "celery_app") as app, \
+                patch.object(event_publisher, "FUSED_PIPELINE", True):
+            event_publisher.publish("virus_scan_requested", {"qid": "Q1", "source": "whatsapp"})
+            event_publisher.publish("virus_scan_requested", {"qid": "Q1", "source": "whatsapp", "pipeline": {"mode": "fused_fallback"}})
+            event_publisher.publish("virus_scan_requested", {"qid": "Q2", "source": "api"})
+
+        names = [c[0][0] for c in app.send_task.call_args_list]
+        # bulk imports run stage by stage so the OCR and parse pools scale separately
+        assert names == ["file_intake.tasks.intake_pipeline_task", "file_intake.tasks.virus_scan_task",
+                         "file_intake.tasks.virus_scan_task"]
+
+    def test_staged_mode(self):
+        from backend_app.file_intake.services import event_publisher
+
+        with patch.object(event_publisher, "celery_app") as app, \
+                patch.object(event_publisher, "FUSED_PIPELINE", False):
+            event_publisher.publish("virus_scan_requested", {"qid": "Q1", "source": "web"})
+
+        app.send_task.assert_called_once_with("file_intake.tasks.virus_scan_task", args=[{"qid": "Q1", "source": "web"}])
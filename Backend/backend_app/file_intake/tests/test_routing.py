@@ -0,0 +1,115 @@
+"""
+Test suite for intake queue routing.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from backend_app.file_intake.workers import routing
+from backend_app.file_intake.workers.routing import FairShare, route_task
+
+
+PIPELINE = "file_intake.tasks.intake_pipeline_task"
+VIRUS_SCAN = "file_intake.tasks.virus_scan_task"
+EXTRACT = "file_intake.tasks.extract_task"
+PARSE = "file_intake.tasks.parse_task"
+
+
+@pytest.fixture(autouse=True)
+def local_fair_share():
+    """In-process fair-share counts (no Redis)."""
+    with patch.object(routing, "fair_share", FairShare(redis_url=None)):
+        yield
+
+
+class TestRouteTask:
+    """Test cases for route_task."""
+
+    def test_interactive_upload(self):
+        """Chat uploads go to the interactive lane at top priority."""
+        route = route_task(PIPELINE, [{"qid": "Q1", "source": "whatsapp", "tenant": "u1"}], {}, {})
+
+        assert route == {"queue": "intake.pipeline.interactive", "priority": 0}
+
+    def test_stage_and_lane_queues(self):
+        """Each stage of each lane has its own queue."""
+        assert route_task(EXTRACT, [{"qid": "Q1", "source": "api"}], {}, {})["queue"] == "intake.extract.bulk"
+        assert route_task(PARSE, [{"qid": "Q1", "source": "email"}], {}, {})["queue"] == "intake.parse.email"
+        assert route_task(VIRUS_SCAN, [{"qid": "Q1"}], {}, {})["queue"] == f"intake.scan.{routing.DEFAULT_LANE}"
+
+    def test_unknown_task_goes_to_default_queue(self):
+        """Tasks outside the pipeline use the default queue."""
+        assert route_task("file_intake.tasks.generic_task", ["event", {"qid": "Q1"}], {}, {}) == {"queue": routing.DEFAULT_QUEUE}
+
+    def test_bulk_tenant_is_demoted_beyond_fair_share(self):
+        """A tenant starting many documents drops in priority; other tenants keep the lane priority."""
+        priorities = [route_task(VIRUS_SCAN, [{"qid": f"Q{i}", "source": "api", "tenant": "agency"}], {}, {})["priority"]
+                      for i in range(routing.FAIR_BURST * 2 + 1)]
+        other = route_task(VIRUS_SCAN, [{"qid": "X1", "source": "api", "tenant": "startup"}], {}, {})
+
+        base = routing.LANE_PRIORITY["bulk"]
+        assert priorities[:routing.FAIR_BURST] == [base] * routing.FAIR_BURST
+        assert priorities[routing.FAIR_BURST] == base + 1
+        assert priorities[-1] == base + 2
+        assert other["priority"] == base
+
+    def test_demotion_is_capped(self):
+        """Priority never drops more than MAX_DEMOTION steps."""
+        with patch.object(routing, "FAIR_BURST", 1):
+            for i in range(20):
+                route = route_task(VIRUS_SCAN, [{"qid": f"Q{i}", "source": "api", "tenant": "agency"}], {}, {})
+
+        assert route["priority"] == routing.LANE_PRIORITY["bulk"] + routing.MAX_DEMOTION
+
+    def test_later_stages_do_not_count_as_new_documents(self):
+        """Only the entry task counts against the fair share."""
+        for i in range(routing.FAIR_BURST * 3):
+            route_task(EXTRACT, [{"qid": "Q1", "source": "api", "tenant": "agency"}], {}, {})
+
+        route = route_task(VIRUS_SCAN, [{"qid": "Q2", "source": "api", "tenant": "agency"}], {}, {})
+        assert route["priority"] == routing.LANE_PRIORITY["bulk"]
+
+    def test_fused_fallback_is_not_a_new_document(self):
+        """virus_scan republished by the fused pipeline's fallback was counted when the pipeline started."""
+        fallback = {"qid": "Q1", "source": "api", "tenant": "agency", "pipeline": {"mode": "fused_fallback"}}
+        for i in range(routing.FAIR_BURST * 3):
+            route_task(VIRUS_SCAN, [fallback], {}, {})
+
+        route = route_task(PIPELINE, [{"qid": "Q2", "source": "api", "tenant": "agency"}], {}, {})
+        assert route["priority"] == routing.LANE_PRIORITY["bulk"]
+
+
+class TestPools:
+    """Test cases for queue declarations and worker pools."""
+
+    def test_every_queue_is_declared_and_consumed(self):
+        """Every routed queue is declared and has a worker pool."""
+        consumed = {q for queues in routing.POOLS.values() for q in queues}
+        for stage in set(routing.TASK_STAGES.values()):
+            for lane in routing.LANE_PRIORITY:
+                assert routing.queue_name(stage, lane) in routing.ALL_QUEUES
+                assert routing.queue_name(stage, lane) in consumed
+
+    def test_interactive_pool_is_dedicated(self):
+        """Bulk and email work never runs on the interactive pool."""
+        assert all(q.endswith(".interactive") for q in routing.POOLS["interactive"])
+        others = [q for pool, queues in routing.POOLS.items() if pool != "interactive" for q in queues]
+        assert not any(q.endswith(".interactive") for q in others)
+
+    def test_celery_app_uses_routing(self):
+        """celery_app declares the queues and routes through route_task."""
+        from backend_app.file_intake.workers.celery_app import celery_app
+
+        assert [q.name for q in celery_app.conf.task_queues] == routing.ALL_QUEUES
+        assert celery_app.conf.task_routes == (route_task,)
+        assert celery_app.conf.broker_transport_options["queue_order_strategy"] == "priority"
+
+    def test_only_extraction_workers_warm_ocr(self):
+        """Workers consuming pipeline/extract queues warm OCR; the scan and parse pools do not."""
+        from backend_app.file_intake.workers import celery_app as app_module
+
+        queues = app_module.celery_app.amqp.queues
+        for pool, expected in (("ocr", True), ("interactive", True), ("scan", False), ("parse", False)):
+            with patch.object(queues, "_consume_from", {name: queues[name] for name in routing.POOLS[pool]}):
+                assert app_module.consumes_ocr_queues() is expected, pool
+
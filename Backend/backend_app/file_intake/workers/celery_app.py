@@ -1,9 +1,46 @@
 # file_intake/workers/celery_app.py
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+from kombu import Queue
 import os
 
+from .routing import ALL_QUEUES, DEFAULT_QUEUE, PRIORITY_STEPS, queue_name, route_task
+
 CELERY_BROKER = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
 
 celery_app = Celery("file_intake", broker=CELERY_BROKER, backend=CELERY_BACKEND)
-celery_app.conf.update(task_acks_late=True, worker_prefetch_multiplier=1)
\ No newline at end of file
+celery_app.conf.update(
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    # per-stage, per-lane queues with priorities (see routing.py)
+    task_queues=[Queue(name) for name in ALL_QUEUES],
+    task_default_queue=DEFAULT_QUEUE,
+    task_routes=(route_task,),
+    task_default_priority=PRIORITY_STEPS[len(PRIORITY_STEPS) // 2],
+    broker_transport_options={"priority_steps": PRIORITY_STEPS, "sep": ":", "queue_order_strategy": "priority"},
+)
+
+
+# queues whose tasks run text extraction (and so OCR)
+OCR_QUEUE_PREFIXES = tuple(queue_name(stage, "") for stage in ("pipeline", "extract"))
+
+
+def consumes_ocr_queues() -> bool:
+    """True when this worker consumes extraction queues (-Q); a worker without -Q consumes them all"""
+    return any(name.startswith(OCR_QUEUE_PREFIXES) for name in celery_app.amqp.queues.consume_from)
+
+
+@worker_process_init.connect
+def start_ocr_pool(**kwargs):
+    # warm OCR before the first extraction task, only in workers that extract, and from a thread:
+    # worker_process_init must return within worker_proc_alive_timeout or the child is killed
+    if consumes_ocr_queues():
+        from backend_app.text_extraction import parallel_ocr
+        parallel_ocr.start(background=True)
+
+
+@worker_process_shutdown.connect
+def stop_ocr_pool(**kwargs):
+    from backend_app.text_extraction import parallel_ocr
+    parallel_ocr.shutdown()
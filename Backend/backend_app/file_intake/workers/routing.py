@@ -0,0 +1,150 @@
+# file_intake/workers/routing.py
+#
+# Queue routing for the intake tasks (celery_app.task_routes):
+# - one queue per stage group and lane: intake.<stage>.<lane>
+#   lanes: interactive (chat/web uploads), email, bulk (recruiter/API imports)
+# - a priority per lane, demoted for tenants that publish more than their fair share in the
+#   current window, so one tenant's 5,000-CV import queues behind everyone else's uploads
+# - POOLS: which queues each worker pool consumes; worker_runner.sh sizes the pools independently
+#   (prefork for CPU-heavy OCR, threads for IO-bound LLM parsing, a dedicated interactive pool)
+# Redis broker: priority 0 is served first.
+import os
+import sys
+import time
+import logging
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+LANES = {
+    "web": "interactive",
+    "whatsapp": "interactive",
+    "telegram": "interactive",
+    "email": "email",
+    "api": "bulk",
+    "bulk": "bulk",
+    "import": "bulk",
+}
+DEFAULT_LANE = os.getenv("INTAKE_DEFAULT_LANE", "bulk")
+LANE_PRIORITY = {"interactive": 0, "email": 3, "bulk": 6}
+PRIORITY_STEPS = list(range(10))
+
+TASK_STAGES = {
+    "file_intake.tasks.intake_pipeline_task": "pipeline",
+    "file_intake.tasks.virus_scan_task": "scan",
+    "file_intake.tasks.sanitize_task": "scan",
+    "file_intake.tasks.extract_task": "extract",
+    "file_intake.tasks.parse_task": "parse",
+    "file_intake.tasks.finalize_task": "finalize",
+}
+# tasks that start a document's pipeline: these count against the tenant's fair share (a stage
+# republished by the fused pipeline's fallback carries "pipeline" and was already counted)
+ENTRY_TASKS = {"file_intake.tasks.intake_pipeline_task", "file_intake.tasks.virus_scan_task"}
+STAGE_GROUPS = ["pipeline", "scan", "extract", "parse", "finalize"]
+DEFAULT_QUEUE = "intake.default"
+
+FAIR_WINDOW_SECONDS = int(os.getenv("INTAKE_FAIR_WINDOW_SECONDS", "60"))
+# documents a tenant may start per window and lane before its priority is demoted one step
+FAIR_BURST = int(os.getenv("INTAKE_FAIR_BURST", "20"))
+MAX_DEMOTION = int(os.getenv("INTAKE_MAX_DEMOTION", "3"))
+REDIS_RETRY_SECONDS = 30
+
+
+def queue_name(stage: str, lane: str) -> str:
+    return f"intake.{stage}.{lane}"
+
+
+ALL_QUEUES = [queue_name(stage, lane) for lane in LANE_PRIORITY for stage in STAGE_GROUPS] + [DEFAULT_QUEUE]
+
+# worker pool -> queues it consumes; the Redis transport rotates between a worker's queues, so the
+# order is not a preference - lanes are kept apart by giving them separate pools
+POOLS = {
+    # interactive uploads never wait behind email or bulk work
+    "interactive": [queue_name(stage, "interactive") for stage in STAGE_GROUPS],
+    "scan": [queue_name(stage, lane) for lane in ("email", "bulk") for stage in ("scan", "finalize")] + [DEFAULT_QUEUE],
+    "ocr": [queue_name(stage, lane) for lane in ("email", "bulk") for stage in ("pipeline", "extract")],
+    "parse": [queue_name("parse", lane) for lane in ("email", "bulk")],
+}
+
+
+def lane_for(payload: dict) -> str:
+    return LANES.get((payload or {}).get("source") or "", DEFAULT_LANE)
+
+
+class FairShare:
+    """
+    Documents started per (lane, tenant) in the current window. Counted in Redis (shared by the API
+    and all workers) when reachable, otherwise per process.
+    """
+
+    def __init__(self, redis_url: str = None, window_seconds: int = FAIR_WINDOW_SECONDS):
+        self.redis_url = redis_url
+        self.window_seconds = window_seconds
+        self._redis = None
+        self._redis_failed = False
+        # after a Redis error, count in-process until this time instead of paying a timeout per task
+        self._redis_retry_at = 0.0
+        self._local = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _client(self):
+        if self._redis is None and self.redis_url and not self._redis_failed:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=0.2)
+            except Exception as e:
+                logger.warning(f"Fair-share counter falling back to in-process counts: {e}")
+                self._redis_failed = True
+        return self._redis
+
+    def _key(self, lane: str, tenant: str) -> str:
+        return f"intake:fair:{lane}:{tenant}:{int(time.time() // self.window_seconds)}"
+
+    def load(self, lane: str, tenant: str, started: bool = False) -> int:
+        """Documents the tenant started in this window; started=True counts one more first"""
+        key = self._key(lane, tenant)
+        client = self._client() if time.monotonic() >= self._redis_retry_at else None
+        if client is not None:
+            try:
+                if started:
+                    pipe = client.pipeline()
+                    pipe.incr(key)
+                    pipe.expire(key, self.window_seconds * 2)
+                    return int(pipe.execute()[0])
+                return int(client.get(key) or 0)
+            except Exception as e:
+                logger.debug(f"Fair-share Redis counter unavailable: {e}")
+                self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        with self._lock:
+            if started:
+                self._local[key] += 1
+                if len(self._local) > 10000:
+                    current = key.rsplit(":", 1)[1]
+                    for stale in [k for k in self._local if k.rsplit(":", 1)[1] != current]:
+                        del self._local[stale]
+            return self._local[key]
+
+
+fair_share = FairShare(os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """celery task_routes entry: queue and priority from the payload's source and tenant"""
+    stage = TASK_STAGES.get(name)
+    if stage is None:
+        return {"queue": DEFAULT_QUEUE}
+    payload = args[0] if args and isinstance(args[0], dict) else {}
+    lane = lane_for(payload)
+    tenant = str(payload.get("tenant") or "anonymous")
+    load = fair_share.load(lane, tenant, started=name in ENTRY_TASKS and "pipeline" not in payload)
+    demotion = min(MAX_DEMOTION, max(0, load - 1) // FAIR_BURST) if FAIR_BURST > 0 else 0
+    return {
+        "queue": queue_name(stage, lane),
+        "priority": min(PRIORITY_STEPS[-1], LANE_PRIORITY[lane] + demotion),
+    }
+
+
+if __name__ == "__main__":
+    # worker_runner.sh: python -m backend_app.file_intake.workers.routing <pool> -> comma-separated queues
+    print(",".join(POOLS[sys.argv[1]]))
@@ -1,4 +1,14 @@
 # file_intake/workers/tasks.py
+#
+# Pipeline stages: virus_scan -> sanitize -> extract -> parse -> finalize.
+# intake_pipeline_task (the default, see event_publisher.FUSED_PIPELINE) runs all stages in one
+# task with one DB session and one record load, checkpointing the status after each stage.
+# The per-stage tasks run the same stage functions one hop at a time; the fused task hands a
+# failing stage over to its per-stage task, which retries it and continues the chain from there.
+import os
+import time
+import logging
+
 from .celery_app import celery_app
 from backend_app.file_intake.repositories.intake_repository import IntakeRepository
 from backend_app.db import SessionLocal
@@ -7,61 +17,165 @@ from backend_app.file_intake.services.sanitizer_service import sanitize_and_norm
 from backend_app.file_intake.services.extraction_service import extract_text_for_qid
 from backend_app.file_intake.services.brain_parse_service import parse_text_to_profile
 from backend_app.file_intake.services.event_publisher import publish
+from backend_app.file_intake.services.artifact_store import put_artifact, get_artifact
+from backend_app.file_intake.services.dedupe_service import index_result, hash_and_link
 
-@celery_app.task(name="file_intake.tasks.virus_scan_task")
-def virus_scan_task(payload: dict):
-    qid = payload["qid"]
-    db = SessionLocal()
-    repo = IntakeRepository(db)
-    rec = repo.get_by_qid(qid)
-    if not rec or not rec.storage_path:
-        repo.update_status(qid, "failed", error_message="missing_storage_path")
-        return
+logger = logging.getLogger(__name__)
+
+STAGE_MAX_RETRIES = int(os.getenv("INTAKE_STAGE_MAX_RETRIES", "3"))
+STAGE_TASK_OPTIONS = dict(autoretry_for=(Exception,), retry_backoff=True, max_retries=STAGE_MAX_RETRIES)
+
+
+# ---------- Stages ----------
+# Each stage gets the loaded record and the pipeline state (the task payload: qid plus artifact refs
+# of what earlier stages produced), checkpoints its status, and returns True when the pipeline should
+# continue. Extracted text and parsed profiles live in artifact_store; payloads and metadata carry refs.
+def virus_scan_stage(repo: IntakeRepository, rec, state: dict) -> bool:
+    if not rec.storage_path:
+        repo.checkpoint(rec, "failed", error_message="missing_storage_path")
+        return False
+    content_sha256 = None
+    if not rec.content_sha256:
+        # admitted without a hash (S3 upload without a verified checksum): dedupe here, before the scan
+        content_sha256, original = hash_and_link(repo, rec)
+        if original is not None:
+            return False
     result = scan_file(rec.storage_path)
     if not result["clean"]:
-        repo.update_status(qid, "infected", error_message=result.get("virus_name"))
-        return
-    repo.update_status(qid, "clean")
-    publish("sanitize_requested", {"qid": qid})
+        repo.checkpoint(rec, "infected", error_message=result.get("virus_name"))
+        return False
+    repo.checkpoint(rec, "clean", content_sha256=content_sha256)
+    return True
 
-@celery_app.task(name="file_intake.tasks.sanitize_task")
-def sanitize_task(payload: dict):
-    qid = payload["qid"]
-    db = SessionLocal()
-    repo = IntakeRepository(db)
-    rec = repo.get_by_qid(qid)
+
+def sanitize_stage(repo: IntakeRepository, rec, state: dict) -> bool:
     new_path = sanitize_and_normalize(rec.storage_path)
-    repo.update_status(qid, "sanitized", storage_path=new_path)
-    publish("extract_requested", {"qid": qid})
+    repo.checkpoint(rec, "sanitized", storage_path=new_path)
+    return True
 
-@celery_app.task(name="file_intake.tasks.extract_task")
-def extract_task(payload: dict):
-    qid = payload["qid"]
-    db = SessionLocal()
-    repo = IntakeRepository(db)
-    rec = repo.get_by_qid(qid)
-    res = extract_text_for_qid(rec.storage_path, metadata={"qid": qid})
+
+def extract_stage(repo: IntakeRepository, rec, state: dict) -> bool:
+    res = extract_text_for_qid(rec.storage_path, metadata={"qid": rec.qid})
     if not res["success"]:
-        repo.update_status(qid, "failed", error_message="extraction_failed")
-        return
-    # store extracted text in metadata (or separate table as you prefer)
-    repo.update_status(qid, "extracted", metadata={"extracted_text": res["text"], "extract_module": res.get("module"), "extract_score": res.get("score")})
-    publish("parse_requested", {"qid": qid, "extracted_text": res["text"]})
+        repo.checkpoint(rec, "failed", error_message="extraction_failed")
+        return False
+    ref = put_artifact(res["text"])
+    repo.checkpoint(rec, "extracted", metadata={"extracted_text_ref": ref, "extracted_chars": len(res["text"] or ""), "extract_module": res.get("module"), "extract_score": res.get("score")})
+    state["extracted_text_ref"] = ref
+    return True
 
-@celery_app.task(name="file_intake.tasks.parse_task")
-def parse_task(payload: dict):
-    qid = payload["qid"]
-    text = payload.get("extracted_text", "")
+
+def parse_stage(repo: IntakeRepository, rec, state: dict) -> bool:
+    if "extracted_text_ref" in state:
+        text = get_artifact(state["extracted_text_ref"])
+    else:
+        # messages queued before artifact refs carried the text inline
+        text = state.get("extracted_text", "")
     parsed = parse_text_to_profile(text, tag="resume")
+    ref = put_artifact(parsed)
+    repo.checkpoint(rec, "parsed", metadata={"parsed_ref": ref})
+    state.pop("extracted_text", None)
+    state["parsed_ref"] = ref
+    return True
+
+
+def finalize_stage(repo: IntakeRepository, rec, state: dict) -> bool:
+    # here you should call your profile writer to persist parsed data (omitted: call profile writer)
+    metadata = {"pipeline": state["pipeline"]} if "pipeline" in state else None
+    # later uploads of the same bytes link to this result instead of running the pipeline
+    index_result(repo, rec, state.get("parsed_ref"))
+    repo.checkpoint(rec, "completed", metadata=metadata)
+    return True
+
+
+STAGES = {
+    "virus_scan": (virus_scan_stage, "virus_scan_requested"),
+    "sanitize": (sanitize_stage, "sanitize_requested"),
+    "extract": (extract_stage, "extract_requested"),
+    "parse": (parse_stage, "parse_requested"),
+    "finalize": (finalize_stage, "finalize_requested"),
+}
+STAGE_ORDER = list(STAGES)
+
+
+def _next_stage(stage: str):
+    idx = STAGE_ORDER.index(stage) + 1
+    return STAGE_ORDER[idx] if idx < len(STAGE_ORDER) else None
+
+
+def run_stage(stage: str, payload: dict):
+    """One stage in its own task; publishes the next stage when it succeeds"""
     db = SessionLocal()
-    repo = IntakeRepository(db)
-    repo.update_status(qid, "parsed", metadata={"parsed": parsed})
-    publish("finalize_requested", {"qid": qid, "parsed": parsed})
+    try:
+        repo = IntakeRepository(db)
+        state = dict(payload)
+        rec = repo.get_by_qid(state["qid"])
+        if rec is None:
+            logger.warning(f"Intake record {state['qid']} not found for stage {stage}")
+            return
+        stage_fn, _ = STAGES[stage]
+        if not stage_fn(repo, rec, state):
+            return
+    finally:
+        db.close()
+    next_stage = _next_stage(stage)
+    if next_stage:
+        publish(STAGES[next_stage][1], state)
 
-@celery_app.task(name="file_intake.tasks.finalize_task")
-def finalize_task(payload: dict):
+
+# ---------- Tasks ----------
+@celery_app.task(name="file_intake.tasks.intake_pipeline_task")
+def intake_pipeline_task(payload: dict):
+    """
+    All stages in one task: one session, one record load, a status checkpoint per stage.
+    payload: qid, optional from_stage (resume point) and the state of earlier stages.
+    """
     qid = payload["qid"]
-    db = SessionLocal()
-    repo = IntakeRepository(db)
-    # here you should call your profile writer to persist parsed data (omitted: call profile writer)
-    repo.update_status(qid, "completed")
\ No newline at end of file
+    state = dict(payload)
+    timings = state.setdefault("pipeline", {"mode": "fused", "stage_seconds": {}})["stage_seconds"]
+    # checkpoints commit per stage; keep the loaded record usable without a reload after each commit
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        repo = IntakeRepository(db)
+        rec = repo.get_by_qid(qid)
+        if rec is None:
+            logger.warning(f"Intake record {qid} not found")
+            return
+        for stage in STAGE_ORDER[STAGE_ORDER.index(state.pop("from_stage", "virus_scan")):]:
+            stage_fn, event_name = STAGES[stage]
+            started = time.monotonic()
+            try:
+                proceed = stage_fn(repo, rec, state)
+            except Exception as e:
+                # hand the stage to its own task: it retries with backoff and continues the chain
+                logger.warning(f"Fused intake stage {stage} failed for {qid} ({e}); falling back to {event_name}")
+                db.rollback()
+                state["pipeline"]["mode"] = "fused_fallback"
+                publish(event_name, state)
+                return
+            timings[stage] = round(time.monotonic() - started, 3)
+            if not proceed:
+                return
+    finally:
+        db.close()
+
+
+@celery_app.task(name="file_intake.tasks.virus_scan_task", **STAGE_TASK_OPTIONS)
+def virus_scan_task(payload: dict):
+    run_stage("virus_scan", payload)
+
+@celery_app.task(name="file_intake.tasks.sanitize_task", **STAGE_TASK_OPTIONS)
+def sanitize_task(payload: dict):
+    run_stage("sanitize", payload)
+
+@celery_app.task(name="file_intake.tasks.extract_task", **STAGE_TASK_OPTIONS)
+def extract_task(payload: dict):
+    run_stage("extract", payload)
+
+@celery_app.task(name="file_intake.tasks.parse_task", **STAGE_TASK_OPTIONS)
+def parse_task(payload: dict):
+    run_stage("parse", payload)
+
+@celery_app.task(name="file_intake.tasks.finalize_task", **STAGE_TASK_OPTIONS)
+def finalize_task(payload: dict):
+    run_stage("finalize", payload)
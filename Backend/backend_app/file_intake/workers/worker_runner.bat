@@ -11,6 +11,8 @@ set CELERY_APP=backend_app.file_intake.workers.celery_app
 set CELERY_WORKER_NAME=file_intake_worker
 set LOG_LEVEL=info
 set WORKER_COUNT=1
+REM Worker pools (space-padded for the membership test below)
+set POOL_NAMES= interactive scan ocr parse 
 
 REM Function to print status
 :print_status
@@ -84,7 +86,7 @@ call :print_status "Starting Celery worker: %worker_name% (Queue: %queue%)"
 REM Start worker in background
 start "Celery Worker - %worker_name%" /B "%VENV_PATH%\Scripts\celery" -A "%CELERY_APP%" worker ^
     --name="%worker_name%" ^
-    --queue="%queue%" ^
+    --queues="%queue%" ^
     --loglevel="%LOG_LEVEL%" ^
     --concurrency="%WORKER_COUNT%" ^
     --max-tasks-per-child=1000 ^
@@ -104,6 +106,13 @@ if errorlevel 1 (
 )
 goto :eof
 
+REM Function to start a worker pool (queues from workers/routing.py POOLS; Windows has no prefork, so threads)
+:start_pool
+set pool=%~1
+for /f "delims=" %%q in ('"%VENV_PATH%\Scripts\python" -m backend_app.file_intake.workers.routing %pool%') do set pool_queues=%%q
+call :start_worker "file_intake_%pool%" "!pool_queues!" "--prefetch-multiplier=1 --pool=threads"
+goto :eof
+
 REM Function to stop Celery worker
 :stop_worker
 set worker_name=%~1
@@ -195,7 +204,7 @@ echo Usage: %~n0 [command] [options]
 echo.
 echo Commands:
 echo   start [worker_type]    Start Celery workers
-echo                          worker_type: all (default), virus_scan, sanitize, extraction, parsing, finalize
+echo                          worker_type: all (default), interactive, scan, ocr, parse
 echo   stop [worker_type]     Stop Celery workers
 echo   restart [worker_type]  Restart Celery workers
 echo   status                 Show worker status
@@ -205,9 +214,9 @@ echo   help                   Show this help message
 echo.
 echo Examples:
 echo   %~n0 start all           # Start all workers
-echo   %~n0 start virus_scan    # Start only virus scan workers
-echo   %~n0 stop extraction     # Stop extraction workers
-echo   %~n0 logs file_intake_virus_scan  # Show virus scan worker logs
+echo   %~n0 start interactive   # Start only the interactive (chat/web upload) pool
+echo   %~n0 stop ocr            # Stop the OCR pool
+echo   %~n0 logs file_intake_ocr  # Show OCR pool logs
 echo.
 echo Environment Variables:
 echo   CELERY_BROKER_URL      Redis broker URL (default: redis://localhost:6379/0)
@@ -229,21 +238,9 @@ if "%command%"=="start" (
     if "%worker_type%"=="" set worker_type=all
     
     if "%worker_type%"=="all" (
-        call :start_worker "file_intake_virus_scan" "virus_scan" "--prefetch-multiplier=1"
-        call :start_worker "file_intake_sanitize" "sanitize" "--prefetch-multiplier=2"
-        call :start_worker "file_intake_extraction" "extraction" "--prefetch-multiplier=1"
-        call :start_worker "file_intake_parsing" "parsing" "--prefetch-multiplier=1"
-        call :start_worker "file_intake_finalize" "finalize" "--prefetch-multiplier=1"
-    ) else if "%worker_type%"=="virus_scan" (
-        call :start_worker "file_intake_virus_scan" "virus_scan" "--prefetch-multiplier=1"
-    ) else if "%worker_type%"=="sanitize" (
-        call :start_worker "file_intake_sanitize" "sanitize" "--prefetch-multiplier=2"
-    ) else if "%worker_type%"=="extraction" (
-        call :start_worker "file_intake_extraction" "extraction" "--prefetch-multiplier=1"
-    ) else if "%worker_type%"=="parsing" (
-        call :start_worker "file_intake_parsing" "parsing" "--prefetch-multiplier=1"
-    ) else if "%worker_type%"=="finalize" (
-        call :start_worker "file_intake_finalize" "finalize" "--prefetch-multiplier=1"
+        for %%p in (%POOL_NAMES%) do call :start_pool "%%p"
+    ) else if "!POOL_NAMES: %worker_type% =!" neq "%POOL_NAMES%" (
+        call :start_pool "%worker_type%"
     ) else (
         call :print_error "Unknown worker type: %worker_type%"
         goto show_help
@@ -252,21 +249,9 @@ if "%command%"=="start" (
     if "%worker_type%"=="" set worker_type=all
     
     if "%worker_type%"=="all" (
-        call :stop_worker "file_intake_virus_scan"
-        call :stop_worker "file_intake_sanitize"
-        call :stop_worker "file_intake_extraction"
-        call :stop_worker "file_intake_parsing"
-        call :stop_worker "file_intake_finalize"
-    ) else if "%worker_type%"=="virus_scan" (
-        call :stop_worker "file_intake_virus_scan"
-    ) else if "%worker_type%"=="sanitize" (
-        call :stop_worker "file_intake_sanitize"
-    ) else if "%worker_type%"=="extraction" (
-        call :stop_worker "file_intake_extraction"
-    ) else if "%worker_type%"=="parsing" (
-        call :stop_worker "file_intake_parsing"
-    ) else if "%worker_type%"=="finalize" (
-        call :stop_worker "file_intake_finalize"
+        for %%p in (%POOL_NAMES%) do call :stop_worker "file_intake_%%p"
+    ) else if "!POOL_NAMES: %worker_type% =!" neq "%POOL_NAMES%" (
+        call :stop_worker "file_intake_%worker_type%"
     ) else (
         call :print_error "Unknown worker type: %worker_type%"
         goto show_help
@@ -278,21 +263,13 @@ if "%command%"=="start" (
     if "%worker_type%"=="" set worker_type=all
     
     if "%worker_type%"=="all" (
-        call :restart_worker "file_intake_virus_scan" "virus_scan" "--prefetch-multiplier=1"
-        call :restart_worker "file_intake_sanitize" "sanitize" "--prefetch-multiplier=2"
-        call :restart_worker "file_intake_extraction" "extraction" "--prefetch-multiplier=1"
-        call :restart_worker "file_intake_parsing" "parsing" "--prefetch-multiplier=1"
-        call :restart_worker "file_intake_finalize" "finalize" "--prefetch-multiplier=1"
-    ) else if "%worker_type%"=="virus_scan" (
-        call :restart_worker "file_intake_virus_scan" "virus_scan" "--prefetch-multiplier=1"
-    ) else if "%worker_type%"=="sanitize" (
-        call :restart_worker "file_intake_sanitize" "sanitize" "--prefetch-multiplier=2"
-    ) else if "%worker_type%"=="extraction" (
-        call :restart_worker "file_intake_extraction" "extraction" "--prefetch-multiplier=1"
-    ) else if "%worker_type%"=="parsing" (
-        call :restart_worker "file_intake_parsing" "parsing" "--prefetch-multiplier=1"
-    ) else if "%worker_type%"=="finalize" (
-        call :restart_worker "file_intake_finalize" "finalize" "--prefetch-multiplier=1"
+        for %%p in (%POOL_NAMES%) do (
+            call :stop_worker "file_intake_%%p"
+            call :start_pool "%%p"
+        )
+    ) else if "!POOL_NAMES: %worker_type% =!" neq "%POOL_NAMES%" (
+        call :stop_worker "file_intake_%worker_type%"
+        call :start_pool "%worker_type%"
     ) else (
         call :print_error "Unknown worker type: %worker_type%"
         goto show_help
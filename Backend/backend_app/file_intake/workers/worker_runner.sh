@@ -20,6 +20,8 @@ CELERY_WORKER_NAME="file_intake_worker"
 LOG_LEVEL="info"
 WORKER_COUNT=$(nproc)  # Use all available CPU cores
 CELERY_OPTS="--loglevel=$LOG_LEVEL --concurrency=$WORKER_COUNT --max-tasks-per-child=1000 --max-memory-per-child=300MB"
+# Worker pools, sized independently; each consumes the queues listed in workers/routing.py POOLS
+POOL_NAMES="interactive scan ocr parse"
 
 # Function to print colored output
 print_status() {
@@ -81,15 +83,17 @@ start_worker() {
     local worker_name=$1
     local queue=$2
     local extra_opts=$3
+    local concurrency=${4:-$WORKER_COUNT}
+    local worker_env=$5
     
-    print_status "Starting Celery worker: $worker_name (Queue: $queue)"
+    print_status "Starting Celery worker: $worker_name (Queue: $queue, Concurrency: $concurrency)"
     
     # Start worker in background
-    nohup "$VENV_PATH/bin/celery" -A "$CELERY_APP" worker \
+    env $worker_env nohup "$VENV_PATH/bin/celery" -A "$CELERY_APP" worker \
         --name="$worker_name" \
-        --queue="$queue" \
+        --queues="$queue" \
         --loglevel="$LOG_LEVEL" \
-        --concurrency="$WORKER_COUNT" \
+        --concurrency="$concurrency" \
         --max-tasks-per-child=1000 \
         --max-memory-per-child=300MB \
         --pidfile="/tmp/${worker_name}.pid" \
@@ -107,6 +111,32 @@ start_worker() {
     fi
 }
 
+# Function to start a worker pool
+start_pool() {
+    local pool=$1
+    local queues
+    queues=$(cd "$PROJECT_ROOT" && "$VENV_PATH/bin/python" -m backend_app.file_intake.workers.routing "$pool")
+    
+    case $pool in
+        interactive)
+            # chat/web uploads only, so bulk imports never delay them; OCR pages run in parallel
+            start_worker "file_intake_interactive" "$queues" "--prefetch-multiplier=1" "${INTERACTIVE_CONCURRENCY:-2}"
+            ;;
+        scan)
+            start_worker "file_intake_scan" "$queues" "--prefetch-multiplier=2" "${SCAN_CONCURRENCY:-2}"
+            ;;
+        ocr)
+            # CPU-bound: one prefork child per core, each OCRing its document inline
+            start_worker "file_intake_ocr" "$queues" "--prefetch-multiplier=1" "${OCR_CONCURRENCY:-$WORKER_COUNT}" \
+                "EXTRACTION_OCR_WORKERS=${EXTRACTION_OCR_WORKERS:-1}"
+            ;;
+        parse)
+            # IO-bound LLM calls: many threads in one process
+            start_worker "file_intake_parse" "$queues" "--prefetch-multiplier=1 --pool=threads" "${PARSE_CONCURRENCY:-16}"
+            ;;
+    esac
+}
+
 # Function to stop Celery worker
 stop_worker() {
     local worker_name=$1
@@ -137,15 +167,27 @@ stop_worker() {
     fi
 }
 
-# Function to restart Celery worker
-restart_worker() {
-    local worker_name=$1
-    local queue=$2
-    local extra_opts=$3
+# Function to restart a worker pool
+restart_pool() {
+    local pool=$1
     
-    stop_worker "$worker_name"
+    stop_worker "file_intake_$pool"
     sleep 2
-    start_worker "$worker_name" "$queue" "$extra_opts"
+    start_pool "$pool"
+}
+
+# Function to expand a worker type (all or one pool name) into pool names
+pools_for() {
+    local worker_type=${1:-all}
+    
+    if [ "$worker_type" = "all" ]; then
+        echo "$POOL_NAMES"
+    elif [[ " $POOL_NAMES " == *" $worker_type "* ]]; then
+        echo "$worker_type"
+    else
+        print_error "Unknown worker type: $worker_type" >&2
+        return 1
+    fi
 }
 
 # Function to show worker status
@@ -214,7 +256,7 @@ show_help() {
     echo
     echo "Commands:"
     echo "  start [worker_type]    Start Celery workers"
-    echo "                         worker_type: all (default), virus_scan, sanitize, extraction, parsing, finalize"
+    echo "                         worker_type: all (default), interactive, scan, ocr, parse"
     echo "  stop [worker_type]     Stop Celery workers"
     echo "  restart [worker_type]  Restart Celery workers"
     echo "  status                 Show worker status"
@@ -224,14 +266,16 @@ show_help() {
     echo
     echo "Examples:"
     echo "  $0 start all           # Start all workers"
-    echo "  $0 start virus_scan    # Start only virus scan workers"
-    echo "  $0 stop extraction     # Stop extraction workers"
-    echo "  $0 logs file_intake_virus_scan  # Show virus scan worker logs"
+    echo "  $0 start interactive   # Start only the interactive (chat/web upload) pool"
+    echo "  $0 stop ocr            # Stop the OCR pool"
+    echo "  $0 logs file_intake_ocr  # Show OCR pool logs"
     echo
     echo "Environment Variables:"
     echo "  CELERY_BROKER_URL      Redis broker URL (default: redis://localhost:6379/0)"
     echo "  CELERY_RESULT_BACKEND  Redis result backend URL (default: redis://localhost:6379/1)"
     echo "  WORKER_COUNT           Number of worker processes (default: CPU cores)"
+    echo "  INTERACTIVE_CONCURRENCY, SCAN_CONCURRENCY, OCR_CONCURRENCY (default: WORKER_COUNT),"
+    echo "  PARSE_CONCURRENCY      Per-pool concurrency (defaults: 2, 2, CPU cores, 16 threads)"
     echo "  LOG_LEVEL              Log level (default: info)"
 }
 
@@ -242,108 +286,27 @@ main() {
             check_requirements
             activate_venv
             
-            local worker_type="${2:-all}"
-            
-            case $worker_type in
-                all)
-                    start_worker "file_intake_virus_scan" "virus_scan" "--prefetch-multiplier=1"
-                    start_worker "file_intake_sanitize" "sanitize" "--prefetch-multiplier=2"
-                    start_worker "file_intake_extraction" "extraction" "--prefetch-multiplier=1"
-                    start_worker "file_intake_parsing" "parsing" "--prefetch-multiplier=1"
-                    start_worker "file_intake_finalize" "finalize" "--prefetch-multiplier=1"
-                    ;;
-                virus_scan)
-                    start_worker "file_intake_virus_scan" "virus_scan" "--prefetch-multiplier=1"
-                    ;;
-                sanitize)
-                    start_worker "file_intake_sanitize" "sanitize" "--prefetch-multiplier=2"
-                    ;;
-                extraction)
-                    start_worker "file_intake_extraction" "extraction" "--prefetch-multiplier=1"
-                    ;;
-                parsing)
-                    start_worker "file_intake_parsing" "parsing" "--prefetch-multiplier=1"
-                    ;;
-                finalize)
-                    start_worker "file_intake_finalize" "finalize" "--prefetch-multiplier=1"
-                    ;;
-                *)
-                    print_error "Unknown worker type: $worker_type"
-                    show_help
-                    exit 1
-                    ;;
-            esac
+            pools=$(pools_for "$2") || { show_help; exit 1; }
+            for pool in $pools; do
+                start_pool "$pool"
+            done
             ;;
             
         stop)
-            local worker_type="${2:-all}"
-            
-            case $worker_type in
-                all)
-                    stop_worker "file_intake_virus_scan"
-                    stop_worker "file_intake_sanitize"
-                    stop_worker "file_intake_extraction"
-                    stop_worker "file_intake_parsing"
-                    stop_worker "file_intake_finalize"
-                    ;;
-                virus_scan)
-                    stop_worker "file_intake_virus_scan"
-                    ;;
-                sanitize)
-                    stop_worker "file_intake_sanitize"
-                    ;;
-                extraction)
-                    stop_worker "file_intake_extraction"
-                    ;;
-                parsing)
-                    stop_worker "file_intake_parsing"
-                    ;;
-                finalize)
-                    stop_worker "file_intake_finalize"
-                    ;;
-                *)
-                    print_error "Unknown worker type: $worker_type"
-                    show_help
-                    exit 1
-                    ;;
-            esac
+            pools=$(pools_for "$2") || { show_help; exit 1; }
+            for pool in $pools; do
+                stop_worker "file_intake_$pool"
+            done
             ;;
             
         restart)
             check_requirements
             activate_venv
             
-            local worker_type="${2:-all}"
-            
-            case $worker_type in
-                all)
-                    restart_worker "file_intake_virus_scan" "virus_scan" "--prefetch-multiplier=1"
-                    restart_worker "file_intake_sanitize" "sanitize" "--prefetch-multiplier=2"
-                    restart_worker "file_intake_extraction" "extraction" "--prefetch-multiplier=1"
-                    restart_worker "file_intake_parsing" "parsing" "--prefetch-multiplier=1"
-                    restart_worker "file_intake_finalize" "finalize" "--prefetch-multiplier=1"
-                    ;;
-                virus_scan)
-                    restart_worker "file_intake_virus_scan" "virus_scan" "--prefetch-multiplier=1"
-                    ;;
-                sanitize)
-                    restart_worker "file_intake_sanitize" "sanitize" "--prefetch-multiplier=2"
-                    ;;
-                extraction)
-                    restart_worker "file_intake_extraction" "extraction" "--prefetch-multiplier=1"
-                    ;;
-                parsing)
-                    restart_worker "file_intake_parsing" "parsing" "--prefetch-multiplier=1"
-                    ;;
-                finalize)
-                    restart_worker "file_intake_finalize" "finalize" "--prefetch-multiplier=1"
-                    ;;
-                *)
-                    print_error "Unknown worker type: $worker_type"
-                    show_help
-                    exit 1
-                    ;;
-            esac
+            pools=$(pools_for "$2") || { show_help; exit 1; }
+            for pool in $pools; do
+                restart_pool "$pool"
+            done
             ;;
             
         status)
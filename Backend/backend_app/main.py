@@ -27,10 +27,17 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logger.info("Initializing database...")
     await init_db()
     logger.info("Database initialized successfully")
+    # the OCR pool is not started here: it is created on first use, once per host (parallel_ocr)
     
     yield
     
     # Shutdown
+    from backend_app.brain_module.brain_service import BrainSvc
+    await BrainSvc.aclose()
+    from backend_app.text_extraction import parallel_ocr
+    parallel_ocr.shutdown()
+    from backend_app.text_extraction.consolidated_extractor import logbook
+    logbook.close()
     logger.info("Application shutdown complete")
 
 # Create FastAPI app
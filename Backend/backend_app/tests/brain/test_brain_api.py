@@ -11,7 +11,7 @@ import pytest
 import asyncio
 from unittest.mock import Mock, patch, AsyncMock
 from fastapi.testclient import TestClient
-from fastapi import status
+from fastapi import FastAPI, status
 import json
 
 # Import the brain API module
@@ -24,7 +24,9 @@ class TestBrainAPI:
     
     def setup_method(self):
         """Setup for each test method"""
-        self.client = TestClient(router)
+        app = FastAPI()
+        app.include_router(router)
+        self.client = TestClient(app)
         
     def test_brain_health_check(self):
         """Test GET /brain/health endpoint"""
@@ -97,4 +99,23 @@ class TestBrainAPI:
             # Verify resume-specific data
             resume_data = data["data"]
             if isinstance(resume_data, dict):
-                assert "full_name" in resume_data or "skills" in resume_data or "education" in resume_data
\ No newline at end of file
+                assert "full_name" in resume_data or "skills" in resume_data or "education" in resume_data
+
+    def test_process_without_metadata(self, tmp_path):
+        """Requests that omit metadata are processed (metadata defaults to None, not {})"""
+        from backend_app.brain_module import brain_service as brain_service_module
+        from backend_app.brain_module.cache.response_cache import ResponseCache
+
+        generate = AsyncMock(return_value={"success": True, "provider": "mock_provider", "model": "mock_model",
+                                           "response": json.dumps({"full_name": "John Doe"}),
+                                           "usage": {"total_tokens": 10}})
+        with patch.object(brain_service_module, "_response_cache", ResponseCache(db_path=str(tmp_path / "cache.db"))), \
+                patch.object(brain_service_module._provider_orch, "agenerate", generate):
+            response = self.client.post("/process", json={"mode": "resume_parse", "text": "John Doe, Python developer"})
+            batch = self.client.post("/process_batch", json={"items": [{"mode": "chat", "text": "hello"}]})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["success"] is True
+        assert response.json()["metadata"] == {}
+        assert batch.status_code == status.HTTP_200_OK
+        assert batch.json()["succeeded"] == 1
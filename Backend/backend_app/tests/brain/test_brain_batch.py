@@ -0,0 +1,127 @@
+"""
+Brain Batch Processing Tests
+
+Covers BrainService.process_batch:
+- dedupe of identical inputs
+- multi-document packing and per-document result splitting
+- fallback to single calls when a packed answer cannot be split
+- bounded concurrency
+"""
+
+import asyncio
+import json
+import re
+import pytest
+from unittest.mock import patch
+
+from backend_app.brain_module import brain_service as brain_service_module
+from backend_app.brain_module.brain_service import BrainService, _split_batch_response
+from backend_app.brain_module.cache.response_cache import ResponseCache
+
+
+class FakeOrchestrator:
+    """Answers packed prompts with a JSON array and single prompts with one object"""
+
+    def __init__(self, split_ok: bool = True, delay: float = 0.0):
+        self.split_ok = split_ok
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def agenerate(self, payload, timeout=60, hedge=False):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            prompt = payload["messages"][-1]["content"]
+            self.calls.append(prompt)
+            docs = re.findall(r"=== DOCUMENT (\d+) ===\n(.*?)(?=\n\n=== DOCUMENT|\Z)", prompt, re.S)
+            if docs:
+                if not self.split_ok:
+                    return {"success": True, "provider": "p1", "model": "m", "response": "not json", "usage": {}}
+                answer = [{"document_index": int(i), "name": text.strip()} for i, text in reversed(docs)]
+                return {"success": True, "provider": "p1", "model": "m", "response": json.dumps(answer),
+                        "usage": {"total_tokens": 100}}
+            name = prompt.rsplit("Resume Text:\n", 1)[-1].strip()
+            return {"success": True, "provider": "p1", "model": "m", "response": json.dumps({"name": name}), "usage": {}}
+        finally:
+            self.in_flight -= 1
+
+
+def qitem(qid: str, text: str, intake_type: str = "resume_parse"):
+    return {"qid": qid, "text": text, "intake_type": intake_type, "meta": {}}
+
+
+class TestBrainBatch:
+    """Test suite for BrainService.process_batch"""
+
+    @pytest.mark.asyncio
+    async def test_dedupes_and_packs_short_resumes(self):
+        fake = FakeOrchestrator()
+        with patch.object(brain_service_module, "_response_cache", None), \
+                patch.object(brain_service_module._provider_orch, "agenerate", fake.agenerate), \
+                patch.object(brain_service_module, "BATCH_PACK_SIZE", 4):
+            items = [qitem("a", "Alice"), qitem("b", "Bob"), qitem("c", "Alice"), qitem("d", "Carol")]
+            results = await BrainService().process_batch(items)
+
+        assert len(fake.calls) == 1
+        assert [r["qid"] for r in results] == ["a", "b", "c", "d"]
+        assert [json.loads(r["response"])["name"] for r in results] == ["Alice", "Bob", "Alice", "Carol"]
+        assert [r["deduplicated"] for r in results] == [False, False, True, False]
+        assert all(r["packed"] == 3 for r in results)
+        assert results[0]["usage"] == {"total_tokens": 33}
+
+    @pytest.mark.asyncio
+    async def test_unsplittable_pack_falls_back_to_single_calls(self):
+        fake = FakeOrchestrator(split_ok=False)
+        with patch.object(brain_service_module, "_response_cache", None), \
+                patch.object(brain_service_module._provider_orch, "agenerate", fake.agenerate):
+            results = await BrainService().process_batch([qitem("a", "Alice"), qitem("b", "Bob")])
+
+        assert len(fake.calls) == 3
+        assert [json.loads(r["response"])["name"] for r in results] == ["Alice", "Bob"]
+        assert all(r["packed"] == 1 for r in results)
+
+    @pytest.mark.asyncio
+    async def test_long_texts_and_chat_are_not_packed(self):
+        fake = FakeOrchestrator()
+        long_text = "x" * (brain_service_module.BATCH_PACK_MAX_DOC_CHARS + 1)
+        with patch.object(brain_service_module, "_response_cache", None), \
+                patch.object(brain_service_module._provider_orch, "agenerate", fake.agenerate):
+            results = await BrainService().process_batch([qitem("a", long_text), qitem("b", "hi", "chat")])
+
+        assert len(fake.calls) == 2
+        assert all(r["success"] for r in results)
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        fake = FakeOrchestrator(delay=0.02)
+        with patch.object(brain_service_module, "_response_cache", None), \
+                patch.object(brain_service_module._provider_orch, "agenerate", fake.agenerate), \
+                patch.object(brain_service_module._provider_orch, "providers", [{}]), \
+                patch.object(brain_service_module, "BATCH_CONCURRENCY_PER_SLOT", 3):
+            items = [qitem(str(i), f"hello {i}", "chat") for i in range(12)]
+            results = await BrainService().process_batch(items)
+
+        assert len(results) == 12
+        assert fake.max_in_flight == 3
+
+    @pytest.mark.asyncio
+    async def test_missing_meta_is_treated_as_empty(self, tmp_path):
+        """API requests without metadata arrive with meta=None"""
+        fake = FakeOrchestrator()
+        items = [{**qitem("a", "Alice"), "meta": None}, {**qitem("b", "hi", "chat"), "meta": None}]
+        with patch.object(brain_service_module, "_response_cache", ResponseCache(db_path=str(tmp_path / "cache.db"))), \
+                patch.object(brain_service_module._provider_orch, "agenerate", fake.agenerate):
+            single = await BrainService().process(items[0])
+            results = await BrainService().process_batch(items)
+
+        assert single["success"] is True
+        assert all(r["success"] for r in results)
+
+    def test_split_batch_response(self):
+        response = 'Here you go:\n[{"document_index": 2, "n": "b"}, {"document_index": 1, "n": "a"}]'
+        assert _split_batch_response(response, 2) == [{"n": "a"}, {"n": "b"}]
+        assert _split_batch_response(response, 3) is None
+        assert _split_batch_response("{}", 1) is None
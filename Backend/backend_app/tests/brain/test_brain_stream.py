@@ -0,0 +1,133 @@
+"""
+Brain Streaming Tests
+
+Covers token streaming for chat flows:
+- ProviderOrchestrator.astream fallback rules (only before the first token)
+- BrainService.process_stream event contract and cache replay
+"""
+
+import pytest
+from unittest.mock import patch
+
+from backend_app.brain_module import brain_service as brain_service_module
+from backend_app.brain_module.brain_service import BrainService
+from backend_app.brain_module.cache.response_cache import ResponseCache
+from backend_app.tests.brain.test_provider_orchestrator import FakeProvider, make_orchestrator, isolated_usage_state  # noqa: F401
+
+
+class StreamingProvider(FakeProvider):
+    """Yields the configured chunks; fail_after raises once that many chunks were sent"""
+
+    def __init__(self, name: str, chunks, fail_after=None):
+        super().__init__(name)
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    async def stream(self, payload, timeout=60):
+        self.calls += 1
+        for i, chunk in enumerate(self.chunks):
+            if self.fail_after is not None and i == self.fail_after:
+                raise RuntimeError("503 Service Unavailable")
+            yield chunk
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+class TestOrchestratorStream:
+    """Test suite for ProviderOrchestrator.astream"""
+
+    @pytest.mark.asyncio
+    async def test_streams_deltas_then_done(self):
+        orch = make_orchestrator(StreamingProvider("groq", ["Hel", "lo"]))
+
+        events = await collect(orch.astream({"prompt": "hi"}))
+
+        assert [e["text"] for e in events if e["type"] == "delta"] == ["Hel", "lo"]
+        assert events[-1]["type"] == "done"
+        assert events[-1]["success"] is True
+        assert events[-1]["response"] == "Hello"
+        assert events[-1]["provider"] == "provider1_groq"
+
+    @pytest.mark.asyncio
+    async def test_records_time_to_first_token_apart_from_hedging_latency(self):
+        orch = make_orchestrator(StreamingProvider("groq", ["Hel", "lo"]))
+
+        await collect(orch.astream({"prompt": "hi"}))
+
+        assert orch.first_token_stats()["provider1_groq"]["count"] == 1
+        assert orch.latency_stats() == {}
+
+    @pytest.mark.asyncio
+    async def test_falls_back_before_first_token(self):
+        orch = make_orchestrator(StreamingProvider("groq", ["x"], fail_after=0), StreamingProvider("gemini", ["ok"]))
+
+        events = await collect(orch.astream({"prompt": "hi"}))
+
+        assert [e["type"] for e in events] == ["delta", "done"]
+        assert events[-1]["provider"] == "provider2_gemini"
+
+    @pytest.mark.asyncio
+    async def test_no_fallback_after_first_token(self):
+        second = StreamingProvider("gemini", ["ok"])
+        orch = make_orchestrator(StreamingProvider("groq", ["part", "rest"], fail_after=1), second)
+
+        events = await collect(orch.astream({"prompt": "hi"}))
+
+        assert second.calls == 0
+        assert events[-1]["success"] is False
+        assert events[-1]["response"] == "part"
+
+    @pytest.mark.asyncio
+    async def test_default_stream_uses_agenerate(self):
+        orch = make_orchestrator(FakeProvider("groq", text="whole answer"))
+
+        events = await collect(orch.astream({"prompt": "hi"}))
+
+        assert [e["type"] for e in events] == ["delta", "done"]
+        assert events[-1]["response"] == "whole answer"
+
+
+class TestProcessStream:
+    """Test suite for BrainService.process_stream"""
+
+    @pytest.mark.asyncio
+    async def test_done_event_carries_process_contract(self):
+        orch = make_orchestrator(StreamingProvider("groq", ["a", "b"]))
+        with patch.object(brain_service_module, "_provider_orch", orch):
+            events = await collect(BrainService().process_stream({"qid": "q1", "text": "hello", "intake_type": "chat"}))
+
+        done = events[-1]
+        assert done["type"] == "done"
+        assert {"qid", "success", "provider", "model", "response", "usage", "error", "cached"} <= set(done)
+        assert done["qid"] == "q1"
+        assert done["response"] == "ab"
+        assert done["cached"] is False
+
+    @pytest.mark.asyncio
+    async def test_missing_meta_is_treated_as_empty(self, tmp_path):
+        orch = make_orchestrator(StreamingProvider("groq", ['{"name": "Ann"}']))
+        qitem = {"qid": "q1", "text": "Ann resume", "intake_type": "resume_parse", "meta": None}
+        with patch.object(brain_service_module, "_provider_orch", orch), \
+                patch.object(brain_service_module, "_response_cache", ResponseCache(db_path=str(tmp_path / "cache.db"))):
+            events = await collect(BrainService().process_stream(qitem))
+
+        assert events[-1]["success"] is True
+
+    @pytest.mark.asyncio
+    async def test_cached_result_is_replayed(self, tmp_path):
+
+        provider = StreamingProvider("groq", ['{"name": ', '"Ann"}'])
+        orch = make_orchestrator(provider)
+        qitem = {"qid": "q1", "text": "Ann resume", "intake_type": "resume_parse"}
+        with patch.object(brain_service_module, "_provider_orch", orch), \
+                patch.object(brain_service_module, "_response_cache", ResponseCache(db_path=str(tmp_path / "cache.db"))):
+            await collect(BrainService().process_stream(qitem))
+            events = await collect(BrainService().process_stream(qitem))
+
+        assert provider.calls == 1
+        assert [e["type"] for e in events] == ["delta", "field", "done"]
+        assert events[0]["text"] == '{"name": "Ann"}'
+        assert events[-1]["cached"] is True
+
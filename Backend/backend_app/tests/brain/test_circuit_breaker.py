@@ -0,0 +1,130 @@
+"""
+Circuit Breaker Tests
+
+Covers the per-provider circuit breaker used by ProviderOrchestrator:
+- error classification
+- per-class thresholds and exponential backoff
+- half-open single probe
+- orchestrator wiring (cooldown mirrors the open time)
+"""
+
+import pytest
+from unittest.mock import patch
+
+from backend_app.brain_module.providers import circuit_breaker as cb
+from backend_app.brain_module.providers.circuit_breaker import CircuitBreaker, classify_error
+from backend_app.tests.brain.test_provider_orchestrator import FakeProvider, make_orchestrator, isolated_usage_state  # noqa: F401
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    c = Clock()
+    with patch.object(cb.time, "time", c):
+        yield c
+
+
+class TestCircuitBreaker:
+    """Test suite for CircuitBreaker"""
+
+    @pytest.mark.parametrize("error,expected", [
+        ("Error code: 429 - rate limit reached", "rate_limit"),
+        ("RESOURCE_EXHAUSTED: quota exceeded", "rate_limit"),
+        ("401 Unauthorized: invalid api key", "auth"),
+        ("timeout after 60s", "timeout"),
+        ("503 Service Unavailable", "server"),
+        ("something odd", "other"),
+        (None, "other"),
+    ])
+    def test_classify_error(self, error, expected):
+        assert classify_error(error) == expected
+
+    def test_rate_limit_opens_for_seconds_not_a_day(self, clock):
+        breaker = CircuitBreaker()
+
+        seconds = breaker.record_failure("p1", "429 Too Many Requests")
+
+        assert seconds == cb.ERROR_POLICIES["rate_limit"][1]
+        assert seconds < 3600
+        assert breaker.allow("p1") is False
+
+    def test_timeouts_need_several_failures(self, clock):
+        breaker = CircuitBreaker()
+        threshold = cb.ERROR_POLICIES["timeout"][0]
+
+        for _ in range(threshold - 1):
+            assert breaker.record_failure("p1", "timeout after 60s") == 0
+            assert breaker.allow("p1") is True
+
+        assert breaker.record_failure("p1", "timeout after 60s") > 0
+        assert breaker.state("p1") == cb.OPEN
+
+    def test_half_open_allows_one_probe_then_closes(self, clock):
+        breaker = CircuitBreaker()
+        seconds = breaker.record_failure("p1", "429")
+        clock.now += seconds
+
+        assert breaker.state("p1") == cb.HALF_OPEN
+        assert breaker.allow("p1") is True
+        assert breaker.allow("p1") is False  # probe already in flight
+
+        breaker.record_success("p1")
+        assert breaker.state("p1") == cb.CLOSED
+        assert breaker.allow("p1") is True
+
+    def test_failed_probe_backs_off_exponentially(self, clock):
+        breaker = CircuitBreaker(max_open_seconds=100)
+        base = cb.ERROR_POLICIES["rate_limit"][1]
+
+        first = breaker.record_failure("p1", "429")
+        clock.now += first
+        assert breaker.allow("p1") is True
+        second = breaker.record_failure("p1", "429")
+        clock.now += second
+        assert breaker.allow("p1") is True
+        third = breaker.record_failure("p1", "429")
+
+        assert (first, second) == (base, base * 2)
+        assert third == min(100, base * 4)
+
+    def test_released_probe_can_be_retried(self, clock):
+        breaker = CircuitBreaker()
+        clock.now += breaker.record_failure("p1", "429")
+        assert breaker.allow("p1") is True
+
+        breaker.release("p1")
+
+        assert breaker.allow("p1") is True
+
+
+class TestOrchestratorCircuit:
+    """ProviderOrchestrator wiring"""
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_sets_matching_cooldown(self):
+        orch = make_orchestrator(FakeProvider("groq", fail=True, error="401 invalid api key"), FakeProvider("gemini"))
+
+        with patch.object(orch.usage, "set_cooldown", wraps=orch.usage.set_cooldown) as set_cooldown:
+            result = await orch.agenerate({"prompt": "hi"})
+
+        assert result["provider"] == "provider2_gemini"
+        set_cooldown.assert_called_once_with("provider1_groq", cb.ERROR_POLICIES["auth"][1])
+        assert orch.circuit_stats()["provider1_groq"]["last_error_class"] == "auth"
+
+    @pytest.mark.asyncio
+    async def test_single_transient_error_keeps_provider_in_rotation(self):
+        flaky = FakeProvider("groq", fail=True, error="503 Service Unavailable")
+        orch = make_orchestrator(flaky, FakeProvider("gemini"))
+
+        await orch.agenerate({"prompt": "hi"})
+        flaky.fail = False
+        result = await orch.agenerate({"prompt": "hi"})
+
+        assert result["provider"] == "provider1_groq"
@@ -0,0 +1,76 @@
+"""
+Gemini Provider Tests
+
+Covers the REST transport of GeminiProvider:
+- the API key travels in the x-goog-api-key header, never in the URL (agenerate and stream)
+- upstream errors do not leak the key into the error message
+"""
+
+import httpx
+import pytest
+
+from backend_app.brain_module.providers.base_provider import BaseProvider
+from backend_app.brain_module.providers.gemini_provider import GeminiProvider
+
+API_KEY = "secret-gemini-key"
+
+
+def make_provider(handler) -> GeminiProvider:
+    """GeminiProvider on a mock transport (skips the SDK set-up in __init__)"""
+    provider = GeminiProvider.__new__(GeminiProvider)
+    BaseProvider.__init__(provider, name="gemini", api_key=API_KEY, model="gemini-test")
+    provider._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return provider
+
+
+class TestGeminiAgenerate:
+    """Test suite for GeminiProvider.agenerate"""
+
+    @pytest.mark.asyncio
+    async def test_key_is_sent_as_header(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": "hi"}]}}]})
+
+        result = await make_provider(handler).agenerate({"prompt": "hello"})
+
+        assert result["success"] is True
+        assert requests[0].headers["x-goog-api-key"] == API_KEY
+        assert API_KEY not in str(requests[0].url)
+
+    @pytest.mark.asyncio
+    async def test_error_does_not_leak_key(self):
+        result = await make_provider(lambda request: httpx.Response(429)).agenerate({"prompt": "hello"})
+
+        assert result["success"] is False
+        assert "429" in result["error"]
+        assert API_KEY not in result["error"]
+
+
+class TestGeminiStream:
+    """Test suite for GeminiProvider.stream"""
+
+    @pytest.mark.asyncio
+    async def test_key_is_sent_as_header(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, text='data: {"candidates": [{"content": {"parts": [{"text": "hi"}]}}]}\n\n')
+
+        chunks = [chunk async for chunk in make_provider(handler).stream({"prompt": "hello"})]
+
+        assert chunks == ["hi"]
+        assert requests[0].headers["x-goog-api-key"] == API_KEY
+        assert requests[0].url.params["alt"] == "sse"
+        assert API_KEY not in str(requests[0].url)
+
+    @pytest.mark.asyncio
+    async def test_error_does_not_leak_key(self):
+        with pytest.raises(httpx.HTTPStatusError) as exc:
+            async for _ in make_provider(lambda request: httpx.Response(500)).stream({"prompt": "hello"}):
+                pass
+
+        assert API_KEY not in str(exc.value)
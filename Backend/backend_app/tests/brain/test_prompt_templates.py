@@ -0,0 +1,100 @@
+"""
+Prompt Template Registry Tests
+
+Covers the compiled prompt templates used by PromptBuilder:
+- rendering is identical to a full Jinja render
+- version hashes change with the template source
+- static prefix token counts are reported by PromptBuilder.build
+- PromptBuilder.build_batch renders the dedicated multi-document templates
+"""
+
+from jinja2 import Template
+
+from backend_app.brain_module.prompt_builder.prompt_builder import PromptBuilder
+from backend_app.brain_module.prompt_builder.template_registry import (
+    CompiledTemplate,
+    TemplateRegistry,
+    TEMPLATE_REGISTRY,
+    estimate_tokens,
+)
+
+
+class TestTemplateRegistry:
+    """Test suite for TemplateRegistry"""
+
+    def test_render_matches_full_jinja_render(self):
+        builder = PromptBuilder()
+        for renderer, context in [
+            (builder.resume_renderer, {"resume_text": "Jane Doe\njane@example.com", "source_type": "text", "filename": "cv.pdf"}),
+            (builder.jd_renderer, {"jd_text": "Backend engineer", "source_type": "text", "filename": "unknown"}),
+            (builder.match_renderer, {"candidate_data": "{'skills': ['python']}", "job_data": "Python dev"}),
+        ]:
+            assert renderer.compiled.render(**context) == Template(renderer.template).render(**context)
+
+    def test_static_prefix_stops_at_first_variable(self):
+        compiled = CompiledTemplate("t", "Static part\n{{ x }} tail")
+
+        assert compiled.static_prefix == "Static part\n"
+        assert compiled.render(x="value") == "Static part\nvalue tail"
+        assert compiled.static_prefix_tokens == estimate_tokens("Static part\n")
+
+    def test_version_follows_source(self):
+        registry = TemplateRegistry()
+        first = registry.register("t", "A {{ x }}")
+
+        assert registry.register("t", "A {{ x }}") is first
+        assert registry.register("t", "B {{ x }}").version != first.version
+        assert registry.render("t", x=1) == "B 1"
+
+    def test_renderers_compile_once(self):
+        PromptBuilder()
+        compiled = TEMPLATE_REGISTRY.get("resume_parse")
+
+        PromptBuilder()
+
+        assert TEMPLATE_REGISTRY.get("resume_parse") is compiled
+        assert set(TEMPLATE_REGISTRY.describe()) >= {"resume_parse", "jd_parse", "match"}
+
+
+class TestPromptBuilderTemplateInfo:
+    """PromptBuilder.build template metadata"""
+
+    def test_build_reports_template_version_and_prefix_tokens(self):
+        built = PromptBuilder().build("Jane Doe", intake_type="resume_parse")
+
+        compiled = TEMPLATE_REGISTRY.get("resume_parse")
+        assert built["template"] == "resume_parse"
+        assert built["template_version"] == compiled.version
+        assert built["static_prefix_tokens"] > compiled.static_prefix_tokens > 0
+        assert built["provider_payload"]["messages"][1]["content"].startswith(compiled.static_prefix)
+
+    def test_chat_has_no_template(self):
+        built = PromptBuilder().build("hello", intake_type="chat")
+
+        assert built["template"] is None
+        assert built["template_version"] is None
+
+
+class TestPromptBuilderBatch:
+    """PromptBuilder.build_batch multi-document templates"""
+
+    def test_resume_batch_uses_batch_template(self):
+        built = PromptBuilder().build_batch(["Jane Doe\nSkills\nPython", "John Roe\nSkills\nGo"])
+        prompt = built["rendered_prompt"]
+
+        assert built["template"] == "resume_parse_batch"
+        assert built["document_count"] == 2
+        assert "Return ONLY a JSON array with exactly 2 objects" in prompt
+        assert "Return ONLY the final JSON." not in prompt
+        assert "Resume Text:" not in prompt  # documents are not nested inside the single-resume template
+        assert prompt.index("=== DOCUMENT 1 ===\nJane Doe") < prompt.index("=== DOCUMENT 2 ===\nJohn Roe")
+        assert "response_format" not in built["provider_payload"]
+
+    def test_batch_template_shares_the_single_task(self):
+        single = TEMPLATE_REGISTRY.get("jd_parse")
+        built = PromptBuilder().build_batch(["Backend engineer", "Data analyst"], intake_type="jd_parse")
+
+        task = single.static_prefix.split("- Return ONLY the final JSON.")[0]
+        assert built["template"] == "jd_parse_batch"
+        assert built["rendered_prompt"].startswith(task)
+        assert "Return ONLY a JSON array with exactly 2 objects" in built["rendered_prompt"]
@@ -0,0 +1,202 @@
+"""
+ProviderOrchestrator Tests
+
+Covers the async provider path (agenerate) used by BrainService:
+- fallback order and usage accounting
+- timeouts treated as provider failures
+- many concurrent requests on one event loop
+- hedged racing driven by rolling latency percentiles
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from backend_app.brain_module.providers import provider_usage
+from backend_app.brain_module.providers.base_provider import BaseProvider
+from backend_app.brain_module.providers.provider_orchestrator import ProviderOrchestrator
+
+
+class FakeProvider(BaseProvider):
+    """Provider stub with a native async path and configurable behaviour"""
+
+    def __init__(self, name: str, text: str = "{}", fail: bool = False, delay: float = 0.0,
+                 error: str = "429 Too Many Requests"):
+        super().__init__(name=name, api_key="test-key", model=f"{name}-model")
+        self.text = text
+        self.fail = fail
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = False
+
+    def generate(self, payload, timeout=60):
+        raise AssertionError("sync path must not be used by agenerate")
+
+    async def agenerate(self, payload, timeout=60):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            return {"success": False, "text": "", "usage": {}, "error": self.error}
+        return {"success": True, "text": self.text, "usage": {"total_tokens": 3}}
+
+
+def make_orchestrator(*providers) -> ProviderOrchestrator:
+    with patch("backend_app.brain_module.providers.provider_orchestrator.create_provider_from_env", return_value=None):
+        orch = ProviderOrchestrator(provider_count=0)
+    orch.providers = [
+        {"slot": i, "inst": inst, "type": inst.name, "model": inst.model}
+        for i, inst in enumerate(providers, start=1)
+    ]
+    return orch
+
+
+@pytest.fixture(autouse=True)
+def isolated_usage_state(tmp_path):
+    """Keep usage counters out of the committed state file"""
+    with patch.object(provider_usage, "STATE_FILE", tmp_path / "provider_usage_state.json"), \
+            patch.object(provider_usage, "USAGE_DB", tmp_path / "provider_usage_state.db"):
+        yield
+
+
+class TestProviderOrchestratorAsync:
+    """Test suite for ProviderOrchestrator.agenerate"""
+
+    @pytest.mark.asyncio
+    async def test_agenerate_returns_first_success(self):
+        primary = FakeProvider("groq", text='{"name": "A"}')
+        secondary = FakeProvider("gemini")
+        orch = make_orchestrator(primary, secondary)
+
+        result = await orch.agenerate({"prompt": "hi"})
+
+        assert result["success"] is True
+        assert result["provider"] == "provider1_groq"
+        assert result["response"] == '{"name": "A"}'
+        assert secondary.calls == 0
+        assert orch.usage.get_state("provider1_groq")["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_agenerate_falls_back_and_cools_down_failed_provider(self):
+        primary = FakeProvider("groq", fail=True)
+        secondary = FakeProvider("gemini", text="ok")
+        orch = make_orchestrator(primary, secondary)
+
+        result = await orch.agenerate({"prompt": "hi"})
+
+        assert result["success"] is True
+        assert result["provider"] == "provider2_gemini"
+        assert orch.usage.can_use("provider1_groq", orch.daily_limit) is False
+
+    @pytest.mark.asyncio
+    async def test_agenerate_timeout_counts_as_failure(self):
+        slow = FakeProvider("openrouter", delay=0.5)
+        fast = FakeProvider("gemini", text="ok")
+        orch = make_orchestrator(slow, fast)
+
+        result = await orch.agenerate({"prompt": "hi"}, timeout=0.05)
+
+        assert result["success"] is True
+        assert result["provider"] == "provider2_gemini"
+
+    @pytest.mark.asyncio
+    async def test_agenerate_all_failed(self):
+        orch = make_orchestrator(FakeProvider("groq", fail=True))
+
+        result = await orch.agenerate({"prompt": "hi"})
+
+        assert result["success"] is False
+        assert result["error"] == "429 Too Many Requests"
+
+    @pytest.mark.asyncio
+    async def test_agenerate_many_in_flight_requests(self):
+        provider = FakeProvider("groq", text="ok", delay=0.05)
+        orch = make_orchestrator(provider)
+
+        results = await asyncio.gather(*[orch.agenerate({"prompt": str(i)}) for i in range(200)])
+
+        assert all(r["success"] for r in results)
+        assert provider.calls == 200
+
+    @pytest.mark.asyncio
+    async def test_base_provider_agenerate_falls_back_to_thread(self):
+        class SyncOnly(BaseProvider):
+            def generate(self, payload, timeout=60):
+                return {"success": True, "text": payload["prompt"], "usage": {}}
+
+        res = await SyncOnly("sync", "key", "m").agenerate({"prompt": "echo"})
+
+        assert res["text"] == "echo"
+
+
+class TestProviderOrchestratorHedging:
+    """Test suite for hedged agenerate"""
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        slow = FakeProvider("groq", text="slow", delay=1.0)
+        fast = FakeProvider("gemini", text="fast", delay=0.01)
+        orch = make_orchestrator(slow, fast)
+        for _ in range(orch.latency.min_samples):
+            orch.latency.observe("provider1_groq", 0.05)
+
+        with patch("backend_app.brain_module.providers.provider_orchestrator.HEDGE_MIN_DELAY_SECONDS", 0.0):
+            result = await orch.agenerate({"prompt": "hi"}, hedge=True)
+            await asyncio.sleep(0.05)  # let the cancellation reach the loser
+
+        assert result["response"] == "fast"
+        assert result["provider"] == "provider2_gemini"
+        assert slow.cancelled is True
+        assert orch.usage.can_use("provider1_groq", orch.daily_limit) is True
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self):
+        primary = FakeProvider("groq", text="primary", delay=0.01)
+        secondary = FakeProvider("gemini", text="secondary")
+        orch = make_orchestrator(primary, secondary)
+
+        result = await orch.agenerate({"prompt": "hi"}, hedge=True)
+
+        assert result["response"] == "primary"
+        assert secondary.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_hedged_failure_falls_back_immediately(self):
+        failing = FakeProvider("groq", fail=True)
+        backup = FakeProvider("gemini", text="backup")
+        orch = make_orchestrator(failing, backup)
+
+        result = await orch.agenerate({"prompt": "hi"}, hedge=True)
+
+        assert result["response"] == "backup"
+        assert orch.usage.can_use("provider1_groq", orch.daily_limit) is False
+
+    @pytest.mark.asyncio
+    async def test_failed_hedge_starts_next_slot_while_primary_runs(self):
+        slow = FakeProvider("groq", text="slow", delay=1.0)
+        failing = FakeProvider("gemini", fail=True, delay=0.01)
+        backup = FakeProvider("openrouter", text="backup", delay=0.01)
+        orch = make_orchestrator(slow, failing, backup)
+        for _ in range(orch.latency.min_samples):
+            orch.latency.observe("provider1_groq", 0.05)
+
+        with patch("backend_app.brain_module.providers.provider_orchestrator.HEDGE_MIN_DELAY_SECONDS", 0.0):
+            result = await orch.agenerate({"prompt": "hi"}, hedge=True)
+            await asyncio.sleep(0.05)
+
+        assert result["response"] == "backup"
+        assert slow.cancelled is True
+
+    def test_hedge_delay_uses_rolling_p95(self):
+        orch = make_orchestrator(FakeProvider("groq"))
+        assert orch.hedge_delay("provider1_groq") > 0  # default before warm-up
+
+        for i in range(1, 101):
+            orch.latency.observe("provider1_groq", float(i))
+
+        assert orch.latency.percentile("provider1_groq", 0.95) == 95.0
+        assert orch.hedge_delay("provider1_groq") == 95.0
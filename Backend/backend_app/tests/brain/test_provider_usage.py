@@ -0,0 +1,121 @@
+"""
+ProviderUsageManager Tests
+
+Covers the SQLite-backed usage store:
+- no lost increments under concurrent threads
+- counters shared between manager instances (API + Celery workers)
+- cooldowns written at once, daily reset and legacy JSON import
+- can_use / get_state / record_success / set_cooldown never call SQLite (event-loop safe)
+"""
+
+import json
+import threading
+import pytest
+from unittest.mock import patch
+
+from backend_app.brain_module.providers import provider_usage
+from backend_app.brain_module.providers.provider_usage import ProviderUsageManager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    with patch.object(provider_usage, "STATE_FILE", tmp_path / "provider_usage_state.json"):
+        yield tmp_path / "usage.db"
+
+
+def make_manager(db_path, **kwargs) -> ProviderUsageManager:
+    kwargs.setdefault("flush_interval", 60)
+    kwargs.setdefault("read_ttl", 60)
+    return ProviderUsageManager(db_path=db_path, **kwargs)
+
+
+class TestProviderUsageManager:
+    """Test suite for ProviderUsageManager"""
+
+    def test_concurrent_increments_are_not_lost(self, db_path):
+        manager = make_manager(db_path, flush_max_pending=7)
+
+        def worker():
+            for _ in range(250):
+                manager.record_success("provider1_groq")
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        manager.flush()
+
+        assert make_manager(db_path).get_state("provider1_groq")["count"] == 2000
+
+    def test_writes_are_coalesced(self, db_path):
+        manager = make_manager(db_path, flush_max_pending=1000)
+        with patch.object(manager, "_conn", wraps=manager._conn) as conn:
+            for _ in range(100):
+                manager.record_success("provider1_groq")
+            assert conn.call_count == 0
+
+        assert manager.get_state("provider1_groq")["count"] == 100
+
+    def test_counts_are_shared_between_workers(self, db_path):
+        api_worker = make_manager(db_path)
+        celery_worker = make_manager(db_path)
+
+        for _ in range(3):
+            api_worker.record_success("provider1_groq")
+        for _ in range(2):
+            celery_worker.record_success("provider1_groq")
+        api_worker.flush()
+        celery_worker.flush()
+        api_worker.refresh()
+
+        assert api_worker.get_state("provider1_groq")["count"] == 5
+        assert api_worker.can_use("provider1_groq", daily_limit=5) is False
+        assert celery_worker.can_use("provider1_groq", daily_limit=6) is True
+
+    def test_cooldown_is_visible_to_other_workers(self, db_path):
+        manager = make_manager(db_path)
+        other = make_manager(db_path)
+        manager.set_cooldown("provider2_gemini", 3600)
+
+        assert manager.can_use("provider2_gemini", daily_limit=1000) is False
+        manager.flush()  # normally done at once by the woken background thread
+        other.refresh()
+        assert other.can_use("provider2_gemini", daily_limit=1000) is False
+
+    def test_request_path_never_calls_sqlite(self, db_path):
+        manager = make_manager(db_path, flush_max_pending=2)
+        callers = []
+        connect = manager._conn
+
+        def tracked_conn():
+            callers.append(threading.current_thread())
+            return connect()
+
+        with patch.object(manager, "_conn", side_effect=tracked_conn):
+            for _ in range(3):
+                manager.record_success("provider1_groq")
+            manager.set_cooldown("provider2_gemini", 60)
+            assert manager.can_use("provider1_groq", daily_limit=1000) is True
+            assert manager.can_use("provider2_gemini", daily_limit=1000) is False
+            assert manager.get_state("provider1_groq")["count"] == 3
+
+        assert threading.current_thread() not in callers
+
+    def test_daily_reset(self, db_path):
+        manager = make_manager(db_path)
+        with patch.object(provider_usage, "today_date_str", return_value="2025-01-01"):
+            manager.record_success("provider1_groq")
+            manager.flush()
+        with patch.object(provider_usage, "today_date_str", return_value="2025-01-02"):
+            assert manager.get_state("provider1_groq")["count"] == 0
+            manager.record_success("provider1_groq")
+            manager.flush()
+            assert manager.get_state("provider1_groq")["count"] == 1
+
+    def test_imports_legacy_json_state(self, db_path):
+        provider_usage.STATE_FILE.write_text(json.dumps({
+            "provider1_openrouter": {"date": "2099-01-01", "count": 4, "cooldown_until": 0}
+        }))
+        with patch.object(provider_usage, "today_date_str", return_value="2099-01-01"):
+            assert make_manager(db_path).get_state("provider1_openrouter")["count"] == 4
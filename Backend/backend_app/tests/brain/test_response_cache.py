@@ -0,0 +1,153 @@
+"""
+Brain Response Cache Tests
+
+Covers the content-addressed response cache:
+- key derivation
+- memory LRU and SQLite tiers, TTL and periodic size-based eviction
+- async access running SQLite in a worker thread
+- BrainService.process serving repeats without a provider call
+"""
+
+import threading
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from backend_app.brain_module import brain_service as brain_service_module
+from backend_app.brain_module.brain_service import BrainService
+from backend_app.brain_module.cache.response_cache import ResponseCache, make_cache_key
+
+
+RESULT = {"success": True, "provider": "provider1_groq", "model": "m", "response": '{"name": "A"}', "usage": {}}
+
+
+class TestResponseCache:
+    """Test suite for ResponseCache"""
+
+    def test_key_depends_on_mode_prompt_and_model(self):
+        base = make_cache_key("resume_parse", "prompt", "groq:m")
+        assert base == make_cache_key("resume_parse", "prompt", "groq:m")
+        assert base != make_cache_key("jd_parse", "prompt", "groq:m")
+        assert base != make_cache_key("resume_parse", "prompt2", "groq:m")
+        assert base != make_cache_key("resume_parse", "prompt", "gemini:m")
+        assert base != make_cache_key("resume_parse", "prompt", "groq:m", "v2")
+        assert base != make_cache_key("resume_parse", "prompt", "groq:m", json_mode=True)
+
+    def test_memory_lru_eviction(self):
+        cache = ResponseCache(db_path=None, memory_items=2)
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})
+        assert cache.get("a") == {"v": 1}  # a becomes most recent
+        cache.set("c", {"v": 3})
+
+        assert cache.get("b") is None
+        assert cache.get("a") == {"v": 1}
+        assert cache.get("c") == {"v": 3}
+
+    def test_disk_tier_survives_new_instance(self, tmp_path):
+        db = tmp_path / "cache.db"
+        ResponseCache(db_path=db).set("k", {"v": 1})
+
+        fresh = ResponseCache(db_path=db)
+        assert fresh.get("k") == {"v": 1}
+        assert fresh.stats()["disk_hits"] == 1
+        assert fresh.get("k") == {"v": 1}
+        assert fresh.stats()["memory_hits"] == 1
+
+    def test_disk_tier_opened_on_first_use(self, tmp_path):
+        db = tmp_path / "logs" / "cache.db"
+        cache = ResponseCache(db_path=db)
+        assert not db.parent.exists()
+
+        assert cache.get("k") is None
+        assert db.exists()
+
+    def test_ttl_expiry(self, tmp_path):
+        cache = ResponseCache(db_path=tmp_path / "cache.db", ttl_seconds=10)
+        with patch("backend_app.brain_module.cache.response_cache.now_ts", return_value=1000):
+            cache.set("k", {"v": 1})
+        with patch("backend_app.brain_module.cache.response_cache.now_ts", return_value=1011):
+            assert cache.get("k") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_disk_size_eviction(self, tmp_path):
+        cache = ResponseCache(db_path=tmp_path / "cache.db", memory_items=1, disk_items=3, evict_every=1)
+        for i in range(5):
+            with patch("backend_app.brain_module.cache.response_cache.now_ts", return_value=1000 + i):
+                cache.set(f"k{i}", {"v": i})
+
+        fresh = ResponseCache(db_path=tmp_path / "cache.db")
+        with patch("backend_app.brain_module.cache.response_cache.now_ts", return_value=1005):
+            assert fresh.get("k0") is None
+            assert fresh.get("k1") is None
+            assert fresh.get("k4") == {"v": 4}
+        assert cache.stats()["evictions"] == 2
+
+    def test_disk_eviction_runs_every_n_stores(self, tmp_path):
+        cache = ResponseCache(db_path=tmp_path / "cache.db", memory_items=1, disk_items=1, evict_every=3)
+        evictions = []
+        for i in range(6):
+            cache.set(f"k{i}", {"v": i})
+            evictions.append(cache.stats()["evictions"])
+
+        assert evictions == [0, 0, 2, 2, 2, 5]
+
+    @pytest.mark.asyncio
+    async def test_async_access_keeps_sqlite_off_the_event_loop(self, tmp_path):
+        cache = ResponseCache(db_path=tmp_path / "cache.db", memory_items=1)
+        loop_thread = threading.get_ident()
+        conn_threads = []
+        conn = cache._conn
+
+        def tracking_conn():
+            conn_threads.append(threading.get_ident())
+            return conn()
+
+        with patch.object(cache, "_conn", tracking_conn):
+            await cache.aset("a", {"v": 1})
+            await cache.aset("b", {"v": 2})
+            assert await cache.aget("b") == {"v": 2}  # memory hit, no SQLite
+            assert await cache.aget("a") == {"v": 1}  # disk hit
+            assert await cache.aget("missing") is None
+
+        assert len(conn_threads) == 5  # table set-up, two writes, two reads
+        assert loop_thread not in conn_threads
+        assert cache.stats()["memory_hits"] == 1
+        assert cache.stats()["disk_hits"] == 1
+
+
+class TestBrainServiceCaching:
+    """BrainService.process integration with the response cache"""
+
+    @pytest.mark.asyncio
+    async def test_repeat_resume_parse_uses_cache(self, tmp_path):
+        cache = ResponseCache(db_path=tmp_path / "cache.db")
+        agenerate = AsyncMock(return_value=RESULT)
+        with patch.object(brain_service_module, "_response_cache", cache), \
+                patch.object(brain_service_module._provider_orch, "agenerate", agenerate):
+            svc = BrainService()
+            qitem = {"qid": "q1", "text": "John Doe, Python", "intake_type": "resume_parse", "meta": {}}
+            first = await svc.process(qitem)
+            second = await svc.process({**qitem, "qid": "q2"})
+            stats = svc.cache_stats()
+
+        assert agenerate.await_count == 1
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert second["qid"] == "q2"
+        assert second["response"] == RESULT["response"]
+        assert stats["memory_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_chat_and_failures_are_not_cached(self, tmp_path):
+        cache = ResponseCache(db_path=tmp_path / "cache.db")
+        failing = AsyncMock(return_value={"success": False, "error": "down"})
+        with patch.object(brain_service_module, "_response_cache", cache), \
+                patch.object(brain_service_module._provider_orch, "agenerate", failing):
+            svc = BrainService()
+            await svc.process({"text": "resume", "intake_type": "resume_parse"})
+            await svc.process({"text": "resume", "intake_type": "resume_parse"})
+            await svc.process({"text": "hi", "intake_type": "chat"})
+            await svc.process({"text": "hi", "intake_type": "chat"})
+
+        assert failing.await_count == 4
+        assert cache.stats()["stores"] == 0
@@ -0,0 +1,124 @@
+"""
+Structured Output Tests
+
+Covers strict-JSON requests and response parsing:
+- response_format added to structured-mode payloads
+- parse_json_response fast path and prose/code-fence recovery
+- StreamingJSONParser incremental fields and schema validation
+- field events from BrainService.process_stream
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+
+from backend_app.brain_module import brain_service as brain_service_module
+from backend_app.brain_module.brain_service import BrainService
+from backend_app.brain_module.parsing.structured_output import (
+    OUTPUT_SCHEMAS,
+    StreamingJSONParser,
+    parse_json_response,
+)
+from backend_app.brain_module.prompt_builder.prompt_builder import PromptBuilder
+from backend_app.tests.brain.test_brain_stream import StreamingProvider, collect
+from backend_app.tests.brain.test_provider_orchestrator import make_orchestrator, isolated_usage_state  # noqa: F401
+
+JD_RESPONSE = {"job_title": "Backend Engineer", "required_skills": ["Python", "SQL"], "job_locations": ["Pune"],
+               "about": {"nested": "{not, a field}"}}
+
+
+class TestStrictJsonPayload:
+    """PromptBuilder strict-JSON payloads"""
+
+    def test_structured_modes_request_json(self):
+        built = PromptBuilder().build("Backend engineer", intake_type="jd_parse")
+
+        assert built["provider_payload"]["response_format"] == {"type": "json_object"}
+        assert built["json_mode"] is True
+
+    def test_chat_and_batch_do_not_request_json(self):
+        builder = PromptBuilder()
+
+        assert "response_format" not in builder.build("hi", intake_type="chat")["provider_payload"]
+        assert "response_format" not in builder.build_batch(["a", "b"])["provider_payload"]
+
+
+class TestParseJsonResponse:
+    """Test suite for parse_json_response"""
+
+    def test_strict_json_fast_path(self):
+        data, errors = parse_json_response(json.dumps(JD_RESPONSE), "jd_parse")
+
+        assert data == JD_RESPONSE
+        assert errors == []
+
+    def test_recovers_object_from_prose_and_fences(self):
+        text = "Sure! Here is the JSON:\n```json\n" + json.dumps(JD_RESPONSE) + "\n```\nLet me know."
+
+        data, errors = parse_json_response(text, "jd_parse")
+
+        assert data == JD_RESPONSE
+        assert errors == []
+
+    def test_reports_schema_mismatch(self):
+        data, errors = parse_json_response('{"required_skills": "Python", "match_score": 5}', "jd_parse")
+
+        assert data["required_skills"] == "Python"
+        assert errors == ["field 'required_skills' should be list, got str"]
+
+    def test_no_object(self):
+        data, errors = parse_json_response("I cannot help with that.", "resume_parse")
+
+        assert data is None
+        assert errors
+
+    def test_incomplete_object_is_not_data(self):
+        """A stream that ended mid-object must not parse as an (empty or partial) profile"""
+        data, errors = parse_json_response('{"job_title": "Backend Engineer", "required_skills": ["Py', "jd_parse")
+
+        assert data is None
+        assert errors == ["incomplete JSON object"]
+
+
+class TestStreamingJSONParser:
+    """Test suite for StreamingJSONParser"""
+
+    def test_fields_complete_as_chunks_arrive(self):
+        parser = StreamingJSONParser(OUTPUT_SCHEMAS["jd_parse"])
+        text = json.dumps(JD_RESPONSE)
+        emitted = []
+        for i in range(0, len(text), 7):
+            emitted.extend(parser.feed(text[i:i + 7]))
+
+        assert [k for k, _ in emitted] == list(JD_RESPONSE)
+        assert parser.close() == (JD_RESPONSE, [])
+
+    def test_strings_with_braces_and_escapes(self):
+        parser = StreamingJSONParser()
+        parser.feed('{"a": "x, {y}] \\"z\\"", "b": [1, {"c": 2}]}')
+
+        assert parser.close() == ({"a": 'x, {y}] "z"', "b": [1, {"c": 2}]}, [])
+
+    def test_truncated_object_keeps_completed_fields(self):
+        parser = StreamingJSONParser()
+        parser.feed('{"a": 1, "b": [2, ')
+
+        data, errors = parser.close()
+        assert data == {"a": 1}
+        assert errors == ["incomplete JSON object"]
+
+
+class TestProcessStreamFields:
+    """BrainService.process_stream field events"""
+
+    @pytest.mark.asyncio
+    async def test_field_events_and_validation(self):
+        text = json.dumps({"job_title": "Dev", "required_skills": "Python"})
+        orch = make_orchestrator(StreamingProvider("groq", [text[:20], text[20:]]))
+        with patch.object(brain_service_module, "_provider_orch", orch), \
+                patch.object(brain_service_module, "_response_cache", None):
+            events = await collect(BrainService().process_stream({"text": "Dev JD", "intake_type": "jd_parse"}))
+
+        fields = [(e["key"], e["value"]) for e in events if e["type"] == "field"]
+        assert fields == [("job_title", "Dev"), ("required_skills", "Python")]
+        assert events[-1]["validation_errors"] == ["field 'required_skills' should be list, got str"]
@@ -0,0 +1,128 @@
+"""
+Token Budget Tests
+
+Covers the input token budget applied by PromptBuilder:
+- boilerplate removal (page numbers, running headers/footers at page boundaries), over budget only
+- section-aware trimming by priority
+- tokens saved reporting
+"""
+
+from backend_app.brain_module.prompt_builder.prompt_builder import PromptBuilder
+from backend_app.brain_module.prompt_builder.template_registry import estimate_tokens
+from backend_app.brain_module.prompt_builder.token_budget import fit_to_budget, split_sections, strip_boilerplate
+
+
+def long_resume(pages: int = 30) -> str:
+    """Multi-page resume (pages separated by form feeds) with a running footer, page numbers and low-priority filler"""
+    parts = ["Jane Doe\njane@example.com\n+91 99999 99999"]
+    parts.append("Experience\n" + "\n".join(f"Engineer at Company {i}, built service {i}" for i in range(20)))
+    parts.append("Skills\nPython, SQL, Kafka")
+    parts.append("Education\nB.Tech, Example University, 2015")
+    parts.append("Hobbies\n" + "\n".join(f"Hobby line {i} " + "lorem ipsum " * 20 for i in range(200)))
+    body = "\n\n".join(parts)
+    lines = body.splitlines()
+    chunk = max(1, len(lines) // pages)
+    out = []
+    for page, start in enumerate(range(0, len(lines), chunk), start=1):
+        out.append("\n".join(lines[start:start + chunk] + ["Jane Doe - Curriculum Vitae - Confidential", str(page)]))
+    return "\f".join(out)
+
+
+class TestTokenBudget:
+    """Test suite for fit_to_budget"""
+
+    def test_strip_boilerplate_drops_footers_and_page_numbers(self):
+        cleaned, dropped = strip_boilerplate(long_resume(), "resume_parse")
+
+        assert cleaned.count("Confidential") == 1
+        assert "\n3\n" not in cleaned
+        assert dropped > 0
+        assert "jane@example.com" in cleaned
+
+    def test_page_labels_are_dropped_anywhere(self):
+        cleaned, dropped = strip_boilerplate("Jane Doe\nPage 2 of 3\nSkills\n- 3 -\nPython", "resume_parse")
+
+        assert cleaned == "Jane Doe\nSkills\nPython"
+        assert dropped == 2
+
+    def test_dates_and_repeated_body_lines_are_kept(self):
+        """Years in date columns and lines repeated through the work history are content."""
+        jobs = "\n".join(f"Engineer\nAcme Corp\nRemote\n2019\n2021\nBuilt service {i}" for i in range(4))
+        text = f"{jobs}\n1\f{jobs}\n2"
+
+        cleaned, dropped = strip_boilerplate(text, "resume_parse")
+
+        assert cleaned.count("2019") == 8
+        assert cleaned.count("Remote") == 8
+        assert dropped == 2  # the page numbers
+
+    def test_years_at_page_boundaries_are_kept(self):
+        cleaned, _ = strip_boilerplate("Experience\nAcme\n2019\f2020\nGlobex\n2021", "resume_parse")
+
+        assert ["2019", "2020", "2021"] == [l for l in cleaned.splitlines() if l.isdigit()]
+
+    def test_repeated_headings_are_kept(self):
+        text = "\n".join(f"Responsibilities\ndid thing {i}" for i in range(4))
+
+        cleaned, dropped = strip_boilerplate(text, "jd_parse")
+
+        assert cleaned.count("Responsibilities") == 4
+        assert dropped == 0
+
+    def test_over_budget_keeps_contact_experience_and_skills(self):
+        text, report = fit_to_budget(long_resume(), "resume_parse", max_tokens=600)
+
+        assert estimate_tokens(text) <= 600
+        assert "jane@example.com" in text
+        assert "Company 19" in text
+        assert "Kafka" in text
+        assert "Hobby line 150" not in text
+        assert report["truncated"] is True
+        assert report["tokens_saved"] == report["original_tokens"] - report["final_tokens"] > 0
+
+    def test_sections_keep_original_order(self):
+        text, _ = fit_to_budget(long_resume(), "resume_parse", max_tokens=600)
+
+        assert text.index("Experience") < text.index("Skills") < text.index("Education")
+
+    def test_short_input_is_unchanged(self):
+        text, report = fit_to_budget("Jane Doe\nSkills\nPython", "resume_parse", max_tokens=600)
+
+        assert text == "Jane Doe\nSkills\nPython"
+        assert report["truncated"] is False
+        assert report["tokens_saved"] == 0
+
+    def test_within_budget_is_not_stripped(self):
+        """Boilerplate is only stripped when the text is over budget."""
+        text = "Jane Doe\nPage 1 of 2\nExperience\n2019\fJane Doe\nPage 2 of 2"
+
+        out, report = fit_to_budget(text, "resume_parse", max_tokens=600)
+
+        assert out == text
+        assert report["boilerplate_lines_dropped"] == 0
+
+    def test_split_sections_assigns_priorities(self):
+        sections = split_sections("Jane\nExperience\nA\nHobbies\nB", "resume_parse")
+
+        assert [p for p, _ in sections] == [0, 0, 3]
+
+
+class TestPromptBuilderBudget:
+    """PromptBuilder.build budget integration"""
+
+    def test_build_reports_tokens_saved(self):
+        built = PromptBuilder().build(long_resume(), intake_type="resume_parse", meta={"max_input_tokens": 600})
+
+        assert built["token_budget"]["tokens_saved"] > 0
+        assert "Hobby line 150" not in built["rendered_prompt"]
+
+    def test_chat_is_not_budgeted(self):
+        built = PromptBuilder().build("hello", intake_type="chat")
+
+        assert built["token_budget"] is None
+
+    def test_build_batch_budgets_each_document(self):
+        built = PromptBuilder().build_batch([long_resume(), "John\nSkills\nGo"], meta={"max_input_tokens": 600})
+
+        assert "=== DOCUMENT 2 ===\nJohn" in built["rendered_prompt"]
+        assert built["token_budget"]["tokens_saved"] > 0
@@ -0,0 +1,142 @@
+"""
+Document Probe Tests
+
+Covers the one-time file inspection shared by the attempts of extract_with_logging:
+- page count, text-layer pages, image-only pages and producer metadata from one parse
+- font resources inherited from the page tree
+- quality_score reuses the probe instead of reopening the PDF
+- non-PDF and unreadable files fall back to a single page
+"""
+import pytest
+from unittest.mock import patch
+from PIL import Image
+from PyPDF2 import PageObject, PdfWriter
+from PyPDF2.generic import DictionaryObject, NameObject
+
+from backend_app.text_extraction import consolidated_extractor as ce
+from backend_app.text_extraction.document_probe import DocumentProbe, _page_resources
+from backend_app.text_extraction.extraction_cache import ExtractionCache
+
+
+def write_text_pdf(path, pages=2, producer="Microsoft Word"):
+    """PDF whose pages declare a font resource (i.e. born-digital text pages)"""
+    writer = PdfWriter()
+    for _ in range(pages):
+        page = PageObject.create_blank_page(width=200, height=200)
+        font = DictionaryObject({
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        })
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+        })
+        writer.add_page(page)
+    writer.add_metadata({"/Producer": producer})
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def write_inherited_font_pdf(path, pages=2):
+    """Text PDF whose font resources sit on the /Pages node and are inherited by every page"""
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_page(PageObject.create_blank_page(width=200, height=200))
+    for page in writer.pages:
+        del page[NameObject("/Resources")]
+    writer.pages[0]["/Parent"].get_object()[NameObject("/Resources")] = DictionaryObject({
+        NameObject("/Font"): DictionaryObject({NameObject("/F1"): DictionaryObject({
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        })}),
+    })
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+class TestDocumentProbe:
+    """Test suite for DocumentProbe"""
+
+    def test_text_pdf(self, tmp_path):
+        pdf = tmp_path / "cv.pdf"
+        write_text_pdf(pdf, pages=3)
+
+        probe = DocumentProbe(pdf)
+
+        assert probe.page_count == 3
+        assert probe.text_pages == 3
+        assert probe.image_only_pages == 0
+        assert probe.has_text_layer is True
+        assert probe.producer == "Microsoft Word"
+        assert probe.file_size == pdf.stat().st_size
+
+    def test_scanned_pdf_has_no_text_layer(self, tmp_path):
+        pdf = tmp_path / "scan.pdf"
+        Image.new("RGB", (50, 50), "white").save(pdf, save_all=True,
+                                                 append_images=[Image.new("RGB", (50, 50), "white")])
+
+        probe = DocumentProbe(pdf)
+
+        assert probe.page_count == 2
+        assert probe.image_only_pages == 2
+        assert probe.has_text_layer is False
+
+    def test_fonts_inherited_from_page_tree(self, tmp_path):
+        """Fonts declared on the /Pages node make every page a text page, not a scan"""
+        pdf = tmp_path / "cv.pdf"
+        write_inherited_font_pdf(pdf, pages=2)
+
+        probe = DocumentProbe(pdf)
+
+        assert probe.text_pages == 2
+        assert probe.has_text_layer is True
+
+    def test_page_resources_walk_parents(self):
+        fonts = DictionaryObject({NameObject("/Font"): DictionaryObject({NameObject("/F1"): DictionaryObject()})})
+        root = DictionaryObject({NameObject("/Type"): NameObject("/Pages"), NameObject("/Resources"): fonts})
+        middle = DictionaryObject({NameObject("/Type"): NameObject("/Pages"), NameObject("/Parent"): root})
+        page = DictionaryObject({NameObject("/Type"): NameObject("/Page"), NameObject("/Parent"): middle})
+
+        assert _page_resources(page) == fonts
+        assert _page_resources(DictionaryObject()) == {}
+
+    def test_non_pdf_and_broken_files(self, tmp_path):
+        docx = tmp_path / "cv.docx"
+        docx.write_bytes(b"PK")
+        broken = tmp_path / "broken.pdf"
+        broken.write_bytes(b"not a pdf")
+
+        assert DocumentProbe(docx).page_count == 1
+        assert DocumentProbe(docx).is_word is True
+        probe = DocumentProbe(broken)
+        assert probe.page_count == 1
+        assert probe.error is not None
+
+    def test_quality_score_uses_probe(self, tmp_path):
+        pdf = tmp_path / "cv.pdf"
+        write_text_pdf(pdf, pages=1)
+        probe = DocumentProbe(pdf)
+        text = "experience education skills " * 40
+
+        with patch.object(ce, "simple_page_count") as page_count:
+            score = ce.quality_score(text, pdf, probe)
+
+        page_count.assert_not_called()
+        assert score == ce.quality_score(text, pdf)
+
+    def test_extract_with_logging_parses_pdf_once(self, tmp_path):
+        pdf = tmp_path / "cv.pdf"
+        write_text_pdf(pdf, pages=2)
+        text = "experience education skills email phone " * 60
+
+        with patch.object(ce.extractor97, "extract_text_97_percent", return_value=text, create=True), \
+                patch.object(ce, "simple_page_count") as page_count, \
+                patch.object(ce, "extraction_cache", ExtractionCache(db_path=None)), \
+                patch.object(ce.logbook, "record") as record:
+            result = ce.extract_with_logging(pdf)
+
+        page_count.assert_not_called()
+        assert result["module"] == "unstructured_primary"
+        assert record.call_args[0][2] == 2
+        assert record.call_args[0][-1]["probe"]["has_text_layer"] is True
@@ -0,0 +1,130 @@
+"""
+Extraction Cache Tests
+
+Covers the SHA-256 keyed cache of extraction results:
+- round trip, size-bounded LRU eviction and opening the SQLite file on first use
+- extract_with_logging serves duplicates without running any attempt
+- cached results below the caller's quality threshold are not reused
+- final_97_percent_extractor.extract_text skips the Unstructured.io call for duplicates
+"""
+from unittest.mock import patch
+
+from backend_app.text_extraction import consolidated_extractor as ce
+from backend_app.text_extraction import final_97_percent_extractor as extractor97
+from backend_app.text_extraction.extraction_cache import ExtractionCache, bytes_sha256, file_sha256
+from backend_app.text_extraction.extraction_router import ExtractionRouter
+
+RESUME_TEXT = "experience education skills email phone " * 60
+
+
+class TestExtractionCache:
+    """Test suite for ExtractionCache"""
+
+    def test_round_trip(self, tmp_path):
+        cache = ExtractionCache(db_path=tmp_path / "cache.db")
+
+        cache.set("abc", "text", "pypdf2", 88.0, 2)
+
+        assert cache.get("abc") == {"text": "text", "module": "pypdf2", "score": 88.0, "page_count": 2}
+        assert cache.get("missing") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_file_is_created_on_first_use(self, tmp_path):
+        db = tmp_path / "logs" / "cache.db"
+        cache = ExtractionCache(db_path=db)
+        assert not db.exists()
+
+        cache.get("abc")
+
+        assert db.exists()
+
+    def test_evicts_least_recently_used_beyond_max_bytes(self, tmp_path):
+        cache = ExtractionCache(db_path=tmp_path / "cache.db", max_bytes=25)
+        cache.set("a", "x" * 10, "pypdf2")
+        cache.set("b", "y" * 10, "pypdf2")
+        cache.get("a")  # a is now more recent than b
+
+        cache.set("c", "z" * 10, "pypdf2")
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_file_and_bytes_hash_agree(self, tmp_path):
+        path = tmp_path / "cv.pdf"
+        path.write_bytes(b"%PDF-1.4 resume")
+
+        assert file_sha256(path) == bytes_sha256(b"%PDF-1.4 resume")
+
+
+class TestExtractWithLoggingCache:
+    """Test suite for the cache in extract_with_logging"""
+
+    def test_duplicate_document_skips_all_attempts(self, tmp_path):
+        first = tmp_path / "web_upload.docx"
+        first.write_bytes(b"PK same resume")
+        second = tmp_path / "whatsapp.docx"
+        second.write_bytes(b"PK same resume")
+
+        with patch.object(ce, "router", ExtractionRouter()), \
+                patch.object(ce, "extraction_cache", ExtractionCache(db_path=tmp_path / "cache.db")), \
+                patch.object(ce.unstructured_runner, "extract_text_from_docx", return_value=RESUME_TEXT,
+                             create=True) as docx, \
+                patch.object(ce.logbook, "record") as record:
+            ce.extract_with_logging(first)
+            result = ce.extract_with_logging(second)
+
+        assert docx.call_count == 1
+        assert result["cached"] is True
+        assert result["module"] == "docx_extractor"
+        assert result["text"] == RESUME_TEXT
+        assert record.call_args[0][-1]["cache_hit"] is True
+
+    def test_higher_threshold_ignores_cached_result(self, tmp_path):
+        path = tmp_path / "cv.docx"
+        path.write_bytes(b"PK resume")
+        cache = ExtractionCache(db_path=tmp_path / "cache.db")
+        cache.set(file_sha256(path), RESUME_TEXT, "docx_extractor", 60.0, 1)
+
+        with patch.object(ce, "router", ExtractionRouter()), \
+                patch.object(ce, "extraction_cache", cache), \
+                patch.object(ce.unstructured_runner, "extract_text_from_docx", return_value=RESUME_TEXT,
+                             create=True) as docx, \
+                patch.object(ce.logbook, "record"):
+            result = ce.extract_with_logging(path, quality_threshold=70.0)
+
+        assert docx.call_count == 1
+        assert result["cached"] is False
+
+
+class TestExtractTextCache:
+    """Test suite for the cache in final_97_percent_extractor.extract_text"""
+
+    def test_duplicate_bytes_skip_unstructured_api(self, tmp_path):
+        with patch.object(extractor97, "extraction_cache", ExtractionCache(db_path=tmp_path / "cache.db")), \
+                patch.object(extractor97, "extract_with_unstructured", return_value="parsed text") as api:
+            assert extractor97.extract_text(b"%PDF-1.4 \x00\xff", "a.pdf") == "parsed text"
+            assert extractor97.extract_text(b"%PDF-1.4 \x00\xff", "b.pdf") == "parsed text"
+
+        assert api.call_count == 1
+
+    def test_fallback_output_does_not_disable_unstructured_api(self, tmp_path):
+        """An API outage answered by the fallback parsers is retried on the next call"""
+        cache = ExtractionCache(db_path=tmp_path / "cache.db")
+        with patch.object(extractor97, "extraction_cache", cache), \
+                patch.object(extractor97, "_extract_with_fallback_methods", return_value="fallback text"), \
+                patch.object(extractor97, "extract_with_unstructured", side_effect=[None, "parsed text"]) as api:
+            assert extractor97.extract_text(b"%PDF-1.4 \x00\xff", "a.pdf") == "fallback text"
+            assert extractor97.extract_text(b"%PDF-1.4 \x00\xff", "a.pdf") == "parsed text"
+
+        assert api.call_count == 2
+
+    def test_unscored_fallback_entries_are_ignored(self, tmp_path):
+        """Entries an older extract_text stored from the fallback parsers are not served"""
+        cache = ExtractionCache(db_path=tmp_path / "cache.db")
+        cache.set(bytes_sha256(b"%PDF-1.4 \x00\xff"), "fallback text", module="fallback_parser")
+        with patch.object(extractor97, "extraction_cache", cache), \
+                patch.object(extractor97, "extract_with_unstructured", return_value="parsed text"):
+            assert extractor97.extract_text(b"%PDF-1.4 \x00\xff", "a.pdf") == "parsed text"
@@ -0,0 +1,122 @@
+"""
+Extraction Router Tests
+
+Covers the per-document attempt order used by extract_with_logging:
+- document classes from the probe
+- cheap local extractors first for born-digital PDFs and Word files
+- learned success rates from extraction_logs rows reorder attempts
+- EXTRACTION_SMART_ROUTING=false keeps the fixed chain
+"""
+import json
+from unittest.mock import patch
+
+from PIL import Image
+
+from backend_app.text_extraction import consolidated_extractor as ce
+from backend_app.text_extraction import extraction_router
+from backend_app.text_extraction.document_probe import DocumentProbe
+from backend_app.text_extraction.extraction_cache import ExtractionCache
+from backend_app.text_extraction.extraction_router import ExtractionRouter, classify
+from backend_app.tests.extraction.test_document_probe import write_text_pdf
+
+
+def log_row(route_class, modules, success_module):
+    return (
+        json.dumps({"route_class": route_class}),
+        json.dumps([{"module": m} for m in modules]),
+        success_module,
+    )
+
+
+class TestExtractionRouter:
+    """Test suite for ExtractionRouter"""
+
+    def test_classify(self, tmp_path):
+        text_pdf = tmp_path / "cv.pdf"
+        write_text_pdf(text_pdf)
+        scan_pdf = tmp_path / "scan.pdf"
+        Image.new("RGB", (20, 20), "white").save(scan_pdf)
+        docx = tmp_path / "cv.docx"
+        docx.write_bytes(b"PK")
+
+        assert classify(DocumentProbe(text_pdf)) == "pdf_text"
+        assert classify(DocumentProbe(scan_pdf)) == "pdf_scanned"
+        assert classify(DocumentProbe(docx)) == "word"
+        assert classify(DocumentProbe(tmp_path / "photo.jpg")) == "image"
+
+    def test_cheap_extractor_first(self, tmp_path):
+        text_pdf = tmp_path / "cv.pdf"
+        write_text_pdf(text_pdf)
+        docx = tmp_path / "cv.docx"
+        docx.write_bytes(b"PK")
+        router = ExtractionRouter()
+
+        _, pdf_order = router.route(DocumentProbe(text_pdf))
+        _, docx_order = router.route(DocumentProbe(docx))
+
+        assert pdf_order[0] == "pypdf2"
+        assert pdf_order.index("unstructured_primary") > 0
+        assert docx_order[0] == "docx_extractor"
+        assert set(pdf_order) == {"unstructured_primary", "unstructured_alternate", "pypdf2", "tesseract_ocr",
+                                  "opencv_tesseract_retry", "paddleocr"}
+
+    def test_learns_from_logged_outcomes(self, tmp_path):
+        text_pdf = tmp_path / "cv.pdf"
+        write_text_pdf(text_pdf)
+        # PyPDF2 never passes for this class in practice; Unstructured always does
+        rows = [log_row("pdf_text", ["pypdf2", "unstructured_primary"], "unstructured_primary")] * 1000
+        router = ExtractionRouter(fetch_outcomes=lambda: rows)
+
+        _, order = router.route(DocumentProbe(text_pdf))
+
+        assert order[0] == "unstructured_primary"
+        assert router.success_rate("pdf_text", "pypdf2") < 0.01
+
+    def test_history_is_cached_between_routes(self, tmp_path):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return []
+
+        router = ExtractionRouter(fetch_outcomes=fetch, refresh_seconds=300)
+        probe = DocumentProbe(tmp_path / "cv.docx")
+        router.route(probe)
+        router.route(probe)
+
+        assert len(calls) == 1
+
+    def test_rows_without_route_class_are_ignored(self):
+        stats = ExtractionRouter.learn([
+            ("{}", json.dumps([{"module": "pypdf2"}]), "pypdf2"),
+            ("not json", "[]", ""),
+            log_row("word", ["docx_extractor"], "docx_extractor"),
+        ])
+
+        assert stats == {"word": {"docx_extractor": (1, 1)}}
+
+    def test_smart_routing_disabled_keeps_fixed_chain(self, tmp_path):
+        text_pdf = tmp_path / "cv.pdf"
+        write_text_pdf(text_pdf)
+
+        with patch.object(extraction_router, "SMART_ROUTING", False):
+            _, order = ExtractionRouter().route(DocumentProbe(text_pdf))
+
+        assert order[0] == "unstructured_primary"
+
+    def test_extract_with_logging_follows_route(self, tmp_path):
+        docx = tmp_path / "cv.docx"
+        docx.write_bytes(b"PK")
+        text = "experience education skills email phone " * 60
+
+        with patch.object(ce, "router", ExtractionRouter()), \
+                patch.object(ce.unstructured_runner, "extract_text_from_docx", return_value=text, create=True), \
+                patch.object(ce.extractor97, "extract_text") as remote, \
+                patch.object(ce, "extraction_cache", ExtractionCache(db_path=None)), \
+                patch.object(ce.logbook, "record") as record:
+            result = ce.extract_with_logging(docx)
+
+        remote.assert_not_called()
+        assert result["module"] == "docx_extractor"
+        assert [a["module"] for a in result["attempts"]] == ["docx_extractor"]
+        assert record.call_args[0][-1]["route_class"] == "word"
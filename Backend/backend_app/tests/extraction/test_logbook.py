@@ -0,0 +1,111 @@
+"""
+Extraction Logbook Tests
+
+Covers the batched, background-written extraction_logs table:
+- record() only buffers; flush() writes rows in order
+- a full batch wakes the background writer
+- the in-memory buffer is bounded and drops the oldest rows
+- close() flushes, and a failed write keeps rows for the next flush
+- nothing is opened or started before the first record()
+"""
+import sqlite3
+import time
+from unittest.mock import patch
+
+from backend_app.text_extraction.consolidated_extractor import Logbook
+
+
+def record(book, name, module="pypdf2"):
+    book.record(name, 10, 1, [{"module": module}], module, True, 100, 90.0, {})
+
+
+def logged_files(db_path):
+    with sqlite3.connect(str(db_path)) as conn:
+        return [r[0] for r in conn.execute("SELECT file_path FROM extraction_logs ORDER BY id")]
+
+
+class TestLogbook:
+    """Test suite for Logbook"""
+
+    def test_record_is_buffered_until_flush(self, tmp_path):
+        db = tmp_path / "logbook.db"
+        book = Logbook(db, flush_interval=60)
+        record(book, "a.pdf")
+        record(book, "b.pdf")
+
+        assert not db.exists()
+        assert book.pending == 2
+
+        book.flush()
+
+        assert logged_files(db) == ["a.pdf", "b.pdf"]
+        assert book.pending == 0
+        book.close()
+
+    def test_full_batch_wakes_background_writer(self, tmp_path):
+        db = tmp_path / "logbook.db"
+        book = Logbook(db, flush_interval=60, batch_size=3)
+        for i in range(3):
+            record(book, f"{i}.pdf")
+
+        deadline = time.monotonic() + 5
+        while book.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert logged_files(db) == ["0.pdf", "1.pdf", "2.pdf"]
+        book.close()
+
+    def test_buffer_is_bounded(self, tmp_path):
+        db = tmp_path / "logbook.db"
+        book = Logbook(db, flush_interval=60, batch_size=100, max_buffer=2)
+        for name in ("a.pdf", "b.pdf", "c.pdf"):
+            record(book, name)
+
+        book.close()
+
+        assert book.dropped == 1
+        assert logged_files(db) == ["b.pdf", "c.pdf"]
+
+    def test_nothing_opened_before_first_record(self, tmp_path):
+        db = tmp_path / "logs" / "logbook.db"
+        book = Logbook(db, flush_interval=60)
+
+        assert not db.parent.exists()
+        assert book._flusher is None
+
+        record(book, "a.pdf")
+
+        assert book._flusher.is_alive()
+        book.close()
+        assert logged_files(db) == ["a.pdf"]
+
+    def test_database_uses_wal(self, tmp_path):
+        db = tmp_path / "logbook.db"
+        book = Logbook(db, flush_interval=60)
+        record(book, "a.pdf")
+        book.close()
+
+        with sqlite3.connect(str(db)) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_failed_write_keeps_rows(self, tmp_path):
+        db = tmp_path / "logbook.db"
+        book = Logbook(db, flush_interval=60)
+        record(book, "a.pdf")
+
+        with patch.object(book, "_conn", side_effect=sqlite3.OperationalError("database is locked")):
+            book.flush()
+        assert book.pending == 1
+
+        book.flush()
+        assert logged_files(db) == ["a.pdf"]
+        book.close()
+
+    def test_record_after_close_writes_through(self, tmp_path):
+        db = tmp_path / "logbook.db"
+        book = Logbook(db, flush_interval=60)
+        book.close()
+
+        record(book, "late.pdf")
+
+        assert logged_files(db) == ["late.pdf"]
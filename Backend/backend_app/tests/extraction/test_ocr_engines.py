@@ -0,0 +1,52 @@
+"""
+OCR Engine Tests
+
+Covers the per-process OCR engines kept warm by the parallel_ocr workers:
+- PaddleOCR is built once per language and reused
+- warm_up records engine failures instead of raising, and health() reports them
+"""
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from backend_app.text_extraction import ocr_engines
+
+
+class TestOcrEngines:
+    """Test suite for ocr_engines"""
+
+    def test_paddle_instance_is_reused(self):
+        factory = MagicMock()
+        factory.return_value.ocr.return_value = [[[[0, 0], ("John Doe", 0.99)]]]
+
+        with patch.object(ocr_engines, "PaddleOCR", factory), \
+                patch.dict(ocr_engines._paddle_instances, clear=True):
+            first = ocr_engines.paddle_extract_from_array(np.zeros((4, 4, 3), dtype=np.uint8))
+            second = ocr_engines.paddle_extract_from_array(np.zeros((4, 4, 3), dtype=np.uint8))
+
+        assert first == second == "John Doe"
+        assert factory.call_count == 1
+
+    def test_warm_up_loads_paddle_before_first_page(self):
+        factory = MagicMock()
+
+        with patch.object(ocr_engines, "PaddleOCR", factory), \
+                patch.dict(ocr_engines._paddle_instances, clear=True):
+            ocr_engines.warm_up(["paddle"])
+            assert ocr_engines.health()["paddle"]["loaded"] == ["en"]
+            ocr_engines.paddle_page(np.zeros((4, 4, 3), dtype=np.uint8), timeout=1)
+
+        assert factory.call_count == 1
+        assert factory.return_value.ocr.call_count == 2  # warm-up inference + the page
+
+    def test_engine_failures_are_reported(self):
+        factory = MagicMock(side_effect=RuntimeError("model download failed"))
+
+        with patch.object(ocr_engines, "PaddleOCR", factory), \
+                patch.dict(ocr_engines._paddle_instances, clear=True), \
+                patch.dict(ocr_engines._state["errors"], clear=True):
+            ocr_engines.warm_up(["paddle"])
+            report = ocr_engines.health()
+
+        assert report["paddle"]["error"] == "model download failed"
+        assert report["paddle"]["loaded"] == []
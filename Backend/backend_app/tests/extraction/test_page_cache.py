@@ -0,0 +1,64 @@
+"""
+Page Image Cache Tests
+
+Covers the shared page rasters used by the OCR fallbacks of extract_with_logging:
+- each document is rendered at most once
+- image files load into RGB numpy arrays without temp files
+- render failures are remembered instead of retried
+"""
+import pytest
+import numpy as np
+from PIL import Image
+
+from backend_app.text_extraction.page_cache import PageImageCache
+
+
+class TestPageImageCache:
+    """Test suite for PageImageCache"""
+
+    def test_pdf_pages_rendered_once_at_requested_dpi(self, tmp_path):
+        calls = []
+
+        def renderer(path, dpi):
+            calls.append(dpi)
+            return [Image.new("RGB", (20, 10), "white"), Image.new("L", (20, 10), 0)]
+
+        pages = PageImageCache(tmp_path / "cv.pdf", dpi=300, renderer=renderer)
+        first = pages.arrays()
+        second = pages.arrays()
+
+        assert calls == [300]
+        assert first is second
+        assert [a.shape for a in first] == [(10, 20, 3), (10, 20, 3)]
+        assert first[0].dtype == np.uint8
+
+    def test_image_file_loads_without_temp_files(self, tmp_path):
+        img_path = tmp_path / "scan.png"
+        Image.new("RGB", (8, 6), (255, 0, 0)).save(img_path)
+
+        with PageImageCache(img_path) as pages:
+            arrays = pages.arrays()
+
+        assert len(arrays) == 1
+        assert arrays[0].shape == (6, 8, 3)
+        assert tuple(arrays[0][0, 0]) == (255, 0, 0)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["scan.png"]
+
+    def test_render_failure_is_not_retried(self, tmp_path):
+        def renderer(path, dpi):
+            raise RuntimeError("poppler not installed")
+
+        pages = PageImageCache(tmp_path / "cv.pdf", renderer=renderer)
+        for _ in range(3):
+            with pytest.raises(RuntimeError):
+                pages.arrays()
+
+        assert pages.render_count == 1
+
+    def test_close_releases_pages(self, tmp_path):
+        pages = PageImageCache(tmp_path / "cv.pdf", renderer=lambda p, d: [Image.new("RGB", (2, 2))])
+        pages.arrays()
+
+        pages.close()
+
+        assert pages._arrays is None
@@ -0,0 +1,136 @@
+"""
+Page Quality Tests
+
+Covers the running quality estimate of page-by-page extraction attempts:
+- consume_pages reads every page of a route that is going well (no early stop on a passing prefix)
+- consume_pages abandons a route whose first pages score far below the threshold,
+  leaving the rest of the document unread
+- single-page documents are never abandoned (there is nothing left to save)
+- parallel_ocr applies abandon_when to the in-order prefix of its pages
+- the PyPDF2 attempt abandons a multi-page PDF with no text layer
+"""
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from backend_app.text_extraction import consolidated_extractor as ce
+from backend_app.text_extraction import page_quality, parallel_ocr
+from backend_app.text_extraction.document_probe import DocumentProbe
+from backend_app.text_extraction.page_quality import RunningQuality, consume_pages
+
+
+def length_score(text, pages=None):
+    """100 when there are at least 20 chars per page scored (10 pages when pages is None)"""
+    return min(100.0, 100.0 * len(text) / (20 * (pages or 10)))
+
+
+def counting(pages):
+    """Page iterator that records how many pages were pulled"""
+    pulled = []
+
+    def gen():
+        for page in pages:
+            pulled.append(page)
+            yield page
+    return gen(), pulled
+
+
+class TestRunningQuality:
+    """Test suite for RunningQuality / consume_pages"""
+
+    def test_abandons_empty_pages_early(self):
+        pages, pulled = counting([""] * 10)
+
+        res = consume_pages(pages, RunningQuality(length_score, 70.0, 10), 10)
+
+        assert res["abandoned"] is True
+        assert res["pages_done"] == page_quality.ABANDON_MIN_PAGES
+        assert len(pulled) == page_quality.ABANDON_MIN_PAGES
+
+    def test_passing_prefix_reads_every_page(self):
+        """A dense page 1 scores above the threshold on its own; pages 2-3 are still read."""
+        pages, pulled = counting(["x" * 150, "page two", "page three"])
+
+        res = consume_pages(pages, RunningQuality(length_score, 70.0, 3), 3)
+
+        assert res["abandoned"] is False
+        assert len(pulled) == res["pages_done"] == 3
+        assert res["text"] == "x" * 150 + "\n\npage two\n\npage three"
+
+    def test_good_pages_are_not_abandoned(self):
+        # each page passes on its own, but the whole document needs all ten
+        res = consume_pages(iter(["x" * 20] * 10), RunningQuality(length_score, 100.0, 10), 10)
+
+        assert res["abandoned"] is False
+        assert res["pages_done"] == 10
+
+    def test_single_page_is_never_abandoned(self):
+        quality = RunningQuality(length_score, 70.0, 1)
+
+        res = consume_pages(iter([""]), quality, 1)
+
+        assert res["abandoned"] is False
+        assert quality.hopeless("", 1) is False
+
+    def test_abandon_can_be_disabled(self):
+        with patch.object(page_quality, "EARLY_ABANDON", False):
+            res = consume_pages(iter([""] * 5), RunningQuality(length_score, 70.0, 5), 5)
+
+        assert res["abandoned"] is False
+        assert res["pages_done"] == 5
+
+
+class TestOcrAbandon:
+    """Test suite for abandon_when in parallel_ocr.ocr_pages"""
+
+    @pytest.fixture
+    def thread_pool(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        with patch.object(parallel_ocr, "_get_executor", return_value=executor), \
+                patch.object(parallel_ocr, "OCR_WORKERS", 2):
+            yield executor
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    def test_noise_pages_abandon_the_route(self, thread_pool):
+        quality = RunningQuality(length_score, 70.0, 10)
+        seen = []
+
+        def page_fn(page, timeout):
+            seen.append(page)
+            time.sleep(0.02)
+            return ""
+
+        res = parallel_ocr.ocr_pages(page_fn, list(range(10)), abandon_when=quality.hopeless)
+
+        assert res["abandoned"] is True
+        assert res["pages_done"] == page_quality.ABANDON_MIN_PAGES
+        assert len(seen) < 10
+        assert "abandoned" in ce._ocr_notes(res)
+
+
+class TestPypdf2Attempt:
+    """Test suite for the page-by-page PyPDF2 attempt"""
+
+    def test_blank_pdf_is_abandoned(self, tmp_path):
+        from backend_app.tests.extraction.test_document_probe import write_text_pdf
+        pdf = tmp_path / "blank.pdf"
+        write_text_pdf(pdf, pages=6)
+        probe = DocumentProbe(pdf)
+        quality = RunningQuality(lambda text, pages=None: ce.quality_score(text, pdf, probe, pages=pages),
+                                 70.0, probe.page_count)
+
+        text, notes = ce.attempt_pypdf2(pdf, None, quality)
+
+        assert text is None
+        assert f"pages {page_quality.ABANDON_MIN_PAGES}/6" in notes
+        assert "abandoned" in notes
+
+    def test_quality_score_pages_override(self, tmp_path):
+        from backend_app.tests.extraction.test_document_probe import write_text_pdf
+        pdf = tmp_path / "cv.pdf"
+        write_text_pdf(pdf, pages=10)
+        probe = DocumentProbe(pdf)
+        text = "Experienced Python developer. " * 20
+
+        assert ce.quality_score(text, pdf, probe, pages=1) > ce.quality_score(text, pdf, probe)
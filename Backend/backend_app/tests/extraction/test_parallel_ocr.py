@@ -0,0 +1,264 @@
+"""
+Parallel OCR Tests
+
+Covers the page-parallel OCR used by the OCR fallbacks of extract_with_logging:
+- page texts come back in page order regardless of completion order
+- a page that overruns its timeout contributes no text instead of stalling the document;
+  a page stuck in a worker gets the pool replaced and the pages behind it resubmitted
+- every page of a document is OCR'd: a good first page never cuts the rest
+- a broken pool falls back to inline OCR
+- pool metrics (queue depth, outcomes) and health reporting
+- one pool per host (flock); other processes and start(background=True) never block on PaddleOCR
+"""
+import fcntl
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
+from backend_app.text_extraction import parallel_ocr
+
+
+def slow_reverse_page(page, timeout):
+    # earlier pages finish last
+    time.sleep(0.05 * (3 - page))
+    return f"page {page}"
+
+
+@pytest.fixture
+def thread_pool():
+    """Thread pool in place of the process pool (page functions in tests need not be picklable)"""
+    executor = ThreadPoolExecutor(max_workers=4)
+    with patch.object(parallel_ocr, "_get_executor", return_value=executor), \
+            patch.object(parallel_ocr, "OCR_WORKERS", 4), \
+            patch.object(parallel_ocr, "_claim_host_pool", return_value=True):
+        yield executor
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+class TestOcrPages:
+    """Test suite for parallel_ocr.ocr_pages"""
+
+    def test_results_assembled_in_page_order(self, thread_pool):
+        res = parallel_ocr.ocr_pages(slow_reverse_page, [0, 1, 2])
+
+        assert res["text"] == "page 0\n\npage 1\n\npage 2"
+        assert res["pages_done"] == res["pages_total"] == 3
+
+    def test_page_timeout_yields_empty_page(self, thread_pool):
+        def page_fn(page, timeout):
+            if page == 1:
+                time.sleep(0.5)
+            return f"page {page}"
+
+        res = parallel_ocr.ocr_pages(page_fn, [0, 1, 2], page_timeout=0.1)
+
+        assert res["text"] == "page 0\n\npage 2"
+        assert res["timed_out"] == 1
+
+    def test_stuck_page_restarts_pool_and_resubmits_queued_pages(self):
+        """A page still running at its deadline cannot be cancelled: the pool is replaced and the
+        pages queued behind it run on the new one instead of timing out too."""
+        stuck = ThreadPoolExecutor(max_workers=1)
+        fresh = ThreadPoolExecutor(max_workers=1)
+        release = threading.Event()
+
+        def page_fn(page, timeout):
+            if page == 0:
+                release.wait(2)
+            return f"page {page}"
+
+        with patch.object(parallel_ocr, "_get_executor", side_effect=[stuck, fresh]), \
+                patch.object(parallel_ocr, "_restart_executor") as restart, \
+                patch.object(parallel_ocr, "OCR_WORKERS", 2), \
+                patch.object(parallel_ocr, "_claim_host_pool", return_value=True):
+            res = parallel_ocr.ocr_pages(page_fn, [0, 1, 2], page_timeout=0.2)
+        release.set()
+        stuck.shutdown(wait=True)
+        fresh.shutdown(wait=True)
+
+        restart.assert_called_once_with(stuck)
+        assert res["text"] == "page 1\n\npage 2"
+        assert res["timed_out"] == 1
+
+    def test_restart_terminates_workers(self):
+        class FakeProcess:
+            terminated = False
+
+            def terminate(self):
+                self.terminated = True
+
+        class FakeExecutor:
+            def __init__(self):
+                self._processes = {1: FakeProcess(), 2: FakeProcess()}
+                self.shut_down = False
+
+            def shutdown(self, wait=True, cancel_futures=False):
+                self.shut_down = True
+
+        executor = FakeExecutor()
+        with patch.object(parallel_ocr, "_executor", executor):
+            parallel_ocr._restart_executor(executor)
+            assert parallel_ocr._executor is None
+
+        assert all(p.terminated for p in executor._processes.values())
+        assert executor.shut_down is True
+
+        replaced = FakeExecutor()
+        with patch.object(parallel_ocr, "_executor", executor):
+            parallel_ocr._restart_executor(replaced)
+        assert replaced.shut_down is False
+
+    def test_failed_page_is_skipped(self, thread_pool):
+        def page_fn(page, timeout):
+            if page == 0:
+                raise RuntimeError("tesseract crashed")
+            return f"page {page}"
+
+        res = parallel_ocr.ocr_pages(page_fn, [0, 1])
+
+        assert res["text"] == "page 1"
+        assert res["failed"] == 1
+
+    def test_good_first_page_does_not_cut_document(self, thread_pool):
+        """A dense first page is not the whole resume: the later pages are still OCR'd."""
+        def page_fn(page, timeout):
+            return "Experienced Python developer " * 20 if page == 0 else f"page {page}"
+
+        res = parallel_ocr.ocr_pages(page_fn, list(range(4)), abandon_when=lambda text, pages_done: False)
+
+        assert res["pages_done"] == 4
+        assert res["text"].endswith("page 1\n\npage 2\n\npage 3")
+
+    def test_single_worker_runs_inline(self):
+        with patch.object(parallel_ocr, "_get_executor") as get_executor, \
+                patch.object(parallel_ocr, "OCR_WORKERS", 1):
+            res = parallel_ocr.ocr_pages(slow_reverse_page, [1, 2])
+
+        get_executor.assert_not_called()
+        assert res["text"] == "page 1\n\npage 2"
+
+    def test_single_page_goes_through_pool(self, thread_pool):
+        submitted = []
+        original_submit = thread_pool.submit
+
+        def submit(*args, **kwargs):
+            submitted.append(args)
+            return original_submit(*args, **kwargs)
+
+        with patch.object(thread_pool, "submit", side_effect=submit):
+            res = parallel_ocr.ocr_pages(slow_reverse_page, [2])
+
+        assert len(submitted) == 1
+        assert res["text"] == "page 2"
+
+    def test_broken_pool_falls_back_inline(self):
+        class BrokenExecutor:
+            def submit(self, *args, **kwargs):
+                raise BrokenProcessPool("worker died")
+
+        with patch.object(parallel_ocr, "_get_executor", return_value=BrokenExecutor()), \
+                patch.object(parallel_ocr, "_reset_executor") as reset, \
+                patch.object(parallel_ocr, "OCR_WORKERS", 4), \
+                patch.object(parallel_ocr, "_claim_host_pool", return_value=True):
+            res = parallel_ocr.ocr_pages(slow_reverse_page, [0, 1])
+
+        reset.assert_called_once()
+        assert res["text"] == "page 0\n\npage 1"
+
+
+class TestPoolMetrics:
+    """Test suite for parallel_ocr.stats / health"""
+
+    def test_in_flight_returns_to_zero_and_outcomes_are_counted(self, thread_pool):
+        before = parallel_ocr.stats()
+
+        def page_fn(page, timeout):
+            if page == 0:
+                raise RuntimeError("tesseract crashed")
+            return f"page {page}"
+
+        parallel_ocr.ocr_pages(page_fn, [0, 1, 2])
+        thread_pool.shutdown(wait=True)
+        after = parallel_ocr.stats()
+
+        assert after["in_flight"] == before["in_flight"]
+        assert after["submitted"] - before["submitted"] == 3
+        assert after["completed"] - before["completed"] == 2
+        assert after["failed"] - before["failed"] == 1
+        assert after["mode"] == "pool"
+
+    def test_queue_depth_counts_pages_beyond_workers(self):
+        with patch.dict(parallel_ocr._metrics, {"in_flight": 7}), \
+                patch.object(parallel_ocr, "OCR_WORKERS", 4):
+            assert parallel_ocr.stats()["queue_depth"] == 3
+
+    def test_health_reports_worker_engines(self, thread_pool):
+        with patch.object(parallel_ocr, "_executor", thread_pool):
+            report = parallel_ocr.health()
+
+        assert report["status"] in ("ok", "degraded")
+        assert {"tesseract", "paddle", "opencv", "pid"} <= set(report["engines"])
+        assert report["pool"]["workers"] == 4
+
+    def test_health_before_start(self):
+        with patch.object(parallel_ocr, "_executor", None), \
+                patch.object(parallel_ocr, "OCR_WORKERS", 4):
+            assert parallel_ocr.health()["status"] == "not_started"
+
+    def test_start_spawns_one_task_per_worker(self, thread_pool):
+        with patch.object(thread_pool, "submit") as submit:
+            parallel_ocr.start()
+
+        assert submit.call_count == 4
+
+
+@pytest.fixture
+def host_lock(tmp_path):
+    """Fresh host-pool ownership state with the lock file under tmp_path"""
+    with patch.object(parallel_ocr, "POOL_LOCK_PATH", str(tmp_path / "ocr_pool.lock")), \
+            patch.object(parallel_ocr, "_host_pool", None), \
+            patch.object(parallel_ocr, "_host_pool_file", None), \
+            patch.object(parallel_ocr, "_host_pool_pid", None), \
+            patch.object(parallel_ocr, "_host_pool_retry_at", 0.0):
+        yield tmp_path / "ocr_pool.lock"
+        if parallel_ocr._host_pool_file is not None:
+            parallel_ocr._host_pool_file.close()
+
+
+class TestHostPool:
+    """Test suite for one OCR pool per host"""
+
+    def test_first_process_owns_the_pool(self, host_lock):
+        assert parallel_ocr._claim_host_pool() is True
+        assert parallel_ocr._claim_host_pool() is True
+
+    def test_other_processes_run_inline(self, host_lock):
+        """While another process holds the lock, pages are OCR'd inline, not on a new pool."""
+        with open(host_lock, "a") as other:
+            fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            with patch.object(parallel_ocr, "OCR_WORKERS", 4), \
+                    patch.object(parallel_ocr, "_get_executor") as get_executor:
+                res = parallel_ocr.ocr_pages(slow_reverse_page, [1, 2])
+
+                get_executor.assert_not_called()
+                assert res["text"] == "page 1\n\npage 2"
+                assert parallel_ocr.stats()["mode"] == "inline"
+
+    def test_background_start_does_not_block(self):
+        """start(background=True) returns before the engines have loaded."""
+        loaded = threading.Event()
+
+        def slow_warm_up():
+            time.sleep(0.3)
+            loaded.set()
+
+        with patch.object(parallel_ocr, "OCR_WORKERS", 1), \
+                patch.object(parallel_ocr.ocr_engines, "warm_up", side_effect=slow_warm_up):
+            started = time.monotonic()
+            parallel_ocr.start(background=True)
+            assert time.monotonic() - started < 0.1
+            assert loaded.wait(2)
+
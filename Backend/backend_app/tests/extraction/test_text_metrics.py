@@ -0,0 +1,101 @@
+"""
+Text Metrics Tests
+
+Covers the text statistics behind quality_score:
+- TextStatsEngine.scan matches the previous generator-based text_stats on ASCII,
+  Unicode (non-ASCII digits / spaces) and empty text
+- keywords count once, case-insensitively, including keywords inside longer keywords
+- micro-benchmark on 100 KB of OCR-like output, ASCII and with bullets / dashes / NBSP
+  (opt-in: EXTRACTION_BENCHMARKS=1, wall-clock timings are too noisy for every run)
+"""
+import os
+import random
+import timeit
+
+import pytest
+
+from backend_app.text_extraction import consolidated_extractor as ce
+from backend_app.text_extraction.text_metrics import TextStatsEngine
+
+
+def legacy_text_stats(text: str) -> dict:
+    """text_stats as it was before text_metrics: one Python pass per metric, one lower() per keyword"""
+    if not text:
+        return {"chars": 0, "words": 0, "digit_ratio": 0.0, "whitespace_ratio": 0.0, "keyword_hits": 0}
+    chars = len(text)
+    return {
+        "chars": chars,
+        "words": len(text.split()),
+        "digit_ratio": sum(c.isdigit() for c in text) / max(1, chars),
+        "whitespace_ratio": sum(1 for c in text if c.isspace()) / max(1, chars),
+        "keyword_hits": sum(1 for kw in ce.KEYWORD_SET if kw.lower() in text.lower()),
+    }
+
+
+def ocr_output(size: int, seed: int = 7) -> str:
+    """Resume-like OCR text with digits, punctuation noise and ragged whitespace"""
+    rng = random.Random(seed)
+    vocab = ("Senior Python developer with 7 years EXPERIENCE in data pipelines at Acme Corp 2016-2023 "
+             "B.Sc. Computer Science GPA 3.8 +91 9876543210 l1nkedln.com/in/jdoe |~ rn 0O Skills: SQL AWS "
+             "Docker Kubernetes team lead mentoring contact: jdoe@gmail.com").split()
+    separators = [" ", " ", " ", "  ", "\n", "\n\n", "\t"]
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(vocab)
+        parts.append(word + rng.choice(separators))
+        length += len(parts[-1])
+    return "".join(parts)[:size]
+
+
+def unicode_ocr_output(size: int, seed: int = 7) -> str:
+    """ocr_output with the non-ASCII a real resume carries: bullets, dashes, NBSP, accents"""
+    rng = random.Random(seed)
+    lines = ocr_output(size, seed).split("\n")
+    marks = ["\u2022 ", "\u2013 ", "Jos\u00e9 ", "\u00a0", "\u00b2 ", ""]
+    return "\n".join(rng.choice(marks) + line for line in lines)[:size]
+
+
+class TestTextStatsEngine:
+    """Test suite for TextStatsEngine.scan"""
+
+    @pytest.mark.parametrize("text", [
+        "",
+        "   ",
+        "Experience: 5 years\nSkills: Python, SQL\nEducation: Bachelor of Science",
+        "PHONE +1 555 0100\temail me at work ١٢٣ ²",
+        ocr_output(5000),
+        unicode_ocr_output(5000),
+    ])
+    def test_matches_legacy_text_stats(self, text):
+        assert ce.text_stats(text) == pytest.approx(legacy_text_stats(text))
+
+    def test_keywords_count_once_and_nested(self):
+        engine = TextStatsEngine({"skill", "skills", "Email", "phd"})
+
+        assert engine.scan("SKILLS skills skills")["keyword_hits"] == 2  # skills and skill
+        assert engine.scan("e-mail: EMAIL")["keyword_hits"] == 1
+        assert engine.scan("no matches here")["keyword_hits"] == 0
+
+    def test_quality_score_unchanged(self, tmp_path):
+        text = ocr_output(3000)
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(ce, "text_stats", legacy_text_stats)
+            legacy = ce.quality_score(text, tmp_path / "cv.pdf", pages=2)
+
+        assert ce.quality_score(text, tmp_path / "cv.pdf", pages=2) == legacy
+
+
+@pytest.mark.skipif(not os.getenv("EXTRACTION_BENCHMARKS"), reason="benchmark; set EXTRACTION_BENCHMARKS=1")
+class TestTextStatsBenchmark:
+    """Micro-benchmark: 100 KB of OCR output"""
+
+    @pytest.mark.parametrize("make_text", [ocr_output, unicode_ocr_output])
+    def test_faster_than_legacy_on_100kb(self, make_text):
+        text = make_text(100_000)
+        assert ce.text_stats(text) == pytest.approx(legacy_text_stats(text))
+
+        legacy = min(timeit.repeat(lambda: legacy_text_stats(text), number=5, repeat=3)) / 5
+        engine = min(timeit.repeat(lambda: ce.text_stats(text), number=5, repeat=3)) / 5
+
+        assert engine * 2 < legacy
@@ -0,0 +1,101 @@
+"""
+Upload Spool Tests
+
+Covers the streaming upload path of the extraction API:
+- uploads are copied to disk chunk by chunk, never read whole
+- hash and magic-byte type are computed while spooling
+- oversized uploads stop early and leave no partial file
+- extractors accept the read-only mmap of the spooled file
+"""
+import hashlib
+
+import pytest
+from unittest.mock import patch
+
+from backend_app.text_extraction import final_97_percent_extractor as extractor97
+from backend_app.text_extraction.extraction_cache import ExtractionCache, bytes_sha256
+from backend_app.text_extraction.upload_spool import UploadTooLarge, detect_type, open_mapped, spool_upload
+
+
+class FakeUpload:
+    """Async read(n) over bytes, recording the largest read"""
+
+    def __init__(self, data: bytes, filename: str):
+        self.data = data
+        self.filename = filename
+        self.pos = 0
+        self.largest_read = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        assert size > 0, "upload must be read in chunks"
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += len(chunk)
+        self.largest_read = max(self.largest_read, len(chunk))
+        return chunk
+
+
+class TestSpoolUpload:
+    """Test suite for spool_upload"""
+
+    @pytest.mark.asyncio
+    async def test_spools_in_chunks_with_hash_and_type(self, tmp_path):
+        data = b"%PDF-1.4\n" + b"x" * 10000
+        upload = FakeUpload(data, "resume.pdf")
+
+        spooled = await spool_upload(upload, str(tmp_path), max_bytes=1 << 20, chunk_size=1024)
+
+        assert upload.largest_read == 1024
+        assert spooled.path.read_bytes() == data
+        assert spooled.size == len(data)
+        assert spooled.sha256 == hashlib.sha256(data).hexdigest() == bytes_sha256(data)
+        assert spooled.detected_type == "pdf"
+        spooled.cleanup()
+        assert not spooled.path.exists()
+
+    @pytest.mark.asyncio
+    async def test_too_large_upload_leaves_no_file(self, tmp_path):
+        upload = FakeUpload(b"x" * 5000, "big.pdf")
+
+        with pytest.raises(UploadTooLarge):
+            await spool_upload(upload, str(tmp_path), max_bytes=2048, chunk_size=1024)
+
+        assert upload.pos < 5000
+        assert list(tmp_path.iterdir()) == []
+
+    def test_detect_type(self):
+        assert detect_type(b"\x89PNG\r\n\x1a\n....", "scan.png") == "png"
+        assert detect_type(b"\xff\xd8\xff\xe0", "photo.jpg") == "jpg"
+        assert detect_type(b"PK\x03\x04", "cv.docx") == "docx"
+        assert detect_type(b"\x00\x01", "mystery.bin") == "unknown"
+
+
+class TestMappedExtraction:
+    """Test suite for extract_text on a mapped file"""
+
+    def test_extract_text_accepts_mmap(self, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_bytes(b"Python developer with five years of experience")
+
+        with patch.object(extractor97, "extraction_cache", ExtractionCache(db_path=None)), \
+                open_mapped(path) as mapped:
+            text = extractor97.extract_text(mapped, "notes.txt")
+
+        assert text == "Python developer with five years of experience"
+
+    def test_pdf_fallback_reads_mapped_file(self, tmp_path):
+        from backend_app.tests.extraction.test_document_probe import write_text_pdf
+        path = tmp_path / "cv.pdf"
+        write_text_pdf(path, pages=1)
+
+        with open_mapped(path) as mapped:
+            result = extractor97._extract_pdf_text(mapped, "cv.pdf")
+
+        # blank page: no text, but PyPDF2 parsed the mapped file without a copy or an error
+        assert result is None or isinstance(result, str)
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.pdf"
+        path.write_bytes(b"")
+
+        with open_mapped(path) as mapped:
+            assert mapped == b""
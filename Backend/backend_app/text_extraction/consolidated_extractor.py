@@ -3,33 +3,41 @@ consolidated_extractor.py
 
 Consolidated extraction wrapper that:
 - Calls existing extractors (unstructured primary, alt, docx, PyPDF2, Tesseract)
+  in an order chosen per document by extraction_router (cheapest extractor likely to
+  pass first, learned from extraction_logs) instead of a fixed chain
 - Adds two additional fallback layers:
     6) OpenCV-based preprocessing + Tesseract retry
     7) PaddleOCR extraction
 - Runs a quality check after each attempt; triggers fallback when quality < threshold
-- Logs each attempt to a SQLite 'extraction_logbook.db' (table: extraction_logs)
+- Returns results for already-seen content from a SHA-256 keyed cache (extraction_cache),
+  so duplicates arriving through different channels skip OCR and remote API calls
+- Probes the file once (DocumentProbe: page count, size, text layer, producer) and shares
+  the result with every attempt and quality check instead of re-parsing the PDF
+- Rasterizes a document at most once: the OCR attempts (5-7) share one in-memory
+  PageImageCache instead of re-running pdf2image and round-tripping temp PNGs
+- OCRs pages in parallel on a process pool (parallel_ocr), with per-page timeouts; the
+  pool's workers keep Tesseract/PaddleOCR warm (ocr_engines)
+- Page-by-page attempts (PyPDF2, OCR) keep a running quality estimate (page_quality): they
+  abandon the route once the pages so far look hopeless, and otherwise read every page
+- Computes quality_score's text statistics with translate tables and one lowercase pass
+  (text_metrics) instead of per-character Python loops
+- Logs each attempt to a SQLite 'extraction_logbook.db' (table: extraction_logs) through an
+  in-memory append queue drained by a background thread in batched WAL transactions
 - Provides a simple API: extract_with_logging(file_path, metadata={})
 """
 
+from collections import deque
 from pathlib import Path
+import os
 import time
 import json
+import atexit
 import sqlite3
+import threading
 import logging
 import statistics
 import re
 
-# Try optional imports for new fallbacks
-try:
-    import cv2
-except Exception:
-    cv2 = None
-
-try:
-    from paddleocr import PaddleOCR
-except Exception:
-    PaddleOCR = None
-
 # Imports from existing modules (your files)
 # These functions should already exist in your uploaded files:
 # - extract_text_97_percent(file_path, strategy)
@@ -38,24 +46,85 @@ except Exception:
 # - (or other names used in your extractor). We'll try several names.
 from backend_app.text_extraction import final_97_percent_extractor as extractor97
 from backend_app.text_extraction import unstructured_io_runner as unstructured_runner
+from backend_app.text_extraction.document_probe import DocumentProbe
+from backend_app.text_extraction.extraction_cache import extraction_cache, file_sha256
+from backend_app.text_extraction.extraction_router import ExtractionRouter, ROUTER_HISTORY_LIMIT
+from backend_app.text_extraction.page_cache import PageImageCache
+from backend_app.text_extraction.page_quality import RunningQuality, consume_pages
+from backend_app.text_extraction.parallel_ocr import ocr_pages
+from backend_app.text_extraction.text_metrics import TextStatsEngine
+from backend_app.text_extraction.upload_spool import open_mapped
+from backend_app.text_extraction.ocr_engines import (
+    cv2, opencv_preprocess_array, paddle_ocr, paddle_extract_from_array,
+    tesseract_page, opencv_tesseract_page, paddle_page,
+)
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-# ---------- Logbook manager (simple SQLite) ----------
-LOG_DB_PATH = Path("logs/extraction_logbook.db")
-LOG_DB_PATH.parent.mkdir(exist_ok=True)
+# ---------- Logbook manager (SQLite, written in batches by a background thread) ----------
+# Backend/logs, whatever the working directory of the process importing this module
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+LOG_DB_PATH = Path(os.getenv("EXTRACTION_LOGBOOK_DB", str(BACKEND_ROOT / "logs" / "extraction_logbook.db")))
+LOGBOOK_FLUSH_SECONDS = float(os.getenv("EXTRACTION_LOGBOOK_FLUSH_SECONDS", "2"))
+LOGBOOK_BATCH_SIZE = int(os.getenv("EXTRACTION_LOGBOOK_BATCH_SIZE", "100"))
+# rows held in memory while the database is slow/locked; the oldest are dropped beyond this
+LOGBOOK_MAX_BUFFER = int(os.getenv("EXTRACTION_LOGBOOK_MAX_BUFFER", "10000"))
+
+INSERT_LOG_SQL = (
+    "INSERT INTO extraction_logs (timestamp, file_path, file_size, page_count, attempts_json, success_module, "
+    "success, extracted_length, quality_score, metadata_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
 
 
 class Logbook:
-    def __init__(self, db_path: Path = LOG_DB_PATH):
+    """
+    Append queue in front of extraction_logs: record() only buffers the row, a background
+    thread writes buffered rows in one transaction per batch (WAL mode, so readers and
+    other workers are not blocked). Buffered rows are flushed on close()/interpreter exit.
+    Nothing is opened or started until the first record(): processes that only import the
+    extractor get no database file and no thread, and a forked child starts its own writer.
+    """
+
+    def __init__(self, db_path: Path = LOG_DB_PATH,
+                 flush_interval: float = LOGBOOK_FLUSH_SECONDS,
+                 batch_size: int = LOGBOOK_BATCH_SIZE,
+                 max_buffer: int = LOGBOOK_MAX_BUFFER):
         self.db_path = db_path
-        self._ensure_table()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._start_lock = threading.Lock()
+        self._flusher = None
+        self._table_ready = False
+
+    def _start(self):
+        """Start the background writer in this process (threads do not survive fork)"""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._start_lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            first = self._flusher is None
+            self._flusher = threading.Thread(target=self._flush_loop, name="extraction-logbook-flush", daemon=True)
+            self._flusher.start()
+            if first:
+                atexit.register(self.close)
 
     def _conn(self):
-        return sqlite3.connect(str(self.db_path), timeout=30)
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
 
     def _ensure_table(self):
+        if self._table_ready:
+            return
         q = """
         CREATE TABLE IF NOT EXISTS extraction_logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -71,26 +140,103 @@ class Logbook:
             metadata_json TEXT
         );
         """
-        with self._conn() as c:
-            c.execute(q)
-            c.commit()
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(q)
+            conn.commit()
+        finally:
+            conn.close()
+        self._table_ready = True
 
     def record(self, file_path: str, file_size: int, page_count: int,
                attempts: list, success_module: str,
                success: bool, extracted_length: int,
                quality_score: float, metadata: dict):
-        with self._conn() as conn:
-            conn.execute(
-                "INSERT INTO extraction_logs (timestamp, file_path, file_size, page_count, attempts_json, success_module, success, extracted_length, quality_score, metadata_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                (time.strftime("%Y-%m-%d %H:%M:%S"), file_path, file_size, page_count,
-                 json.dumps(attempts), success_module, int(success), extracted_length, quality_score, json.dumps(metadata))
-            )
-            conn.commit()
+        """Queue one row; never waits for the database"""
+        row = (time.strftime("%Y-%m-%d %H:%M:%S"), file_path, file_size, page_count,
+               json.dumps(attempts), success_module, int(success), extracted_length, quality_score, json.dumps(metadata))
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self._buffer.popleft()
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    logger.warning(f"Extraction logbook buffer full; {self.dropped} rows dropped so far")
+            self._buffer.append(row)
+            pending = len(self._buffer)
+        if self._closed.is_set():
+            # after shutdown there is no flusher thread: write through
+            self.flush()
+            return
+        self._start()
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self):
+        """Write all buffered rows, one transaction per batch, in record() order"""
+        with self._write_lock:
+            while True:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if not batch:
+                    return
+                try:
+                    self._ensure_table()
+                    conn = self._conn()
+                    try:
+                        with conn:
+                            conn.executemany(INSERT_LOG_SQL, batch)
+                    finally:
+                        conn.close()
+                except Exception as e:
+                    logger.warning(f"Extraction logbook write failed ({len(batch)} rows kept for retry): {e}")
+                    with self._lock:
+                        room = self.max_buffer - len(self._buffer)
+                        self.dropped += max(0, len(batch) - room)
+                        self._buffer.extendleft(reversed(batch[:max(0, room)]))
+                    return
+
+    def _flush_loop(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        self._closed.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush()
+
+    def fetch_outcomes(self, limit=5000):
+        """(metadata_json, attempts_json, success_module) of recent runs, for the extraction router"""
+        if not Path(self.db_path).exists():
+            return []
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                "SELECT metadata_json, attempts_json, success_module FROM extraction_logs ORDER BY id DESC LIMIT ?",
+                (limit,))
+            return cur.fetchall()
+        finally:
+            conn.close()
 
     def fetch_recent(self, limit=100):
-        with self._conn() as conn:
+        self.flush()
+        self._ensure_table()
+        conn = self._conn()
+        try:
             cur = conn.execute("SELECT * FROM extraction_logs ORDER BY id DESC LIMIT ?", (limit,))
             return cur.fetchall()
+        finally:
+            conn.close()
 
 
 logbook = Logbook()
@@ -114,27 +260,17 @@ def simple_page_count(file_path: Path) -> int:
         return 1
 
 
+stats_engine = TextStatsEngine(KEYWORD_SET)
+
+
 def text_stats(text: str) -> dict:
-    if not text:
-        return {"chars": 0, "words": 0, "digit_ratio": 0.0, "whitespace_ratio": 0.0, "keyword_hits": 0}
-    chars = len(text)
-    words = len(text.split())
-    digits = sum(c.isdigit() for c in text)
-    whitespace = sum(1 for c in text if c.isspace())
-    digit_ratio = digits / max(1, chars)
-    whitespace_ratio = whitespace / max(1, chars)
-    keyword_hits = sum(1 for kw in KEYWORD_SET if kw.lower() in text.lower())
-    return {
-        "chars": chars,
-        "words": words,
-        "digit_ratio": digit_ratio,
-        "whitespace_ratio": whitespace_ratio,
-        "keyword_hits": keyword_hits
-    }
+    return stats_engine.scan(text)
 
-def quality_score(text: str, file_path: Path) -> float:
+def quality_score(text: str, file_path: Path, probe: DocumentProbe = None, pages: int = None) -> float:
     """
     Returns score 0-100. Higher is better.
+    Pass the document's probe to reuse its cached page count instead of reopening the file;
+    pass pages to score a page prefix as a document of that many pages.
     Heuristics:
       - chars length thresholds
       - keyword_hits
@@ -144,7 +280,8 @@ def quality_score(text: str, file_path: Path) -> float:
     stats = text_stats(text)
     chars = stats["chars"]
     kw = stats["keyword_hits"]
-    pages = simple_page_count(file_path)
+    if pages is None:
+        pages = probe.page_count if probe is not None else simple_page_count(file_path)
     # length score
     if chars >= 2000:
         length_score = 100
@@ -199,82 +336,165 @@ def opencv_preprocess_pdf_image(image_path: Path, out_path: Path) -> bool:
         logger.warning("OpenCV not installed. Skipping OpenCV preprocessing.")
         return False
 
-    try:
-        img = cv2.imread(str(image_path))
-        if img is None:
-            logger.warning("OpenCV failed to read image.")
-            return False
-
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-        # Denoise
-        gray = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
-
-        # Adaptive threshold for contrast enhancement
-        th = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                   cv2.THRESH_BINARY, 31, 10)
-
-        # Optional: morphological ops to remove noise
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 1))
-        th = cv2.morphologyEx(th, cv2.MORPH_OPEN, kernel)
-
-        # Upscale if small
-        h, w = th.shape
-        if max(h, w) < 1200:
-            scale = 2
-            th = cv2.resize(th, (w*scale, h*scale), interpolation=cv2.INTER_CUBIC)
-
-        # Save
-        cv2.imwrite(str(out_path), th)
-        return True
-    except Exception as e:
-        logger.exception("OpenCV preprocessing failed: %s", e)
+    img = cv2.imread(str(image_path))
+    if img is None:
+        logger.warning("OpenCV failed to read image.")
         return False
+    th = opencv_preprocess_array(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+    if th is None:
+        return False
+    cv2.imwrite(str(out_path), th)
+    return True
 
-# ---------- PaddleOCR wrapper ----------
-_paddle_ocr_instance = None
-
+# ---------- PaddleOCR wrapper (engine lives in ocr_engines, loaded once per process) ----------
 def paddle_extract_from_image(image_path: Path, lang="en") -> str:
-    global _paddle_ocr_instance
-    if PaddleOCR is None:
-        logger.warning("PaddleOCR not installed. Skipping PaddleOCR.")
-        return ""
-    if _paddle_ocr_instance is None:
-        _paddle_ocr_instance = PaddleOCR(use_angle_cls=True, lang=lang)  # may download models
+    return paddle_ocr(str(image_path), lang)
+
+def _ocr_notes(res: dict) -> str:
+    notes = f"pages {res['pages_done']}/{res['pages_total']}"
+    if res.get("timed_out"):
+        notes += f", {res['timed_out']} timed out"
+    if res.get("abandoned"):
+        notes += ", abandoned: running quality too low"
+    return notes
+
+# ---------- Attempts (each returns (text, notes); the router decides the order) ----------
+def attempt_unstructured_primary(file_path: Path, page_images: PageImageCache, quality: RunningQuality) -> tuple:
+    # prefer extract_text_97_percent if present
+    if hasattr(extractor97, "extract_text_97_percent"):
+        return extractor97.extract_text_97_percent(file_path, strategy="fast"), ""
+    # fallback to unified interface - use extract_text function directly
+    # The extract_text function takes the content (here a read-only mmap, not a copy) and filename
     try:
-        res = _paddle_ocr_instance.ocr(str(image_path), cls=True)
-        lines = []
-        for page in res:
-            for line in page:
-                # line format: [ [bbox], (text, confidence) ]
-                txt = line[-1][0] if isinstance(line[-1], tuple) else str(line[-1])
-                lines.append(txt)
-        return "\n".join(lines)
+        with open_mapped(file_path) as file_bytes:
+            return extractor97.extract_text(file_bytes, file_path.name), ""
     except Exception as e:
-        logger.exception("PaddleOCR extraction failed: %s", e)
-        return ""
+        logger.warning(f"Failed to use extract_text fallback: {e}")
+        return None, ""
+
+def attempt_unstructured_alternate(file_path: Path, page_images: PageImageCache, quality: RunningQuality) -> tuple:
+    if hasattr(unstructured_runner, "extract_text_from_file"):
+        return unstructured_runner.extract_text_from_file(file_path, strategy="fast"), ""
+    return None, ""
+
+def attempt_docx(file_path: Path, page_images: PageImageCache, quality: RunningQuality) -> tuple:
+    if hasattr(unstructured_runner, "extract_text_from_docx"):
+        return unstructured_runner.extract_text_from_docx(file_path), ""
+    return None, ""
+
+def attempt_pypdf2(file_path: Path, page_images: PageImageCache, quality: RunningQuality) -> tuple:
+    if hasattr(extractor97, "extract_text_with_pypdf2_fallback"):
+        return extractor97.extract_text_with_pypdf2_fallback(file_path), ""
+    # simple fallback manual attempt, page by page with the running quality checks
+    import PyPDF2
+    with open(file_path, "rb") as f:
+        r = PyPDF2.PdfReader(f)
+
+        def page_texts():
+            for p in r.pages:
+                try:
+                    yield p.extract_text() or ""
+                except Exception:
+                    yield ""
+
+        res = consume_pages(page_texts(), quality, len(r.pages))
+    return res["text"] or None, _ocr_notes(res) if res["abandoned"] else ""
+
+def attempt_tesseract(file_path: Path, page_images: PageImageCache, quality: RunningQuality) -> tuple:
+    # Use extractor's OCR routine if it exposes one
+    if hasattr(extractor97, "extract_text_with_poppler_optimization"):
+        return extractor97.extract_text_with_poppler_optimization(file_path), ""
+    # Minimal common approach: cached page rasters -> pytesseract, pages in parallel
+    import pytesseract  # noqa: F401  (fail the attempt early if missing)
+    ocr = ocr_pages(tesseract_page, page_images.arrays(), abandon_when=quality.hopeless)
+    return ocr["text"] or None, _ocr_notes(ocr)
+
+def attempt_opencv_tesseract(file_path: Path, page_images: PageImageCache, quality: RunningQuality) -> tuple:
+    # preprocess + OCR each cached page in memory, pages in parallel
+    import pytesseract  # noqa: F401  (fail the attempt early if missing)
+    ocr = ocr_pages(opencv_tesseract_page, page_images.arrays(), abandon_when=quality.hopeless)
+    return ocr["text"], _ocr_notes(ocr)
+
+def attempt_paddle(file_path: Path, page_images: PageImageCache, quality: RunningQuality) -> tuple:
+    # run PaddleOCR on the cached page arrays, pages in parallel
+    ocr = ocr_pages(paddle_page, page_images.arrays(), abandon_when=quality.hopeless)
+    return ocr["text"], _ocr_notes(ocr)
+
+# module name -> (log label, attempt function)
+ATTEMPTS = {
+    "unstructured_primary": ("Unstructured (primary)", attempt_unstructured_primary),
+    "unstructured_alternate": ("Unstructured alternate", attempt_unstructured_alternate),
+    "docx_extractor": ("DOCX direct extractor", attempt_docx),
+    "pypdf2": ("PyPDF2", attempt_pypdf2),
+    "tesseract_ocr": ("Tesseract OCR", attempt_tesseract),
+    "opencv_tesseract_retry": ("OpenCV preprocess + Tesseract", attempt_opencv_tesseract),
+    "paddleocr": ("PaddleOCR", attempt_paddle),
+}
+
+router = ExtractionRouter(fetch_outcomes=lambda: logbook.fetch_outcomes(ROUTER_HISTORY_LIMIT))
 
 # ---------- Main consolidated function ----------
-def extract_with_logging(file_path: Path, metadata: dict = None, quality_threshold: float = 70.0) -> dict:
+def extract_with_logging(file_path: Path, metadata: dict = None, quality_threshold: float = 70.0,
+                         content_hash: str = None) -> dict:
     """
     Main API:
       - file_path: Path to file (pdf/docx)
       - metadata: optional dict with additional info
       - quality_threshold: fallback threshold (0-100)
+      - content_hash: SHA-256 of the file if the caller already has it (e.g. computed while spooling)
     Returns:
-      dict with keys: success (bool), module (which module produced result), text, score, attempts (list)
+      dict with keys: success (bool), module (which module produced result), text, score, attempts (list),
+      route (document class and attempt order chosen by the router), cached (served from extraction_cache)
     """
     if metadata is None:
         metadata = {}
 
+    if not content_hash:
+        try:
+            content_hash = file_sha256(file_path)
+        except Exception as e:
+            logger.warning(f"Could not hash {file_path} for the extraction cache: {e}")
+            content_hash = None
+    cached = extraction_cache.get(content_hash) if content_hash else None
+    if cached and cached["score"] is not None and cached["score"] >= quality_threshold:
+        logger.info(f"Extraction cache hit for {file_path.name}: {cached['module']} (score {cached['score']:.1f})")
+        attempts = [{
+            "module": "extraction_cache",
+            "success": True,
+            "length": len(cached["text"]),
+            "notes": f"sha256 {content_hash[:12]}, originally {cached['module']}",
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }]
+        logbook.record(str(file_path), file_path.stat().st_size, cached["page_count"] or 1, attempts, cached["module"],
+                       True, len(cached["text"]), cached["score"],
+                       {**metadata, "sha256": content_hash, "cache_hit": True})
+        return {
+            "success": True,
+            "module": cached["module"],
+            "text": cached["text"],
+            "score": cached["score"],
+            "attempts": attempts,
+            "route": None,
+            "cached": True,
+        }
+
     attempts = []
     last_text = None
     success_module = None
     success = False
 
-    file_size = file_path.stat().st_size if file_path.exists() else 0
-    page_count = simple_page_count(file_path)
+    # parsed once here; page count etc. are shared by routing, every attempt and quality check
+    probe = DocumentProbe(file_path)
+    file_size = probe.file_size
+    page_count = probe.page_count
+    route_class, order = router.route(probe)
+    logger.info(f"Extraction route for {file_path.name} ({route_class}): {' -> '.join(order)}")
+    # rendered on first use by an OCR attempt, then shared by the later ones
+    page_images = PageImageCache(file_path)
+
+    # page-by-page attempts give up once the pages so far look hopeless
+    running_quality = RunningQuality(lambda text, pages=None: quality_score(text, file_path, probe, pages=pages),
+                                     quality_threshold, page_count)
 
     # Helper to append attempt
     def record_attempt(name, text, notes=""):
@@ -289,228 +509,39 @@ def extract_with_logging(file_path: Path, metadata: dict = None, quality_thresho
         attempts.append(rec)
         return rec
 
-    # ---------- 1. Unstructured primary: try extractor97.extract_text_97_percent or unified fallback ----------
-    try:
-        logger.info("Attempt 1: Unstructured (primary) via final_97_percent_extractor")
-        # prefer extract_text_97_percent if present
-        if hasattr(extractor97, "extract_text_97_percent"):
-            text = extractor97.extract_text_97_percent(file_path, strategy="fast")
-        else:
-            # fallback to unified interface - use extract_text function directly
-            # The extract_text function expects file_bytes and filename
-            try:
-                with open(file_path, 'rb') as f:
-                    file_bytes = f.read()
-                text = extractor97.extract_text(file_bytes, file_path.name)
-            except Exception as e:
-                logger.warning(f"Failed to use extract_text fallback: {e}")
-                text = None
-        record_attempt("unstructured_primary", text)
-        score = quality_score(text or "", file_path)
-        logger.info(f"Unstructured primary quality score: {score:.1f}")
-        if text and score >= quality_threshold:
-            last_text = text
-            success_module = "unstructured_primary"
-            success = True
-        else:
-            logger.info("Unstructured primary either failed or below quality threshold; continuing to fallback.")
-    except Exception as e:
-        record_attempt("unstructured_primary", None, notes=f"exception: {e}")
-        logger.exception("Unstructured primary raised exception")
-
-    # ---------- 2. Unstructured alternate (if available) ----------
-    if not success:
-        try:
-            logger.info("Attempt 2: Unstructured alternate / inference path")
-            if hasattr(unstructured_runner, "extract_text_from_file"):
-                text = unstructured_runner.extract_text_from_file(file_path, strategy="fast")
-            else:
-                text = None
-            record_attempt("unstructured_alternate", text)
-            score = quality_score(text or "", file_path)
-            logger.info(f"Unstructured alternate quality score: {score:.1f}")
-            if text and score >= quality_threshold:
-                last_text = text
-                success_module = "unstructured_alternate"
-                success = True
-            else:
-                logger.info("Unstructured alternate failed or low quality.")
-        except Exception as e:
-            record_attempt("unstructured_alternate", None, notes=f"exception: {e}")
-            logger.exception("Unstructured alternate raised exception")
-
-    # ---------- 3. DOCX (direct doc extractor) ----------
-    if not success and file_path.suffix.lower() in {".doc", ".docx"}:
-        try:
-            logger.info("Attempt 3: DOCX direct extractor")
-            if hasattr(unstructured_runner, "extract_text_from_docx"):
-                text = unstructured_runner.extract_text_from_docx(file_path)
-            else:
-                text = None
-            record_attempt("docx_extractor", text)
-            score = quality_score(text or "", file_path)
-            logger.info(f"DOCX extractor quality score: {score:.1f}")
-            if text and score >= quality_threshold:
-                last_text = text
-                success_module = "docx_extractor"
-                success = True
-            else:
-                logger.info("DOCX extractor failed or low quality.")
-        except Exception as e:
-            record_attempt("docx_extractor", None, notes=f"exception: {e}")
-            logger.exception("DOCX extractor raised exception")
-
-    # ---------- 4. PyPDF2 fallback ----------
-    if not success and file_path.suffix.lower() == ".pdf":
-        try:
-            logger.info("Attempt 4: PyPDF2 fallback")
-            if hasattr(extractor97, "extract_text_with_pypdf2_fallback"):
-                text = extractor97.extract_text_with_pypdf2_fallback(file_path)
-            else:
-                # simple fallback manual attempt
-                import PyPDF2
-                with open(file_path, "rb") as f:
-                    r = PyPDF2.PdfReader(f)
-                    pages_text = []
-                    for p in r.pages:
-                        try:
-                            pages_text.append(p.extract_text() or "")
-                        except Exception:
-                            continue
-                    text = "\n\n".join(pages_text) or None
-            record_attempt("pypdf2", text)
-            score = quality_score(text or "", file_path)
-            logger.info(f"PyPDF2 quality score: {score:.1f}")
-            if text and score >= quality_threshold:
-                last_text = text
-                success_module = "pypdf2"
-                success = True
-            else:
-                logger.info("PyPDF2 failed or low quality.")
-        except Exception as e:
-            record_attempt("pypdf2", None, notes=f"exception: {e}")
-            logger.exception("PyPDF2 fallback raised exception")
-
-    # ---------- 5. OCR via Tesseract (via pdf2image/poppler) ----------
-    if not success and file_path.suffix.lower() == ".pdf":
+    for step, name in enumerate(order, start=1):
+        label, attempt = ATTEMPTS[name]
         try:
-            logger.info("Attempt 5: OCR via Tesseract (pdf2image -> pytesseract)")
-            # Use extractor's OCR routine if it exposes one
-            # try final extractor OCR function names
-            text = None
-            if hasattr(extractor97, "extract_text_with_poppler_optimization"):
-                text = extractor97.extract_text_with_poppler_optimization(file_path)
-            else:
-                # Minimal common approach: pdf2image -> pytesseract
-                from pdf2image import convert_from_path
-                import pytesseract
-                pages = convert_from_path(str(file_path))
-                page_texts = []
-                for page_img in pages:
-                    page_texts.append(pytesseract.image_to_string(page_img))
-                text = "\n\n".join(page_texts) if page_texts else None
-
-            record_attempt("tesseract_ocr", text)
-            score = quality_score(text or "", file_path)
-            logger.info(f"Tesseract OCR quality score: {score:.1f}")
+            logger.info(f"Attempt {step}: {label}")
+            text, notes = attempt(file_path, page_images, running_quality)
+            record_attempt(name, text, notes=notes)
+            score = quality_score(text or "", file_path, probe)
+            logger.info(f"{label} quality score: {score:.1f}")
             if text and score >= quality_threshold:
                 last_text = text
-                success_module = "tesseract_ocr"
+                success_module = name
                 success = True
-            else:
-                logger.info("Tesseract OCR failed or produced low quality.")
+                break
+            logger.info(f"{label} failed or below quality threshold; continuing to fallback.")
         except Exception as e:
-            record_attempt("tesseract_ocr", None, notes=f"exception: {e}")
-            logger.exception("Tesseract OCR raised exception")
-
-    # ---------- 6. NEW: OpenCV preprocessing -> Tesseract (retry) ----------
-    if not success and file_path.suffix.lower() in {".pdf", ".png", ".jpg", ".jpeg", ".tiff"}:
-        try:
-            logger.info("Attempt 6: OpenCV preprocess + Tesseract retry")
-            # Convert pdf page(s) to images first (use pdf2image)
-            from pdf2image import convert_from_path
-            images = []
-            if file_path.suffix.lower() == ".pdf":
-                images = convert_from_path(str(file_path))
-            else:
-                # image file
-                import PIL.Image as PILImage
-                images = [PILImage.open(str(file_path))]
-
-            # process each page: save temp, preprocess, OCR
-            import tempfile
-            import pytesseract
-            page_texts = []
-            for idx, pil_img in enumerate(images):
-                with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp_in:
-                    pil_img.save(tmp_in.name, format="PNG")
-                    tmp_in_path = Path(tmp_in.name)
-                tmp_out = tmp_in_path.with_name(tmp_in_path.stem + "_cv.png")
-                processed = opencv_preprocess_pdf_image(tmp_in_path, tmp_out)
-                ocr_source = tmp_out if processed else tmp_in_path
-                try:
-                    txt = pytesseract.image_to_string(str(ocr_source))
-                except Exception:
-                    txt = ""
-                page_texts.append(txt)
-            text = "\n\n".join(t for t in page_texts if t.strip())
-            record_attempt("opencv_tesseract_retry", text)
-            score = quality_score(text or "", file_path)
-            logger.info(f"OpenCV+Tesseract quality score: {score:.1f}")
-            if text and score >= quality_threshold:
-                last_text = text
-                success_module = "opencv_tesseract_retry"
-                success = True
-            else:
-                logger.info("OpenCV+Tesseract retry failed or low quality.")
-        except Exception as e:
-            record_attempt("opencv_tesseract_retry", None, notes=f"exception: {e}")
-            logger.exception("OpenCV preprocessing or retry failed")
-
-    # ---------- 7. NEW: PaddleOCR fallback ----------
-    if not success and file_path.suffix.lower() in {".pdf", ".png", ".jpg", ".jpeg", ".tiff"}:
-        try:
-            logger.info("Attempt 7: PaddleOCR fallback")
-            # Convert to images (pdf2image for PDFs) then run paddle_extract_from_image
-            from pdf2image import convert_from_path
-            import tempfile
-            images = []
-            if file_path.suffix.lower() == ".pdf":
-                images = convert_from_path(str(file_path))
-            else:
-                import PIL.Image as PILImage
-                images = [PILImage.open(str(file_path))]
-
-            page_texts = []
-            for idx, pil_img in enumerate(images):
-                with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as t:
-                    pil_img.save(t.name, format="PNG")
-                    tpath = Path(t.name)
-                txt = paddle_extract_from_image(tpath)
-                page_texts.append(txt)
-            text = "\n\n".join([t for t in page_texts if t and t.strip()])
-            record_attempt("paddleocr", text)
-            score = quality_score(text or "", file_path)
-            logger.info(f"PaddleOCR quality score: {score:.1f}")
-            if text and score >= quality_threshold:
-                last_text = text
-                success_module = "paddleocr"
-                success = True
-            else:
-                logger.info("PaddleOCR failed or low quality.")
-        except Exception as e:
-            record_attempt("paddleocr", None, notes=f"exception: {e}")
-            logger.exception("PaddleOCR fallback raised exception")
+            record_attempt(name, None, notes=f"exception: {e}")
+            logger.exception(f"{label} raised exception")
 
     # Finalize
-    final_score = quality_score(last_text or "", file_path)
+    page_images.close()
+    final_score = quality_score(last_text or "", file_path, probe)
     total_length = len(last_text or "")
-    logbook.record(str(file_path), file_size, page_count, attempts, success_module or "", success, total_length, final_score, metadata or {})
+    if success and content_hash:
+        extraction_cache.set(content_hash, last_text, success_module, final_score, page_count)
+    logbook.record(str(file_path), file_size, page_count, attempts, success_module or "", success, total_length, final_score,
+                   {**metadata, "sha256": content_hash, "probe": probe.as_dict(), "route_class": route_class})
 
     return {
         "success": success,
         "module": success_module,
         "text": last_text,
         "score": final_score,
-        "attempts": attempts
-    }
\ No newline at end of file
+        "attempts": attempts,
+        "route": {"class": route_class, "order": order},
+        "cached": False,
+    }
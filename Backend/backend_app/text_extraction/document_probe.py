@@ -0,0 +1,118 @@
+"""
+document_probe.py
+
+One-time inspection of a document for the consolidated extractor:
+- Parses a PDF once (PyPDF2) and caches page count, size, text-layer presence and
+  producer/creator metadata, so quality_score and every attempt reuse them instead of
+  reopening the file
+- Text-layer presence is read from page resources (fonts vs. images, including resources
+  inherited from the page tree), not by extracting text
+- Non-PDF files (DOCX, images) are probed from their suffix and size only
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".tiff"}
+WORD_SUFFIXES = {".doc", ".docx"}
+
+
+def _resolve(obj):
+    return obj.get_object() if hasattr(obj, "get_object") else obj
+
+
+def _page_resources(page) -> dict:
+    """
+    A page's /Resources, inherited from the nearest /Pages ancestor when the page has none
+    (allowed by the PDF spec; some PyPDF2 versions do not copy them onto the page)
+    """
+    node = _resolve(page)
+    for _ in range(64):  # guard against /Parent cycles in malformed files
+        if node is None:
+            break
+        resources = _resolve(node.get("/Resources"))
+        if resources is not None:
+            return resources
+        node = _resolve(node.get("/Parent"))
+    return {}
+
+
+class DocumentProbe:
+    """
+    Cached facts about one file.
+
+    Attributes:
+        page_count: pages (1 when unknown, matching the old simple_page_count fallback)
+        text_pages: pages whose resources declare fonts (i.e. carry a text layer)
+        image_only_pages: pages with images but no fonts (scans)
+        has_text_layer: True if any page carries a text layer
+        producer / creator: PDF document-info metadata, if present
+    """
+
+    def __init__(self, file_path: Path):
+        self.file_path = Path(file_path)
+        self.suffix = self.file_path.suffix.lower()
+        self.file_size = self.file_path.stat().st_size if self.file_path.exists() else 0
+        self.page_count = 1
+        self.text_pages = 0
+        self.image_only_pages = 0
+        self.has_text_layer = False
+        self.encrypted = False
+        self.producer: Optional[str] = None
+        self.creator: Optional[str] = None
+        self.error: Optional[str] = None
+
+        if self.is_pdf:
+            self._probe_pdf()
+
+    @property
+    def is_pdf(self) -> bool:
+        return self.suffix == ".pdf"
+
+    @property
+    def is_word(self) -> bool:
+        return self.suffix in WORD_SUFFIXES
+
+    @property
+    def is_image(self) -> bool:
+        return self.suffix in IMAGE_SUFFIXES
+
+    def _probe_pdf(self):
+        try:
+            import PyPDF2
+            with open(self.file_path, "rb") as f:
+                reader = PyPDF2.PdfReader(f)
+                self.encrypted = bool(reader.is_encrypted)
+                self.page_count = len(reader.pages) or 1
+                for page in reader.pages:
+                    resources = _page_resources(page)
+                    has_fonts = bool(_resolve(resources.get("/Font")))
+                    has_images = bool(_resolve(resources.get("/XObject")))
+                    if has_fonts:
+                        self.text_pages += 1
+                    elif has_images:
+                        self.image_only_pages += 1
+                self.has_text_layer = self.text_pages > 0
+                info = reader.metadata
+                if info:
+                    self.producer = info.get("/Producer")
+                    self.creator = info.get("/Creator")
+        except Exception as e:
+            self.error = str(e)
+            logger.debug(f"PDF probe failed for {self.file_path}: {e}")
+
+    def as_dict(self) -> dict:
+        return {
+            "suffix": self.suffix,
+            "file_size": self.file_size,
+            "page_count": self.page_count,
+            "text_pages": self.text_pages,
+            "image_only_pages": self.image_only_pages,
+            "has_text_layer": self.has_text_layer,
+            "encrypted": self.encrypted,
+            "producer": str(self.producer) if self.producer else None,
+            "creator": str(self.creator) if self.creator else None,
+        }
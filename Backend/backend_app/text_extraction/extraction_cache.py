@@ -0,0 +1,187 @@
+"""
+extraction_cache.py
+
+Content-addressed cache of extraction results:
+- Keyed by the SHA-256 of the file bytes (FileHasher), so the same resume arriving via web
+  upload, WhatsApp and email is extracted once
+- Stores extracted text, the winning module, quality score and page count in a SQLite file
+  shared by every worker on the host
+- Size-bounded: least-recently-used rows are evicted once the stored text exceeds
+  EXTRACTION_CACHE_MAX_BYTES
+- Used by extract_with_logging (scored results) and final_97_percent_extractor.extract_text
+- The SQLite file (Backend/logs/extraction_cache.db unless EXTRACTION_CACHE_DB is set) is opened
+  on the first lookup or store, not at import
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+CACHE_DB_PATH = Path(os.getenv("EXTRACTION_CACHE_DB", str(BACKEND_ROOT / "logs" / "extraction_cache.db")))
+CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # 256 MB of text
+
+
+def _sha256_hasher():
+    try:
+        from backend_app.file_intake.utils.file_hasher import FileHasher
+        return FileHasher("sha256")
+    except ImportError as e:
+        # file_intake.utils' package __init__ can fail to import; hash with hashlib directly (same digest)
+        logger.debug(f"FileHasher unavailable ({e}); using hashlib")
+        return None
+
+
+_hasher = _sha256_hasher()
+
+
+def file_sha256(file_path: Path) -> str:
+    if _hasher is not None:
+        return _hasher.calculate_hash(str(file_path))
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def bytes_sha256(data: bytes) -> str:
+    if _hasher is not None:
+        return _hasher.calculate_hash_from_bytes(data)
+    return hashlib.sha256(data).hexdigest()
+
+
+class ExtractionCache:
+    """
+    SHA-256 -> extraction result.
+
+    Entries written by extract_text are Unstructured.io results with score=None (unscored);
+    extract_with_logging only accepts entries whose score passes its quality threshold, and
+    extract_text only accepts scored or Unstructured.io entries.
+    """
+
+    def __init__(self, db_path: Optional[Path] = CACHE_DB_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        # None until the SQLite file is first needed
+        self._disk_ok: Optional[bool] = None if CACHE_ENABLED and self.db_path is not None else False
+
+    def _disk(self) -> bool:
+        """Open the SQLite file on first use; False when caching is off or the file cannot be opened"""
+        if self._disk_ok is None:
+            with self._lock:
+                if self._disk_ok is None:
+                    try:
+                        self._ensure_table()
+                        self._disk_ok = True
+                    except Exception as e:
+                        logger.warning(f"Extraction cache unavailable ({self.db_path}): {e}")
+                        self._disk_ok = False
+        return self._disk_ok
+
+    def _conn(self):
+        return sqlite3.connect(str(self.db_path), timeout=5)
+
+    def _ensure_table(self):
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as c:
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                sha256 TEXT PRIMARY KEY,
+                text TEXT,
+                module TEXT,
+                score REAL,
+                page_count INTEGER,
+                size_bytes INTEGER,
+                created_at REAL,
+                last_access REAL
+            )
+            """)
+            c.execute("CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_access ON extraction_cache(last_access)")
+            c.commit()
+
+    def get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        if not self._disk():
+            return None
+        try:
+            with self._conn() as c:
+                row = c.execute(
+                    "SELECT text, module, score, page_count FROM extraction_cache WHERE sha256 = ?", (sha256,)
+                ).fetchone()
+                if row:
+                    c.execute("UPDATE extraction_cache SET last_access = ? WHERE sha256 = ?", (time.time(), sha256))
+                    c.commit()
+        except Exception as e:
+            logger.warning(f"Extraction cache read failed: {e}")
+            row = None
+        with self._lock:
+            self._stats["hits" if row else "misses"] += 1
+        if not row:
+            return None
+        return {"text": row[0], "module": row[1], "score": row[2], "page_count": row[3]}
+
+    def set(self, sha256: str, text: str, module: str, score: Optional[float] = None,
+            page_count: Optional[int] = None):
+        if not text or not self._disk():
+            return
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            with self._conn() as c:
+                c.execute(
+                    "INSERT OR REPLACE INTO extraction_cache "
+                    "(sha256, text, module, score, page_count, size_bytes, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (sha256, text, module, score, page_count, size, now, now)
+                )
+                evicted = self._evict(c)
+                c.commit()
+            with self._lock:
+                self._stats["stores"] += 1
+                self._stats["evictions"] += evicted
+        except Exception as e:
+            logger.warning(f"Extraction cache write failed: {e}")
+
+    def _evict(self, c) -> int:
+        """Drop least-recently-used rows until the stored text fits in max_bytes"""
+        total = c.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM extraction_cache").fetchone()[0]
+        evicted = 0
+        if total <= self.max_bytes:
+            return 0
+        for sha256, size in c.execute(
+                "SELECT sha256, size_bytes FROM extraction_cache ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            c.execute("DELETE FROM extraction_cache WHERE sha256 = ?", (sha256,))
+            total -= size
+            evicted += 1
+        return evicted
+
+    def clear(self):
+        if self._disk():
+            with self._conn() as c:
+                c.execute("DELETE FROM extraction_cache")
+                c.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+        lookups = s["hits"] + s["misses"]
+        s["hit_rate"] = round(s["hits"] / lookups, 4) if lookups else 0.0
+        return s
+
+
+extraction_cache = ExtractionCache()
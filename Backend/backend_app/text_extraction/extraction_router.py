@@ -0,0 +1,150 @@
+"""
+extraction_router.py
+
+Chooses the order of the consolidated extractor's attempts per document:
+- Classifies the file from its DocumentProbe (born-digital PDF, scanned PDF, mixed PDF,
+  Word document, image, other)
+- Orders the eligible attempts by expected cost: success probability / relative cost, so
+  cheap local extractors run before the remote Unstructured call when they are likely to pass
+- Learns per-class success rates from the extraction_logs table (blended with fixed priors
+  until enough samples exist) and refreshes them periodically
+- Every eligible attempt stays in the route, so a miss still falls through to the others
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from backend_app.text_extraction.document_probe import DocumentProbe
+
+logger = logging.getLogger(__name__)
+
+SMART_ROUTING = os.getenv("EXTRACTION_SMART_ROUTING", "true").lower() in ("1", "true", "yes")
+ROUTER_REFRESH_SECONDS = int(os.getenv("EXTRACTION_ROUTER_REFRESH_SECONDS", "300"))
+ROUTER_HISTORY_LIMIT = int(os.getenv("EXTRACTION_ROUTER_HISTORY_LIMIT", "5000"))
+# logged tries that weigh as much as the prior; below this the prior dominates
+PRIOR_WEIGHT = 10
+
+# the original fixed fallback chain (also the tie-break order)
+DEFAULT_CHAIN = [
+    "unstructured_primary",
+    "unstructured_alternate",
+    "docx_extractor",
+    "pypdf2",
+    "tesseract_ocr",
+    "opencv_tesseract_retry",
+    "paddleocr",
+]
+
+# relative wall-clock cost (pypdf2 on a text PDF = 1)
+ATTEMPT_COST = {
+    "pypdf2": 1,
+    "docx_extractor": 1,
+    "tesseract_ocr": 20,
+    "opencv_tesseract_retry": 25,
+    "unstructured_primary": 30,
+    "unstructured_alternate": 30,
+    "paddleocr": 40,
+}
+
+# prior probability that an attempt passes the quality threshold, per document class
+PRIORS: Dict[str, Dict[str, float]] = {
+    "pdf_text": {"pypdf2": 0.85, "unstructured_primary": 0.9, "unstructured_alternate": 0.8,
+                 "tesseract_ocr": 0.6, "opencv_tesseract_retry": 0.6, "paddleocr": 0.6},
+    "pdf_mixed": {"pypdf2": 0.4, "unstructured_primary": 0.85, "unstructured_alternate": 0.75,
+                  "tesseract_ocr": 0.7, "opencv_tesseract_retry": 0.7, "paddleocr": 0.7},
+    "pdf_scanned": {"pypdf2": 0.02, "unstructured_primary": 0.8, "unstructured_alternate": 0.7,
+                    "tesseract_ocr": 0.7, "opencv_tesseract_retry": 0.75, "paddleocr": 0.75},
+    "word": {"docx_extractor": 0.9, "unstructured_primary": 0.85, "unstructured_alternate": 0.8},
+    "image": {"opencv_tesseract_retry": 0.7, "paddleocr": 0.75, "unstructured_primary": 0.8,
+              "unstructured_alternate": 0.7},
+    "other": {"unstructured_primary": 0.7, "unstructured_alternate": 0.6},
+}
+
+
+def classify(probe: DocumentProbe) -> str:
+    if probe.is_word:
+        return "word"
+    if probe.is_image:
+        return "image"
+    if not probe.is_pdf:
+        return "other"
+    if not probe.has_text_layer:
+        # unreadable PDFs land here too: OCR/remote extraction is the only hope
+        return "pdf_scanned"
+    if probe.image_only_pages:
+        return "pdf_mixed"
+    return "pdf_text"
+
+
+class ExtractionRouter:
+    """
+    Orders attempts per document class using priors blended with logged outcomes.
+
+    Usage:
+        route_class, order = router.route(probe)
+    """
+
+    def __init__(self, fetch_outcomes=None, refresh_seconds: int = ROUTER_REFRESH_SECONDS):
+        """
+        Args:
+            fetch_outcomes: callable returning (metadata_json, attempts_json, success_module) rows
+            refresh_seconds: how long learned stats are reused before re-reading the log
+        """
+        self._fetch_outcomes = fetch_outcomes
+        self.refresh_seconds = refresh_seconds
+        self._stats: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _learned(self) -> Dict[str, Dict[str, Tuple[int, int]]]:
+        with self._lock:
+            stale = self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+            if stale and self._fetch_outcomes is not None:
+                try:
+                    self._stats = self.learn(self._fetch_outcomes())
+                except Exception as e:
+                    logger.warning(f"Could not load extraction history for routing: {e}")
+                self._loaded_at = time.monotonic()
+            return self._stats
+
+    @staticmethod
+    def learn(rows) -> Dict[str, Dict[str, Tuple[int, int]]]:
+        """(metadata_json, attempts_json, success_module) rows -> {class: {module: (successes, tries)}}"""
+        stats: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        for metadata_json, attempts_json, success_module in rows:
+            try:
+                route_class = (json.loads(metadata_json or "{}") or {}).get("route_class")
+                attempts = json.loads(attempts_json or "[]") or []
+            except (TypeError, ValueError):
+                continue
+            if not route_class:
+                continue
+            per_class = stats.setdefault(route_class, {})
+            for attempt in attempts:
+                module = attempt.get("module")
+                if not module:
+                    continue
+                wins, tries = per_class.get(module, (0, 0))
+                per_class[module] = (wins + int(module == success_module), tries + 1)
+        return stats
+
+    def success_rate(self, route_class: str, module: str) -> float:
+        prior = PRIORS.get(route_class, {}).get(module, 0.5)
+        wins, tries = self._learned().get(route_class, {}).get(module, (0, 0))
+        return (wins + prior * PRIOR_WEIGHT) / (tries + PRIOR_WEIGHT)
+
+    def route(self, probe: DocumentProbe) -> Tuple[str, List[str]]:
+        """(document class, eligible attempts cheapest-likely-to-pass first)"""
+        route_class = classify(probe)
+        eligible = [m for m in DEFAULT_CHAIN if m in PRIORS[route_class]]
+        if not SMART_ROUTING:
+            return route_class, eligible
+        order = sorted(
+            eligible,
+            key=lambda m: (-self.success_rate(route_class, m) / ATTEMPT_COST[m], DEFAULT_CHAIN.index(m)),
+        )
+        return route_class, order
@@ -1,6 +1,8 @@
 """
 Final 97% extractor - comprehensive text extraction for all supported file types.
 Uses multiple extraction strategies and falls back gracefully.
+Unstructured.io results are cached by content hash (extraction_cache), so duplicate documents
+skip the API call; fallback parser output is never cached, so a later call still tries the API.
 """
 
 import logging
@@ -12,6 +14,7 @@ from backend_app.text_extraction.utils import (
     is_text_file, sanitize_filename
 )
 from backend_app.text_extraction.unstructured_io_runner import extract_with_unstructured
+from backend_app.text_extraction.extraction_cache import extraction_cache, bytes_sha256
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +23,7 @@ def extract_text(file_bytes: bytes, filename: str) -> str:
     Extract text from file using the best available method.
     
     Args:
-        file_bytes: File content as bytes
+        file_bytes: File content as bytes (or a read-only mmap of the file, see upload_spool.open_mapped)
         filename: Original filename
         
     Returns:
@@ -30,11 +33,18 @@ def extract_text(file_bytes: bytes, filename: str) -> str:
         RuntimeError: If extraction fails for all methods
     """
     logger.info(f"Starting text extraction for {filename}")
+
+    content_hash = bytes_sha256(file_bytes)
+    cached = extraction_cache.get(content_hash)
+    # unscored entries are only trusted from the API; scored ones passed extract_with_logging's threshold
+    if cached and (cached["score"] is not None or cached["module"] == "unstructured_api"):
+        logger.info(f"Extraction cache hit for {filename} ({cached['module']})")
+        return cached["text"]
     
     # Step 1: Handle text files directly
     if is_text_file(file_bytes, filename):
         try:
-            text = file_bytes.decode('utf-8')
+            text = str(file_bytes, 'utf-8')
             logger.debug(f"Text file detected, extracted {len(text)} characters")
             return text
         except Exception as e:
@@ -46,6 +56,7 @@ def extract_text(file_bytes: bytes, filename: str) -> str:
     
     if extracted_text:
         logger.debug(f"Unstructured.io extraction successful for {filename}")
+        extraction_cache.set(content_hash, extracted_text, module="unstructured_api")
         return extracted_text
     
     # Step 3: Fallback to basic extraction methods
@@ -62,6 +73,14 @@ def extract_text(file_bytes: bytes, filename: str) -> str:
     f"File size: {len(file_bytes)} bytes\n"
     f"File extension: {file_extension}"
 
+def _as_stream(file_bytes):
+    """File-like view of the content: a mapped file is read in place, bytes are wrapped"""
+    from io import BytesIO
+    if hasattr(file_bytes, "seek") and hasattr(file_bytes, "read"):
+        file_bytes.seek(0)
+        return file_bytes
+    return BytesIO(file_bytes)
+
 def _extract_with_fallback_methods(file_bytes: bytes, filename: str) -> Optional[str]:
     """
     Fallback extraction methods when primary methods fail.
@@ -95,9 +114,8 @@ def _extract_pdf_text(file_bytes: bytes, filename: str) -> Optional[str]:
         # Try PyPDF2 first
         try:
             import PyPDF2
-            from io import BytesIO
             
-            pdf_reader = PyPDF2.PdfReader(BytesIO(file_bytes))
+            pdf_reader = PyPDF2.PdfReader(_as_stream(file_bytes))
             text = ""
             
             for page_num, page in enumerate(pdf_reader.pages):
@@ -120,7 +138,7 @@ def _extract_pdf_text(file_bytes: bytes, filename: str) -> Optional[str]:
             import pdfplumber
             
             text = ""
-            with pdfplumber.open(BytesIO(file_bytes)) as pdf:
+            with pdfplumber.open(_as_stream(file_bytes)) as pdf:
                 for page in pdf.pages:
                     page_text = page.extract_text()
                     if page_text:
@@ -177,7 +195,7 @@ def _extract_doc_text(file_bytes: bytes, filename: str) -> Optional[str]:
             try:
                 import docx2txt
                 
-                text = docx2txt.process(BytesIO(file_bytes))
+                text = docx2txt.process(_as_stream(file_bytes))
                 if text and text.strip():
                     logger.debug(f"docx2txt extraction successful for {filename}")
                     return text.strip()
@@ -188,9 +206,8 @@ def _extract_doc_text(file_bytes: bytes, filename: str) -> Optional[str]:
         # Try python-docx for DOCX files
         try:
             from docx import Document
-            from io import BytesIO
             
-            doc = Document(BytesIO(file_bytes))
+            doc = Document(_as_stream(file_bytes))
             text = []
             
             for paragraph in doc.paragraphs:
@@ -250,7 +267,7 @@ def _extract_generic_text(file_bytes: bytes, filename: str) -> Optional[str]:
     """
     try:
         # Try to extract any readable text
-        text = file_bytes.decode('utf-8', errors='ignore')
+        text = str(file_bytes, 'utf-8', errors='ignore')
         
         # Filter out non-printable characters
         printable_text = ''.join(c for c in text if c.isprintable() or c.isspace())
@@ -0,0 +1,198 @@
+"""
+ocr_engines.py
+
+OCR engines for the consolidated extractor's OCR fallbacks, kept warm in long-lived processes:
+- Tesseract (pytesseract) with one shared config (EXTRACTION_TESSERACT_CONFIG)
+- OpenCV preprocessing for the Tesseract retry
+- PaddleOCR, loaded once per process (per language) instead of inside the first request
+- warm_up() preloads the engines listed in EXTRACTION_OCR_PRELOAD; parallel_ocr runs it as
+  the initializer of every pool worker. health() reports what the current process has loaded
+Page functions are top-level so parallel_ocr can send them to worker processes. This module
+stays light to import: worker processes load it without the extractor, logbook or caches.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Try optional imports for the OCR engines
+try:
+    import cv2
+except Exception:
+    cv2 = None
+
+try:
+    from paddleocr import PaddleOCR
+except Exception:
+    PaddleOCR = None
+
+logger = logging.getLogger(__name__)
+
+TESSERACT_CONFIG = os.getenv("EXTRACTION_TESSERACT_CONFIG", "")
+PADDLE_LANG = os.getenv("EXTRACTION_PADDLE_LANG", "en")
+PRELOAD_ENGINES = [e.strip() for e in os.getenv("EXTRACTION_OCR_PRELOAD", "tesseract,paddle").split(",") if e.strip()]
+
+_paddle_instances: Dict[str, Any] = {}
+_paddle_lock = threading.Lock()
+_state: Dict[str, Any] = {
+    "tesseract_version": None,
+    "errors": {},
+    "warmed_at": None,
+    "pages": 0,
+}
+
+
+# ---------- Tesseract ----------
+def tesseract_ocr(img, timeout: float = 0) -> str:
+    import pytesseract
+    return pytesseract.image_to_string(img, config=TESSERACT_CONFIG, timeout=timeout)
+
+
+def _check_tesseract():
+    try:
+        import pytesseract
+        _state["tesseract_version"] = str(pytesseract.get_tesseract_version())
+        _state["errors"].pop("tesseract", None)
+    except Exception as e:
+        _state["errors"]["tesseract"] = str(e)
+
+
+# ---------- OpenCV preprocess ----------
+def opencv_preprocess_array(img):
+    """
+    In-memory variant: RGB (or grayscale) numpy page -> denoised, thresholded, upscaled grayscale array.
+    Returns None if OpenCV is unavailable or processing fails.
+    """
+    if cv2 is None:
+        logger.warning("OpenCV not installed. Skipping OpenCV preprocessing.")
+        return None
+
+    try:
+        # Convert to grayscale
+        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+
+        # Denoise
+        gray = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+
+        # Adaptive threshold for contrast enhancement
+        th = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                   cv2.THRESH_BINARY, 31, 10)
+
+        # Optional: morphological ops to remove noise
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 1))
+        th = cv2.morphologyEx(th, cv2.MORPH_OPEN, kernel)
+
+        # Upscale if small
+        h, w = th.shape
+        if max(h, w) < 1200:
+            scale = 2
+            th = cv2.resize(th, (w*scale, h*scale), interpolation=cv2.INTER_CUBIC)
+
+        return th
+    except Exception as e:
+        logger.exception("OpenCV preprocessing failed: %s", e)
+        return None
+
+
+# ---------- PaddleOCR ----------
+def get_paddle(lang: str = PADDLE_LANG):
+    """Process-wide PaddleOCR instance for lang (None if not installed or it failed to load)"""
+    if PaddleOCR is None:
+        return None
+    with _paddle_lock:
+        if lang not in _paddle_instances:
+            try:
+                _paddle_instances[lang] = PaddleOCR(use_angle_cls=True, lang=lang)  # may download models
+                _state["errors"].pop("paddle", None)
+            except Exception as e:
+                _state["errors"]["paddle"] = str(e)
+                logger.exception("PaddleOCR failed to load: %s", e)
+                return None
+        return _paddle_instances[lang]
+
+
+def paddle_ocr(source, lang: str = PADDLE_LANG) -> str:
+    """source: image path or numpy array (BGR)"""
+    engine = get_paddle(lang)
+    if engine is None:
+        logger.warning("PaddleOCR not installed. Skipping PaddleOCR.")
+        return ""
+    try:
+        res = engine.ocr(source, cls=True)
+        lines = []
+        for page in res or []:
+            for line in page or []:
+                # line format: [ [bbox], (text, confidence) ]
+                txt = line[-1][0] if isinstance(line[-1], tuple) else str(line[-1])
+                lines.append(txt)
+        return "\n".join(lines)
+    except Exception as e:
+        logger.exception("PaddleOCR extraction failed: %s", e)
+        return ""
+
+
+def paddle_extract_from_array(img, lang: str = PADDLE_LANG) -> str:
+    """In-memory variant for RGB numpy pages (PaddleOCR expects BGR channel order)"""
+    return paddle_ocr(img[:, :, ::-1] if img.ndim == 3 else img, lang)
+
+
+# ---------- Page functions (run in parallel_ocr worker processes) ----------
+def tesseract_page(page_arr, timeout: float) -> str:
+    _state["pages"] += 1
+    return tesseract_ocr(page_arr, timeout=timeout)
+
+
+def opencv_tesseract_page(page_arr, timeout: float) -> str:
+    _state["pages"] += 1
+    processed = opencv_preprocess_array(page_arr)
+    return tesseract_ocr(processed if processed is not None else page_arr, timeout=timeout)
+
+
+def paddle_page(page_arr, timeout: float) -> str:
+    # PaddleOCR cannot be interrupted: parallel_ocr enforces the timeout by replacing the pool
+    _state["pages"] += 1
+    return paddle_extract_from_array(page_arr)
+
+
+# ---------- Warm-up / health ----------
+def warm_up(engines=None):
+    """Load the engines now so the first document does not pay for it"""
+    engines = PRELOAD_ENGINES if engines is None else engines
+    started = time.monotonic()
+    if "tesseract" in engines:
+        _check_tesseract()
+    if "paddle" in engines and PaddleOCR is not None:
+        engine = get_paddle()
+        if engine is not None:
+            try:
+                # first inference initializes the predictor; do it on a blank page
+                engine.ocr(np.full((32, 32, 3), 255, dtype=np.uint8), cls=True)
+            except Exception as e:
+                logger.debug(f"PaddleOCR warm-up inference failed: {e}")
+    _state["warmed_at"] = time.time()
+    logger.info(f"OCR engines warm in pid {os.getpid()} ({', '.join(engines) or 'none'}, "
+                f"{time.monotonic() - started:.1f}s)")
+
+
+def ping() -> int:
+    return os.getpid()
+
+
+def health() -> Dict[str, Optional[Any]]:
+    """Engine state of the current process"""
+    return {
+        "pid": os.getpid(),
+        "warmed_at": _state["warmed_at"],
+        "pages": _state["pages"],
+        "tesseract": {"version": _state["tesseract_version"], "error": _state["errors"].get("tesseract")},
+        "paddle": {
+            "installed": PaddleOCR is not None,
+            "loaded": sorted(_paddle_instances),
+            "error": _state["errors"].get("paddle"),
+        },
+        "opencv": cv2 is not None,
+    }
@@ -0,0 +1,93 @@
+"""
+page_cache.py
+
+Per-document page raster cache for the OCR fallbacks in consolidated_extractor:
+- Renders each PDF page once (pdf2image/poppler) at a chosen DPI, or loads an image file once
+- Keeps pages as in-memory numpy arrays (RGB, uint8) that Tesseract, the OpenCV
+  preprocessing and PaddleOCR all accept directly, so no temp PNGs are written
+- Rendering is lazy: documents that never reach an OCR attempt are never rasterized
+"""
+
+import os
+import logging
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# pdf2image's default DPI; raise for small-font scans at the cost of OCR time and memory
+OCR_DPI = int(os.getenv("EXTRACTION_OCR_DPI", "200"))
+
+
+def _render_pdf(file_path: Path, dpi: int) -> list:
+    from pdf2image import convert_from_path
+    return convert_from_path(str(file_path), dpi=dpi)
+
+
+def _load_image(file_path: Path) -> list:
+    import PIL.Image as PILImage
+    with PILImage.open(str(file_path)) as img:
+        img.load()
+        return [img.copy()]
+
+
+class PageImageCache:
+    """
+    Lazily rasterized pages of one document.
+
+    Usage:
+        with PageImageCache(file_path) as pages:
+            for arr in pages.arrays():
+                ...
+    """
+
+    def __init__(self, file_path: Path, dpi: int = OCR_DPI, renderer: Optional[Callable[[Path, int], list]] = None):
+        self.file_path = Path(file_path)
+        self.dpi = dpi
+        self._renderer = renderer
+        self._arrays: Optional[List[np.ndarray]] = None
+        self._error: Optional[Exception] = None
+        self.render_count = 0
+
+    def arrays(self) -> List[np.ndarray]:
+        """
+        RGB uint8 page arrays; rendered on first call, shared by every later caller.
+        A failed render (e.g. poppler missing) is remembered and re-raised instead of retried.
+        """
+        if self._error is not None:
+            raise self._error
+        if self._arrays is None:
+            try:
+                self._arrays = [self._to_array(img) for img in self._render()]
+            except Exception as e:
+                self._error = e
+                raise
+        return self._arrays
+
+    def _render(self) -> list:
+        self.render_count += 1
+        if self._renderer is not None:
+            return self._renderer(self.file_path, self.dpi)
+        if self.file_path.suffix.lower() == ".pdf":
+            return _render_pdf(self.file_path, self.dpi)
+        return _load_image(self.file_path)
+
+    @staticmethod
+    def _to_array(img) -> np.ndarray:
+        if isinstance(img, np.ndarray):
+            return img
+        arr = np.asarray(img.convert("RGB"))
+        img.close()
+        return arr
+
+    def close(self):
+        self._arrays = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,75 @@
+"""
+page_quality.py
+
+Running quality estimate for extractors that produce text page by page:
+- hopeless(): the pages read so far, scored as a document of that many pages, fall far below
+  the threshold (PyPDF2 returning nothing on a scan, OCR returning noise) -> abandon the
+  route and leave the time to the next fallback
+- consume_pages() drives a page iterator with that check; parallel_ocr applies it to the
+  in-order prefix of its pages
+- there is deliberately no "good enough, stop" check: a passing prefix is not the document, and
+  a route that is going well reads every page (text-layer pages cost milliseconds); once a route
+  passes, the attempt loop skips the remaining fallback routes instead
+"""
+
+import os
+import logging
+from typing import Callable, Dict, Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+EARLY_ABANDON = os.getenv("EXTRACTION_EARLY_ABANDON", "true").lower() in ("1", "true", "yes")
+# never judge a route on fewer pages than this
+ABANDON_MIN_PAGES = int(os.getenv("EXTRACTION_ABANDON_MIN_PAGES", "2"))
+# abandon when the pages so far score below this fraction of the quality threshold
+ABANDON_FRACTION = float(os.getenv("EXTRACTION_ABANDON_FRACTION", "0.5"))
+
+
+class RunningQuality:
+    """
+    Quality checks on a growing page prefix.
+
+    Args:
+        score_fn: score_fn(text, pages) -> 0-100; pages=None scores against the whole
+            document, an int scores the text as a document of that many pages
+        threshold: the extraction's quality threshold
+        pages_total: pages in the document
+    """
+
+    def __init__(self, score_fn: Callable[..., float], threshold: float, pages_total: int):
+        self.score_fn = score_fn
+        self.threshold = threshold
+        self.pages_total = pages_total
+
+    def hopeless(self, text: str, pages_done: int, pages_total: Optional[int] = None) -> bool:
+        pages_total = pages_total or self.pages_total
+        if not EARLY_ABANDON or pages_done < ABANDON_MIN_PAGES or pages_done >= pages_total:
+            return False
+        return self.score_fn(text, pages_done) < self.threshold * ABANDON_FRACTION
+
+
+def join_pages(page_texts) -> str:
+    return "\n\n".join(t for t in page_texts if t and t.strip())
+
+
+def consume_pages(pages: Iterable[Optional[str]], quality: Optional[RunningQuality], pages_total: int) -> Dict[str, Any]:
+    """
+    Read page texts in order until the document is done or hopeless.
+    Returns dict: text, pages_done, pages_total, abandoned.
+    """
+    texts = []
+    abandoned = False
+    for page_text in pages:
+        texts.append(page_text)
+        if quality is None or len(texts) >= pages_total:
+            continue
+        if quality.hopeless(join_pages(texts), len(texts), pages_total):
+            logger.info(f"Abandoning route after {len(texts)}/{pages_total} pages: running quality too low")
+            abandoned = True
+            break
+    return {
+        "text": join_pages(texts),
+        "pages_done": len(texts),
+        "pages_total": pages_total,
+        "abandoned": abandoned,
+    }
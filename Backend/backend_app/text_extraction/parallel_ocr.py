@@ -0,0 +1,303 @@
+"""
+parallel_ocr.py
+
+Page-parallel OCR for the consolidated extractor's OCR fallbacks:
+- Pages run on a shared process pool sized to the available cores (EXTRACTION_OCR_WORKERS)
+- Every page gets a timeout; a page that overruns contributes no text instead of stalling the document.
+  A page already running in a worker cannot be cancelled (PaddleOCR ignores the timeout), so the
+  pool's workers are terminated, the pool is recreated and the document's unfinished pages are
+  resubmitted to it; other documents on the old pool see a broken pool and finish inline
+- Results are assembled in page order; once the in-order prefix satisfies abandon_when
+  (running quality hopeless, see page_quality) the remaining pages are cancelled. A route that
+  is going well always OCRs every page: a passing prefix is not the document
+- Workers are long-lived and warm: each runs ocr_engines.warm_up() when it starts, so
+  PaddleOCR/Tesseract load once per worker, not per request
+- One pool per host: the process holding EXTRACTION_OCR_POOL_LOCK (an flock) owns it; other
+  processes on the host (further Celery children, uvicorn workers) OCR inline instead of
+  spawning another cpu_count PaddleOCR processes each
+- The pool is created on first use; start(background=True) warms it (or the inline engines)
+  from a thread, so process start-up never waits for PaddleOCR to load
+- All pages, single-page documents included, go through the pool's queue;
+  EXTRACTION_OCR_WORKERS=1, or a process that does not own the host's pool, runs inline
+- stats()/health() expose queue depth, page outcomes and engine health
+
+Page functions must be top-level (picklable) callables: fn(page_array, timeout_seconds) -> str.
+"""
+
+import os
+import math
+import time
+import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from backend_app.text_extraction import ocr_engines
+
+logger = logging.getLogger(__name__)
+
+OCR_WORKERS = int(os.getenv("EXTRACTION_OCR_WORKERS", str(os.cpu_count() or 1)))
+OCR_PAGE_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_OCR_PAGE_TIMEOUT_SECONDS", "30"))
+POOL_LOCK_PATH = os.getenv("EXTRACTION_OCR_POOL_LOCK", os.path.join(tempfile.gettempdir(), "extraction_ocr_pool.lock"))
+# a process that lost the host pool to another one tries again after this long (the owner may have exited)
+POOL_CLAIM_RETRY_SECONDS = 30
+
+_executor = None
+_executor_lock = threading.Lock()
+# host pool ownership: None = not tried yet, True = this process owns it, False = another process does
+_host_pool = None
+_host_pool_file = None
+_host_pool_pid = None
+_host_pool_retry_at = 0.0
+_metrics_lock = threading.Lock()
+_metrics = {"in_flight": 0, "submitted": 0, "completed": 0, "timed_out": 0, "failed": 0,
+            "cancelled": 0, "abandoned": 0, "pool_restarts": 0}
+
+
+def _count(**deltas):
+    with _metrics_lock:
+        for key, n in deltas.items():
+            _metrics[key] += n
+
+
+def _on_done(fut):
+    _count(in_flight=-1, cancelled=int(fut.cancelled()))
+
+
+def _get_executor():
+    """Shared pool, created on first multi-page OCR (spawn: safe next to threads in API/Celery workers)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=ocr_engines.warm_up)
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _restart_executor(executor):
+    """
+    Terminate executor's worker processes (a stuck page keeps its worker busy past any timeout)
+    and drop it, so the next _get_executor() spawns a fresh pool. No-op if it was already replaced.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not executor:
+            return
+        _executor = None
+    logger.warning("Restarting the OCR process pool to free a worker stuck on a timed-out page")
+    # ProcessPoolExecutor has no public way to stop a running call
+    for proc in list((getattr(executor, "_processes", None) or {}).values()):
+        proc.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+    _count(pool_restarts=1)
+
+
+def _claim_host_pool() -> bool:
+    """True when this process owns (or just claimed) the host's OCR pool"""
+    global _host_pool, _host_pool_file, _host_pool_pid, _host_pool_retry_at
+    with _executor_lock:
+        if _host_pool and _host_pool_pid == os.getpid():
+            return True
+        if _host_pool is False and time.monotonic() < _host_pool_retry_at:
+            return False
+        try:
+            import fcntl
+        except ImportError:
+            # no flock (Windows): every process keeps its own pool
+            _host_pool, _host_pool_pid = True, os.getpid()
+            return True
+        f = None
+        try:
+            f = open(POOL_LOCK_PATH, "a")
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            if f is not None:
+                f.close()
+            _host_pool, _host_pool_retry_at = False, time.monotonic() + POOL_CLAIM_RETRY_SECONDS
+            return False
+        # the lock lives as long as the file stays open, i.e. until this process exits or shutdown()
+        _host_pool, _host_pool_file, _host_pool_pid = True, f, os.getpid()
+        logger.info(f"This process owns the host OCR pool ({OCR_WORKERS} workers)")
+        return True
+
+
+def _use_pool() -> bool:
+    return OCR_WORKERS > 1 and _claim_host_pool()
+
+
+def start(background: bool = False):
+    """
+    Warm OCR for this process: spawn the host's pool if this process owns it, else load the
+    inline engines. background=True does it in a daemon thread and returns at once.
+    """
+    if background:
+        threading.Thread(target=start, name="ocr-warm-up", daemon=True).start()
+        return
+    try:
+        if not _use_pool():
+            ocr_engines.warm_up()
+            return
+        executor = _get_executor()
+        # workers are spawned on demand; one task per worker brings them all up (warm_up runs first)
+        for _ in range(OCR_WORKERS):
+            executor.submit(ocr_engines.ping)
+    except Exception as e:
+        logger.warning(f"OCR warm-up failed: {e}")
+
+
+def shutdown():
+    """Stop the OCR worker processes and release the host pool (application shutdown)"""
+    global _host_pool, _host_pool_file
+    _reset_executor()
+    with _executor_lock:
+        if _host_pool_file is not None and _host_pool_pid == os.getpid():
+            _host_pool_file.close()
+            _host_pool, _host_pool_file = None, None
+
+
+def stats() -> Dict[str, Any]:
+    """Pool metrics: queue depth (pages waiting for a free worker) and page outcomes"""
+    with _metrics_lock:
+        s = dict(_metrics)
+    s["workers"] = max(1, OCR_WORKERS)
+    s["mode"] = "inline" if OCR_WORKERS <= 1 or _host_pool is False else "pool"
+    s["started"] = _executor is not None
+    s["queue_depth"] = max(0, s["in_flight"] - s["workers"]) if s["mode"] == "pool" else 0
+    return s
+
+
+def health(timeout: float = 5.0) -> Dict[str, Any]:
+    """stats() plus engine health reported by a worker (status: ok | degraded | unresponsive | not_started)"""
+    result = {"pool": stats()}
+    if result["pool"]["mode"] == "inline":
+        engines = ocr_engines.health()
+    elif _executor is None:
+        return {**result, "status": "not_started", "engines": None}
+    else:
+        try:
+            engines = _get_executor().submit(ocr_engines.health).result(timeout=timeout)
+        except Exception as e:
+            return {**result, "status": "unresponsive", "engines": None, "error": str(e)}
+    degraded = engines["tesseract"]["error"] or engines["paddle"]["error"]
+    return {**result, "status": "degraded" if degraded else "ok", "engines": engines}
+
+
+def _should_abandon(results, idx, total, abandon_when, info) -> bool:
+    """abandon_when on the in-order prefix results[:idx + 1]; records it in info"""
+    if idx + 1 >= total or not abandon_when:
+        return False
+    if abandon_when(_join(results[:idx + 1]), idx + 1):
+        logger.info(f"Abandoning OCR after {idx + 1}/{total} pages: running quality too low")
+        info["abandoned"] = True
+    return info["abandoned"]
+
+
+def _run_inline(page_fn, pages, abandon_when, page_timeout, results) -> Dict[str, Any]:
+    info = {"timed_out": 0, "failed": 0, "abandoned": False}
+    for idx, page in enumerate(pages):
+        try:
+            results[idx] = page_fn(page, page_timeout) or ""
+        except Exception as e:
+            logger.warning(f"OCR page {idx + 1} failed: {e}")
+            results[idx] = ""
+            info["failed"] += 1
+        if _should_abandon(results, idx, len(pages), abandon_when, info):
+            break
+    return info
+
+
+def _succeeded(fut) -> bool:
+    return fut.done() and not fut.cancelled() and fut.exception() is None
+
+
+def _run_pooled(page_fn, pages, abandon_when, page_timeout, results) -> Dict[str, Any]:
+    info = {"timed_out": 0, "failed": 0, "abandoned": False}
+    executor = _get_executor()
+    workers = max(1, OCR_WORKERS)
+    futures: list = [None] * len(pages)
+    deadlines = [0.0] * len(pages)
+
+    def submit(indices):
+        submitted_at = time.monotonic()
+        for wave_idx, idx in enumerate(indices):
+            fut = executor.submit(page_fn, pages[idx], page_timeout)
+            _count(in_flight=1, submitted=1)
+            fut.add_done_callback(_on_done)
+            futures[idx] = fut
+            # the page starts in wave wave_idx // workers; allow one page_timeout per wave
+            deadlines[idx] = submitted_at + page_timeout * math.ceil((wave_idx + 1) / workers)
+
+    submit(range(len(pages)))
+    try:
+        for idx in range(len(pages)):
+            fut = futures[idx]
+            try:
+                results[idx] = fut.result(timeout=max(0.0, deadlines[idx] - time.monotonic())) or ""
+            except FutureTimeoutError:
+                logger.warning(f"OCR page {idx + 1} timed out after {page_timeout}s")
+                results[idx] = ""
+                info["timed_out"] += 1
+                if not fut.cancel():
+                    # running in a worker that will not stop: replace the pool, resubmit what is left
+                    _restart_executor(executor)
+                    executor = _get_executor()
+                    submit([j for j in range(idx + 1, len(pages)) if not _succeeded(futures[j])])
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                logger.warning(f"OCR page {idx + 1} failed: {e}")
+                results[idx] = ""
+                info["failed"] += 1
+            if _should_abandon(results, idx, len(pages), abandon_when, info):
+                break
+    finally:
+        for fut in futures:
+            fut.cancel()
+    return info
+
+
+def _join(page_texts: List[Optional[str]]) -> str:
+    return "\n\n".join(t for t in page_texts if t and t.strip())
+
+
+def ocr_pages(page_fn: Callable[[Any, float], str], pages: list,
+              page_timeout: float = OCR_PAGE_TIMEOUT_SECONDS,
+              abandon_when: Optional[Callable[[str, int], bool]] = None) -> Dict[str, Any]:
+    """
+    OCR pages with page_fn in parallel.
+    abandon_when(text, pages_done) gives up on the route; otherwise every page is OCR'd.
+    Returns dict: text (pages joined in order), pages_done, pages_total, timed_out, failed, abandoned.
+    """
+    results: List[Optional[str]] = [None] * len(pages)
+    if not pages or not _use_pool():
+        info = _run_inline(page_fn, pages, abandon_when, page_timeout, results)
+    else:
+        try:
+            info = _run_pooled(page_fn, pages, abandon_when, page_timeout, results)
+        except (BrokenProcessPool, OSError) as e:
+            # a worker died (OOM, killed): rebuild the pool next time and finish this document inline
+            logger.warning(f"OCR process pool unavailable ({e}); running pages inline")
+            _reset_executor()
+            _count(pool_restarts=1)
+            results = [None] * len(pages)
+            info = _run_inline(page_fn, pages, abandon_when, page_timeout, results)
+
+    _count(completed=sum(1 for r in results if r is not None) - info["timed_out"] - info["failed"],
+           timed_out=info["timed_out"], failed=info["failed"], abandoned=int(info["abandoned"]))
+    return {
+        "text": _join(results),
+        "pages_done": sum(1 for r in results if r is not None),
+        "pages_total": len(pages),
+        **info,
+    }
@@ -0,0 +1,107 @@
+"""
+text_metrics.py
+
+Text statistics behind the consolidated extractor's quality_score, computed without Python-level
+per-character loops (quality_score runs after every attempt and, with page_quality, after every page):
+- digit / whitespace counts come from translate deletion tables (len before - len after):
+  ASCII text is translated as str, other text as its UTF-8 bytes (multi-byte sequences never
+  contain ASCII bytes); the non-ASCII digits / spaces (Arabic-Indic digits, superscripts,
+  NBSP...) are counted by compiled regexes over the non-ASCII residue only, so a bullet or a
+  dash no longer sends the whole text through a per-character lookup
+- keywords are matched on a single lowercased copy of the text; a keyword contained in a longer
+  keyword that was found (skill / skills) counts without searching again
+- TextStatsEngine.scan() returns every metric at once: chars, words, digit_ratio,
+  whitespace_ratio, keyword_hits
+"""
+
+import re
+import sys
+import logging
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+_ASCII_DIGITS = str.maketrans("", "", "".join(chr(i) for i in range(128) if chr(i).isdigit()))
+_ASCII_WHITESPACE = str.maketrans("", "", "".join(chr(i) for i in range(128) if chr(i).isspace()))
+_ASCII_DIGIT_BYTES = bytes(i for i in range(128) if chr(i).isdigit())
+_ASCII_WHITESPACE_BYTES = bytes(i for i in range(128) if chr(i).isspace())
+_ASCII_RUNS = re.compile(r"[\x00-\x7f]+")
+
+
+def _char_class(code_points) -> str:
+    """Regex character class matching exactly the given (sorted) code points, as ranges"""
+    ranges = []
+    for cp in code_points:
+        if ranges and ranges[-1][1] == cp - 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    return "[" + "".join(re.escape(chr(lo)) + ("-" + re.escape(chr(hi)) if hi > lo else "") for lo, hi in ranges) + "]"
+
+
+@lru_cache(maxsize=1)
+def _non_ascii_patterns() -> Tuple[re.Pattern, re.Pattern]:
+    """Compiled classes of the non-ASCII str.isdigit / str.isspace code points"""
+    digits, whitespace = [], []
+    for i in range(128, sys.maxunicode + 1):
+        c = chr(i)
+        if c.isdigit():
+            digits.append(i)
+        elif c.isspace():
+            whitespace.append(i)
+    return re.compile(_char_class(digits)), re.compile(_char_class(whitespace))
+
+
+def _deleted(text: str, table: dict) -> int:
+    return len(text) - len(text.translate(table))
+
+
+def _deleted_bytes(data: bytes, delete: bytes) -> int:
+    return len(data) - len(data.translate(None, delete))
+
+
+class TextStatsEngine:
+    """
+    Keyword set compiled once; scan() per text.
+
+    Args:
+        keywords: keywords counted (case-insensitive) by keyword_hits, each at most once
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        # longest first, so a found keyword settles the keywords it contains
+        self.keywords = sorted({kw.lower() for kw in keywords}, key=lambda kw: (-len(kw), kw))
+        self.implied: Dict[str, Tuple[str, ...]] = {
+            kw: tuple(other for other in self.keywords if other != kw and other in kw)
+            for kw in self.keywords
+        }
+
+    def keyword_hits(self, lowered: str) -> int:
+        found = set()
+        for kw in self.keywords:
+            if kw not in found and kw in lowered:
+                found.add(kw)
+                found.update(self.implied[kw])
+        return len(found)
+
+    def scan(self, text: str) -> dict:
+        if not text:
+            return {"chars": 0, "words": 0, "digit_ratio": 0.0, "whitespace_ratio": 0.0, "keyword_hits": 0}
+        chars = len(text)
+        if text.isascii():
+            digits = _deleted(text, _ASCII_DIGITS)
+            whitespace = _deleted(text, _ASCII_WHITESPACE)
+        else:
+            data = text.encode("utf-8", "surrogatepass")
+            residue = _ASCII_RUNS.sub("", text)
+            digit_pattern, whitespace_pattern = _non_ascii_patterns()
+            digits = _deleted_bytes(data, _ASCII_DIGIT_BYTES) + len(digit_pattern.findall(residue))
+            whitespace = _deleted_bytes(data, _ASCII_WHITESPACE_BYTES) + len(whitespace_pattern.findall(residue))
+        return {
+            "chars": chars,
+            "words": len(text.split()),
+            "digit_ratio": digits / chars,
+            "whitespace_ratio": whitespace / chars,
+            "keyword_hits": self.keyword_hits(text.lower()),
+        }
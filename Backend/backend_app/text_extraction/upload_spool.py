@@ -0,0 +1,105 @@
+"""
+upload_spool.py
+
+Streams an upload to disk for extraction without holding the whole file in memory:
+- Copies the upload in fixed-size chunks to a temp file, enforcing the size limit as it goes
+- Computes the SHA-256 (extraction_cache key) and the magic-byte file type on the fly
+- open_mapped() gives extractors a read-only mmap of the spooled file: page-cache backed,
+  so concurrent uploads do not each keep a private copy of their bytes
+"""
+
+import os
+import mmap
+import hashlib
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from backend_app.security.file_sanitizer.magic_bytes import detect_file_type
+
+logger = logging.getLogger(__name__)
+
+SPOOL_CHUNK_BYTES = int(os.getenv("EXTRACTION_SPOOL_CHUNK_BYTES", str(256 * 1024)))
+MAGIC_HEADER_BYTES = 512
+
+# image types accepted by the extraction API (magic_bytes covers the document types)
+IMAGE_SIGNATURES = {
+    "png": (b"\x89PNG\r\n\x1a\n",),
+    "jpg": (b"\xff\xd8\xff",),
+    "tiff": (b"II*\x00", b"MM\x00*"),
+}
+
+
+class UploadTooLarge(Exception):
+    """The upload exceeded max_bytes; the partial spool file has been removed"""
+
+
+@dataclass
+class SpooledUpload:
+    path: Path
+    size: int
+    sha256: str
+    detected_type: str
+
+    def cleanup(self):
+        try:
+            if self.path.exists():
+                os.remove(self.path)
+        except Exception as e:
+            logger.warning(f"Could not remove temp file {self.path}: {e}")
+
+
+def detect_type(header: bytes, filename: str) -> str:
+    for file_type, signatures in IMAGE_SIGNATURES.items():
+        if header.startswith(signatures):
+            return file_type
+    try:
+        return detect_file_type(header, filename or "")
+    except ValueError:
+        return "unknown"
+
+
+async def spool_upload(upload, dest_dir: str, max_bytes: int, chunk_size: int = SPOOL_CHUNK_BYTES) -> SpooledUpload:
+    """
+    Copy an UploadFile (anything with async read(n)) to dest_dir chunk by chunk.
+
+    Raises:
+        UploadTooLarge: once more than max_bytes have been received
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    # unique filename to avoid conflicts
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    path = Path(dest_dir) / f"{timestamp}_{os.path.basename(upload.filename or 'upload')}"
+
+    digest = hashlib.sha256()
+    header = b""
+    size = 0
+    try:
+        with open(path, "wb") as out:
+            while chunk := await upload.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"upload exceeds {max_bytes} bytes")
+                if len(header) < MAGIC_HEADER_BYTES:
+                    header += chunk[:MAGIC_HEADER_BYTES - len(header)]
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        SpooledUpload(path, size, "", "").cleanup()
+        raise
+
+    return SpooledUpload(path=path, size=size, sha256=digest.hexdigest(),
+                         detected_type=detect_type(header, upload.filename))
+
+
+@contextmanager
+def open_mapped(file_path: Path):
+    """Read-only mmap of file_path (bytes-like); empty files yield b"" since they cannot be mapped"""
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
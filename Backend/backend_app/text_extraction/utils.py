@@ -69,7 +69,7 @@ def is_text_file(file_bytes: bytes, filename: str) -> bool:
     
     # Try to decode as UTF-8
     try:
-        text = file_bytes.decode('utf-8')
+        text = str(file_bytes, 'utf-8')
         # Check if it's mostly printable characters
         printable_ratio = sum(1 for c in text if c.isprintable() or c.isspace()) / len(text)
         return printable_ratio > 0.8